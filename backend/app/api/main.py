@@ -1,9 +1,14 @@
+import itertools
+import os
+import secrets
 import time
-import uuid
+from contextlib import asynccontextmanager
 
+from anyio import to_thread
 from fastapi import FastAPI, Request
 from dotenv import load_dotenv
 
+from app.core import auth, db as app_db, session_touch
 from app.core.logging_utils import log_event
 from app.routes import (
     auth_router,
@@ -19,8 +24,42 @@ from app.ingest.calendar_ingest import router as calendar_router
 load_dotenv()
 
 
+# Sync endpoints run on anyio's worker threads (default 40). Match that to the
+# DB pool so concurrent requests are bounded by connections, not threads.
+API_THREADPOOL_SIZE = int(os.getenv("API_THREADPOOL_SIZE", str(app_db.DB_POOL_SIZE + app_db.DB_MAX_OVERFLOW)))
+
+
+# Request ids are a random per-process prefix plus a counter, which skips the
+# os.urandom read uuid4 does per request. Reseeded after fork so preforked
+# workers never share a prefix.
+_request_id_prefix = secrets.token_hex(8)
+_request_id_counter = itertools.count()
+
+
+def _reseed_request_ids() -> None:
+    global _request_id_prefix, _request_id_counter
+    _request_id_prefix = secrets.token_hex(8)
+    _request_id_counter = itertools.count()
+
+
+os.register_at_fork(after_in_child=_reseed_request_ids)
+
+
+def _next_request_id() -> str:
+    return f"{_request_id_prefix}-{next(_request_id_counter):x}"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    to_thread.current_default_thread_limiter().total_tokens = max(1, API_THREADPOOL_SIZE)
+    yield
+    # persist any coalesced session touches before the process exits
+    session_touch.flush()
+    await auth.close_http_client()
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="Local Context Agent")
+    app = FastAPI(title="Local Context Agent", lifespan=lifespan)
 
     app.include_router(auth_router)
     app.include_router(drive_router)
@@ -32,7 +71,7 @@ def create_app() -> FastAPI:
 
     @app.middleware("http")
     async def request_logging(request: Request, call_next):
-        request_id = str(uuid.uuid4())
+        request_id = _next_request_id()
         start = time.perf_counter()
         base_log_fields = {
             "request_id": request_id,
@@ -1,20 +1,29 @@
+import asyncio
+import base64
 import hashlib
 import hmac
-import json
 import os
 import secrets
+import ssl
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+import httpx
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse, RedirectResponse
 from google.auth.transport.requests import Request as GoogleRequest
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from itsdangerous import BadSignature, URLSafeSerializer
+from itsdangerous import BadSignature, SignatureExpired, TimestampSigner, URLSafeTimedSerializer
+from sqlalchemy import func, select, text
 from sqlalchemy.orm import Session
 
+from app.core import session_cache, session_touch
 from app.core.db import SessionLocal, get_db
+from app.core.logging_utils import log_event
 from app.core.models import (
     ContentIndex,
     DriveSession,
@@ -27,7 +36,16 @@ from app.integrations.google_clients import build_flow
 from app.rag import vector
 from app.core.runtime import ensure_writes_enabled
 
+try:
+    from blake3 import blake3 as _blake3
+except ImportError:
+    _blake3 = None
+
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -52,18 +70,48 @@ SESSION_COOKIE_SAMESITE = os.getenv(
 )
 CSRF_COOKIE_NAME = os.getenv("CSRF_COOKIE_NAME", "lc_csrf")
 CSRF_HEADER_NAME = os.getenv("CSRF_HEADER_NAME", "X-CSRF-Token")
-STATE_SIGNER = URLSafeSerializer(SESSION_SECRET, salt="oauth-state")
+# header lookups are case-insensitive, so collapse spellings that only differ in case
+_CSRF_HEADER_NAMES = tuple(
+    dict.fromkeys(name.lower() for name in (CSRF_HEADER_NAME, "X-CSRFToken", "X-Csrf-Token"))
+)
+_CSRF_SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+NONCE_SIGNER = TimestampSigner(SESSION_SECRET, salt="oauth-state")
+OAUTH_STATE_MAX_AGE_SECONDS = 600
+SESSION_SIGNER = URLSafeTimedSerializer(SESSION_SECRET, salt="session")
 
 DRIVE_CREDENTIALS_KEY = os.getenv("DRIVE_CREDENTIALS_KEY")
+_CREDENTIALS_AEAD_VERSION = 1
 _fernet: Optional[Fernet] = None
+_aead: Optional[AESGCM] = None
 if DRIVE_CREDENTIALS_KEY:
     try:
+        # Fernet stays around to read credentials written before AES-GCM.
         _fernet = Fernet(DRIVE_CREDENTIALS_KEY)
+        _aead = AESGCM(
+            HKDF(
+                algorithm=hashes.SHA256(),
+                length=32,
+                salt=None,
+                info=b"drive-credentials-aes-gcm",
+            ).derive(base64.urlsafe_b64decode(DRIVE_CREDENTIALS_KEY))
+        )
     except Exception as exc:
         raise RuntimeError("DRIVE_CREDENTIALS_KEY must be a valid Fernet key.") from exc
 elif APP_ENV != "development":
     raise RuntimeError("DRIVE_CREDENTIALS_KEY is required outside development.")
 
+GOOGLE_USERINFO_URL = "https://www.googleapis.com/oauth2/v2/userinfo"
+USERINFO_TIMEOUT_SECONDS = 10.0
+_http = httpx.AsyncClient(timeout=USERINFO_TIMEOUT_SECONDS)
+
+
+async def close_http_client() -> None:
+    """Close the userinfo client's pool at shutdown; later requests get a fresh client."""
+    global _http
+    client, _http = _http, httpx.AsyncClient(timeout=USERINFO_TIMEOUT_SECONDS)
+    await client.aclose()
+
+
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
@@ -76,12 +124,86 @@ def _ensure_aware(dt: Optional[datetime]) -> Optional[datetime]:
     return dt
 
 
-def _hash_token(token: str) -> str:
-    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+def _blake2b_digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=32).digest()
+
+
+# Keyed BLAKE2b is a MAC: a leaked session table can't be brute-forced offline
+# without the secret, and 16 bytes is plenty for a lookup key.
+_TOKEN_MAC_KEY = hashlib.blake2b(SESSION_SECRET.encode("utf-8"), digest_size=32, person=b"lc-token").digest()
+
+
+def _blake2b_mac_digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, key=_TOKEN_MAC_KEY, digest_size=16).digest()
+
+
+def _sha256_digest(data: bytes) -> bytes:
+    return hashlib.sha256(data).digest()
+
+
+_TOKEN_HASHERS = {
+    "blake2b-mac": _blake2b_mac_digest,
+    "blake2b": _blake2b_digest,
+    "sha256": _sha256_digest,
+}
+if _blake3 is not None:
+    _TOKEN_HASHERS["blake3"] = lambda data: _blake3(data).digest()
+
+# The digest is persisted, so every host must agree on the algorithm. Other
+# known algorithms are still accepted on lookup and upgraded on first use,
+# which keeps switching (or rolling back) this flag non-disruptive.
+SESSION_TOKEN_HASH = os.getenv("SESSION_TOKEN_HASH", "blake2b-mac").lower()
+if SESSION_TOKEN_HASH not in _TOKEN_HASHERS:
+    raise RuntimeError(
+        f"SESSION_TOKEN_HASH must be one of {sorted(_TOKEN_HASHERS)}; got {SESSION_TOKEN_HASH!r}."
+    )
+_primary_hasher = _TOKEN_HASHERS[SESSION_TOKEN_HASH]
+_fallback_hashers = tuple(fn for name, fn in _TOKEN_HASHERS.items() if name != SESSION_TOKEN_HASH)
+
+
+def _shani_available() -> Optional[bool]:
+    """True/False from the CPU flags on Linux; None when they can't be read."""
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as fh:
+            for line in fh:
+                if line.startswith("flags"):
+                    return "sha_ni" in line.split()
+    except OSError:
+        return None
+    return None
+
+
+def _check_sha256_acceleration() -> None:
+    # hashlib.sha256 dispatches into libcrypto, which picks SHA-NI itself when
+    # both the CPU and the OpenSSL build support it.
+    if SESSION_TOKEN_HASH != "sha256":
+        return
+    if "sha256" not in hashlib.algorithms_available:
+        raise RuntimeError("SESSION_TOKEN_HASH=sha256 but hashlib has no sha256 implementation.")
+    if ssl.OPENSSL_VERSION_INFO < (3, 0):
+        log_event("sha256_openssl_outdated", openssl=ssl.OPENSSL_VERSION, level="warning")
+    if _shani_available() is False:
+        log_event("sha256_not_accelerated", openssl=ssl.OPENSSL_VERSION, level="warning")
+
+
+_check_sha256_acceleration()
+
+
+def _hash_token(token: str) -> bytes:
+    # Not memoized: a cache keyed on the token would keep raw bearer tokens in
+    # memory. Raw digest bytes: compared in SQL against a fixed-width column, so
+    # `=` only leaks the (constant) length. Compare in Python with hmac.compare_digest.
+    return _primary_hasher(token.encode("utf-8"))
+
+
+def _legacy_token_hashes(token: str) -> List[bytes]:
+    data = token.encode("utf-8")
+    return [fn(data) for fn in _fallback_hashers]
 
 
 def _random_token() -> str:
-    return secrets.token_urlsafe(48)
+    # 36 bytes -> 48 base64 chars with no padding to strip
+    return base64.urlsafe_b64encode(secrets.token_bytes(36)).decode("ascii")
 
 
 def _serialize_credentials(creds: Credentials) -> Dict[str, Any]:
@@ -93,23 +215,32 @@ def _serialize_credentials(creds: Credentials) -> Dict[str, Any]:
         "client_secret": creds.client_secret,
         "scopes": list(creds.scopes or []),
     }
-    if not _fernet:
+    if not _aead:
         return payload
-    blob = json.dumps(payload).encode("utf-8")
-    ciphertext = _fernet.encrypt(blob).decode("utf-8")
-    return {"ciphertext": ciphertext}
+    blob = orjson.dumps(payload)
+    nonce = os.urandom(12)
+    sealed = bytes([_CREDENTIALS_AEAD_VERSION]) + nonce + _aead.encrypt(nonce, blob, None)
+    return {"ciphertext": base64.urlsafe_b64encode(sealed).decode("ascii")}
+
+
+def _decrypt_credentials(ciphertext: str) -> bytes:
+    raw = base64.urlsafe_b64decode(ciphertext)
+    if raw[:1] == bytes([_CREDENTIALS_AEAD_VERSION]):
+        return _aead.decrypt(raw[1:13], raw[13:], None)
+    # Fernet tokens start with 0x80.
+    return _fernet.decrypt(ciphertext.encode("utf-8"))
 
 
 def _deserialize_credentials(data: Dict[str, Any]) -> Dict[str, Any]:
     if "ciphertext" not in data:
         return data
-    if not _fernet:
+    if not _fernet or not _aead:
         raise RuntimeError("Encrypted Google credentials present but DRIVE_CREDENTIALS_KEY is not configured.")
     try:
-        decrypted = _fernet.decrypt(data["ciphertext"].encode("utf-8"))
-    except InvalidToken as exc:
+        decrypted = _decrypt_credentials(data["ciphertext"])
+    except (InvalidTag, InvalidToken, ValueError) as exc:
         raise RuntimeError("Stored Google credentials could not be decrypted; reconnect your Google account.") from exc
-    return json.loads(decrypted.decode("utf-8"))
+    return orjson.loads(decrypted)
 
 
 def _set_session_cookie(response: RedirectResponse, token: str) -> None:
@@ -125,7 +256,7 @@ def _set_session_cookie(response: RedirectResponse, token: str) -> None:
 
 
 def _new_csrf_token() -> str:
-    return secrets.token_urlsafe(32)
+    return base64.urlsafe_b64encode(secrets.token_bytes(24)).decode("ascii")
 
 
 def _set_csrf_cookie(response: Response, token: str) -> None:
@@ -149,9 +280,14 @@ def ensure_csrf_cookie(request: Request, response: Response) -> str:
     return token
 
 
-def _fetch_profile(creds: Credentials) -> Dict[str, Any]:
-    svc = build("oauth2", "v2", credentials=creds)
-    return svc.userinfo().get().execute()
+async def _fetch_profile(creds: Credentials) -> Dict[str, Any]:
+    try:
+        resp = await _http.get(GOOGLE_USERINFO_URL, headers={"Authorization": f"Bearer {creds.token}"})
+        resp.raise_for_status()
+    except httpx.HTTPError as exc:
+        log_event("google_profile_fetch_failed", error=str(exc), level="warning")
+        raise HTTPException(status_code=502, detail="Failed to fetch Google profile") from exc
+    return orjson.loads(resp.content)
 
 
 def _upsert_user(db: Session, profile: Dict[str, Any]) -> User:
@@ -160,8 +296,39 @@ def _upsert_user(db: Session, profile: Dict[str, Any]) -> User:
     if not sub or not email:
         raise HTTPException(status_code=400, detail="Google profile missing id/email")
 
-    user = db.query(User).filter(User.google_sub == sub).one_or_none()
     now = _utcnow()
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return _upsert_user_fallback(db, sub, email, profile, now)
+
+    stmt = insert(User).values(
+        google_sub=sub,
+        email=email,
+        full_name=profile.get("name"),
+        picture=profile.get("picture"),
+        created_at=now,
+        updated_at=now,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[User.google_sub],
+        set_={
+            "email": stmt.excluded.email,
+            "full_name": func.coalesce(stmt.excluded.full_name, User.full_name),
+            "picture": func.coalesce(stmt.excluded.picture, User.picture),
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ).returning(User)
+    return db.scalars(stmt, execution_options={"populate_existing": True}).one()
+
+
+def _upsert_user_fallback(
+    db: Session, sub: str, email: str, profile: Dict[str, Any], now: datetime
+) -> User:
+    user = db.query(User).filter(User.google_sub == sub).one_or_none()
     if user is None:
         user = User(
             google_sub=sub,
@@ -177,12 +344,12 @@ def _upsert_user(db: Session, profile: Dict[str, Any]) -> User:
         user.full_name = profile.get("name") or user.full_name
         user.picture = profile.get("picture") or user.picture
         user.updated_at = now
-    db.commit()
-    db.refresh(user)
+    db.flush()
     return user
 
 
 def _persist_google_credentials(db: Session, user_id: str, creds: Credentials) -> None:
+    _forget_credentials(user_id)
     record = db.get(DriveSession, user_id)
     if record is None:
         record = DriveSession(user_id=user_id)
@@ -191,26 +358,43 @@ def _persist_google_credentials(db: Session, user_id: str, creds: Credentials) -
     record.updated_at = _utcnow()
     if not record.created_at:
         record.created_at = _utcnow()
-    db.commit()
+    db.flush()
 
 
 def _issue_session(db: Session, user: User) -> str:
-    raw = _random_token()
+    raw = SESSION_SIGNER.dumps({"uid": user.id, "sid": _random_token()})
     token_hash = _hash_token(raw)
     expires_at = _utcnow() + timedelta(days=SESSION_TTL_DAYS)
-    session_row = UserSession(user_id=user.id, token_hash=token_hash, expires_at=expires_at)
-    db.add(session_row)
-    db.commit()
+    db.add(UserSession(user_id=user.id, token_hash=token_hash, expires_at=expires_at))
+    db.flush()
     return raw
 
 
 def _extract_session_token(request: Request) -> Optional[str]:
     cookie = request.cookies.get(SESSION_COOKIE_NAME)
-    authz = request.headers.get("Authorization") or ""
-    header_token = None
-    if authz.lower().startswith("bearer "):
-        header_token = authz.split(" ", 1)[1].strip()
-    return cookie or header_token
+    if cookie:
+        return cookie
+    authz = request.headers.get("Authorization")
+    # only the 7-char scheme prefix is case-folded, not the whole header
+    if authz and authz[:7].lower() == "bearer ":
+        return authz[7:].strip() or None
+    return None
+
+
+def _verify_session_token(token: str) -> None:
+    """
+    Reject forged or expired tokens without touching Redis or the database.
+    Tokens issued before signing was introduced carry no signature and are
+    left to the database lookup.
+    """
+    if "." not in token:
+        return
+    try:
+        SESSION_SIGNER.loads(token, max_age=SESSION_TTL_DAYS * 24 * 60 * 60)
+    except SignatureExpired as exc:
+        raise HTTPException(status_code=401, detail="Session expired") from exc
+    except BadSignature as exc:
+        raise HTTPException(status_code=401, detail="Invalid session token") from exc
 
 
 def csrf_protect(request: Request) -> None:
@@ -218,60 +402,121 @@ def csrf_protect(request: Request) -> None:
     Double-submit protection: compare readable CSRF cookie to supplied header.
     Only enforced when the session is supplied via cookie (Bearer flows are exempt).
     """
+    if getattr(request, "method", None) in _CSRF_SAFE_METHODS:
+        return
     if SESSION_COOKIE_NAME not in request.cookies:
         return
     cookie_token = request.cookies.get(CSRF_COOKIE_NAME)
-    header_token = (
-        request.headers.get(CSRF_HEADER_NAME)
-        or request.headers.get("X-CSRFToken")
-        or request.headers.get("X-Csrf-Token")
-    )
+    header_token = next((v for v in map(request.headers.get, _CSRF_HEADER_NAMES) if v), None)
     if not cookie_token or not header_token:
         raise HTTPException(status_code=403, detail="Missing CSRF token")
     if not hmac.compare_digest(cookie_token, header_token):
         raise HTTPException(status_code=403, detail="Invalid CSRF token")
 
 
-def _load_session(db: Session, token: str) -> UserSession:
-    token_hash = _hash_token(token)
-    session = db.query(UserSession).filter(UserSession.token_hash == token_hash).one_or_none()
-    if not session:
+def _load_session(
+    db: Session, token_hash: bytes, legacy_hashes: Sequence[bytes] = ()
+) -> Tuple[UserSession, datetime]:
+    candidates = [token_hash, *legacy_hashes]
+    session = db.execute(
+        select(UserSession).where(UserSession.token_hash.in_(candidates))
+    ).scalar_one_or_none()
+    stored = bytes(session.token_hash) if session else b""
+    if not session or not any(hmac.compare_digest(stored, c) for c in candidates):
         raise HTTPException(status_code=401, detail="Invalid session token")
-    expires_at = _ensure_aware(session.expires_at)
-    if expires_at and expires_at < _utcnow():
+    if not hmac.compare_digest(stored, token_hash):
+        session.token_hash = token_hash
+        db.commit()
+    expires_at = session.expires_at
+    # TIMESTAMPTZ comes back aware on Postgres; SQLite drops the offset
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if expires_at < _utcnow():
         raise HTTPException(status_code=401, detail="Session expired")
-    session.last_used_at = _utcnow()
-    db.commit()
-    return session
+    _touch_session(token_hash)
+    return session, expires_at
+
+
+def _touch_session(token_hash: bytes) -> None:
+    if session_cache.claim_last_used(token_hash):
+        session_touch.enqueue(token_hash, _utcnow())
 
 
 def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
+    state = getattr(request, "state", None)
+    # resolved once per request even when several dependencies need the user
+    memo = getattr(state, "user", None) if state is not None else None
+    if memo is not None:
+        return memo
     token = _extract_session_token(request)
+    if state is not None:
+        setattr(state, "session_token", token)
     if not token:
         raise HTTPException(status_code=401, detail="Missing session token")
-    session = _load_session(db, token)
-    user = db.get(User, session.user_id)
-    if not user:
-        raise HTTPException(status_code=401, detail="User for session not found")
+    _verify_session_token(token)
+    token_hash = _hash_token(token)
+    user = session_cache.get_user(token_hash)
+    if user is not None:
+        _touch_session(token_hash)
+    else:
+        session, expires_at = _load_session(db, token_hash, _legacy_token_hashes(token))
+        user = db.get(User, session.user_id)
+        if not user:
+            raise HTTPException(status_code=401, detail="User for session not found")
+        session_cache.store_user(token_hash, user, expires_at)
     # make the user id available for downstream logging/middleware
-    state = getattr(request, "state", None)
     if state is not None:
+        setattr(state, "user", user)
         setattr(state, "user_id", user.id)
     return user
 
 
+# Google access tokens are issued for an hour; refresh a little early.
+ACCESS_TOKEN_LIFETIME_SECONDS = 3600
+ACCESS_TOKEN_REFRESH_MARGIN_SECONDS = 100
+
+# Built Credentials per user, reused until shortly before the access token
+# expires (Google issues 1h tokens). Refreshes and disconnects drop the entry.
+CREDENTIALS_CACHE_TTL_SECONDS = 55 * 60
+_credentials_cache: Dict[str, Tuple[Credentials, float]] = {}
+_credentials_lock = threading.RLock()
+
+
 class _MissingCredentials(RuntimeError):
     pass
 
 
-def _delete_user_data(db: Session, user_id: str) -> Dict[str, int]:
-    summary = {
-        "content_index": 0,
-        "source_state": 0,
-        "drive_sessions": 0,
-        "ingestion_jobs": 0,
-        "user_sessions": 0,
-    }
+_DELETE_SUMMARY_KEYS = (
+    "content_index",
+    "source_state",
+    "drive_sessions",
+    "ingestion_jobs",
+    "user_sessions",
+)
+_DELETE_USER_DATA_SQL = text(
+    """
+    WITH ci AS (DELETE FROM content_index WHERE user_id = :uid RETURNING 1),
+         ss AS (DELETE FROM source_state WHERE user_id = :uid RETURNING 1),
+         ds AS (DELETE FROM drive_sessions WHERE user_id = :uid RETURNING 1),
+         ij AS (DELETE FROM ingestion_jobs WHERE user_id = :uid RETURNING 1),
+         us AS (DELETE FROM user_sessions WHERE user_id = :uid RETURNING token_hash)
+    SELECT (SELECT count(*) FROM ci) AS content_index,
+           (SELECT count(*) FROM ss) AS source_state,
+           (SELECT count(*) FROM ds) AS drive_sessions,
+           (SELECT count(*) FROM ij) AS ingestion_jobs,
+           (SELECT count(*) FROM us) AS user_sessions,
+           (SELECT array_agg(token_hash) FROM us) AS token_hashes
+    """
+)
+
+
+def _delete_user_rows(db: Session, user_id: str) -> Tuple[Dict[str, int], List[bytes]]:
+    if db.get_bind().dialect.name == "postgresql":
+        row = db.execute(_DELETE_USER_DATA_SQL, {"uid": user_id}).mappings().one()
+        summary = {key: int(row[key]) for key in _DELETE_SUMMARY_KEYS}
+        return summary, [bytes(h) for h in row["token_hashes"] or []]
+
+    summary = dict.fromkeys(_DELETE_SUMMARY_KEYS, 0)
     summary["content_index"] = (
         db.query(ContentIndex).filter(ContentIndex.user_id == user_id).delete(synchronize_session=False)
     )
@@ -284,10 +529,20 @@ def _delete_user_data(db: Session, user_id: str) -> Dict[str, int]:
     summary["ingestion_jobs"] = (
         db.query(IngestionJob).filter(IngestionJob.user_id == user_id).delete(synchronize_session=False)
     )
+    token_hashes = [
+        row.token_hash for row in db.query(UserSession.token_hash).filter(UserSession.user_id == user_id)
+    ]
     summary["user_sessions"] = (
         db.query(UserSession).filter(UserSession.user_id == user_id).delete(synchronize_session=False)
     )
+    return summary, token_hashes
+
+
+def _delete_user_data(db: Session, user_id: str) -> Dict[str, int]:
+    summary, token_hashes = _delete_user_rows(db, user_id)
     db.commit()
+    _forget_credentials(user_id)
+    session_cache.invalidate(token_hashes)
     try:
         vector.reset_collection(user_id=user_id)
     except Exception:
@@ -329,33 +584,85 @@ def _load_credentials_row(db: Session, user_id: str) -> DriveSession:
     return record
 
 
-def _refresh_if_needed(db: Session, record: DriveSession, creds: Credentials) -> None:
-    if creds.expired and creds.refresh_token:
-        creds.refresh(GoogleRequest())
-        record.credentials = _serialize_credentials(creds)
-        record.updated_at = _utcnow()
-        db.commit()
+def _refresh_if_needed(db: Session, record: DriveSession, creds: Credentials) -> bool:
+    # The stored blob has no expiry, so the row's updated_at (set whenever a
+    # token is stored) decides freshness: a plain clock comparison.
+    stored_at = _ensure_aware(record.updated_at)
+    if stored_at is not None:
+        expiry = stored_at + timedelta(seconds=ACCESS_TOKEN_LIFETIME_SECONDS)
+        if (expiry - _utcnow()).total_seconds() > ACCESS_TOKEN_REFRESH_MARGIN_SECONDS:
+            creds.expiry = expiry.replace(tzinfo=None)
+            return False
+    if not creds.refresh_token:
+        return False
+    creds.refresh(GoogleRequest())
+    record.credentials = _serialize_credentials(creds)
+    record.updated_at = _utcnow()
+    db.flush()
+    return True
+
+
+def _cached_credentials(user_id: str) -> Optional[Credentials]:
+    with _credentials_lock:
+        entry = _credentials_cache.get(user_id)
+    if entry is None:
+        return None
+    creds, refresh_at = entry
+    if time.time() >= refresh_at:
+        return None
+    return creds
+
+
+def _remember_credentials(user_id: str, creds: Credentials) -> None:
+    refresh_at = time.time() + CREDENTIALS_CACHE_TTL_SECONDS
+    if creds.expiry is not None:
+        expiry = creds.expiry.replace(tzinfo=timezone.utc).timestamp()
+        refresh_at = min(refresh_at, expiry - 60)
+    with _credentials_lock:
+        _credentials_cache[user_id] = (creds, refresh_at)
+
+
+def _forget_credentials(user_id: str) -> None:
+    with _credentials_lock:
+        _credentials_cache.pop(user_id, None)
 
 
 def get_google_credentials_for_user(db: Session, user_id: str) -> Credentials:
+    cached = _cached_credentials(user_id)
+    if cached is not None:
+        return cached
     try:
         record = _load_credentials_row(db, user_id)
     except _MissingCredentials as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     creds = _build_credentials(record.credentials or {})
     try:
-        _refresh_if_needed(db, record, creds)
+        refreshed = _refresh_if_needed(db, record, creds)
     except Exception as exc:
+        _forget_credentials(user_id)
         raise HTTPException(status_code=401, detail=f"Failed to refresh Google credentials: {exc}") from exc
+    if refreshed:
+        # get_db does not commit, so the new token is saved here
+        db.commit()
+    _remember_credentials(user_id, creds)
     return creds
 
 
 def get_google_credentials_for_user_unmanaged(user_id: str) -> Credentials:
+    cached = _cached_credentials(user_id)
+    if cached is not None:
+        return cached
     db = SessionLocal()
     try:
         record = _load_credentials_row(db, user_id)
         creds = _build_credentials(record.credentials or {})
-        _refresh_if_needed(db, record, creds)
+        try:
+            _refresh_if_needed(db, record, creds)
+        except Exception:
+            _forget_credentials(user_id)
+            raise
+        db.commit()
+        _remember_credentials(user_id, creds)
         return creds
     finally:
         db.close()
@@ -366,8 +673,7 @@ def start_google_auth():
     ensure_writes_enabled()
     flow = build_flow()
     flow.redirect_uri = os.getenv("OAUTH_REDIRECT_URI")
-    state_payload = {"nonce": secrets.token_urlsafe(16)}
-    state = STATE_SIGNER.dumps(state_payload)
+    state = NONCE_SIGNER.sign(secrets.token_urlsafe(16)).decode("ascii")
     auth_url, _ = flow.authorization_url(
         access_type="offline",
         prompt="consent",
@@ -377,22 +683,38 @@ def start_google_auth():
     return {"authorization_url": auth_url}
 
 
+def _warm_db_connection(db: Session) -> None:
+    db.connection()
+
+
+def _complete_login(db: Session, profile: Dict[str, Any], creds: Credentials) -> str:
+    # the helpers only flush; the whole login lands in one transaction
+    try:
+        user = _upsert_user(db, profile)
+        _persist_google_credentials(db, user.id, creds)
+        session_token = _issue_session(db, user)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return session_token
+
+
 @router.get("/google/callback")
-def google_callback(code: str, state: str, db: Session = Depends(get_db)):
+async def google_callback(code: str, state: str, db: Session = Depends(get_db)):
     ensure_writes_enabled()
     try:
-        STATE_SIGNER.loads(state)
+        NONCE_SIGNER.unsign(state, max_age=OAUTH_STATE_MAX_AGE_SECONDS)
     except BadSignature as exc:
         raise HTTPException(status_code=400, detail="Invalid OAuth state") from exc
 
     flow = build_flow()
     flow.redirect_uri = os.getenv("OAUTH_REDIRECT_URI")
-    flow.fetch_token(code=code)
+    await run_in_threadpool(flow.fetch_token, code=code)
     creds = flow.credentials
-    profile = _fetch_profile(creds)
-    user = _upsert_user(db, profile)
-    _persist_google_credentials(db, user.id, creds)
-    session_token = _issue_session(db, user)
+    # check out a DB connection while the userinfo request is in flight
+    profile, _ = await asyncio.gather(_fetch_profile(creds), run_in_threadpool(_warm_db_connection, db))
+    session_token = await run_in_threadpool(_complete_login, db, profile, creds)
 
     response = RedirectResponse(url=f"/auth/me", status_code=303)
     _set_session_cookie(response, session_token)
@@ -47,6 +47,19 @@ def _today() -> str:
     return datetime.utcnow().strftime("%Y-%m-%d")
 
 
+QUOTA_KEY_TTL_SECONDS = 48 * 3600
+
+
+def _incr_daily(redis: Redis, key: str) -> int:
+    # INCR and EXPIRE in one MULTI/EXEC round trip; the counter can no longer
+    # be left without a TTL if the process dies between the two commands
+    pipe = redis.pipeline()
+    pipe.incr(key)
+    pipe.expire(key, QUOTA_KEY_TTL_SECONDS)
+    count, _ = pipe.execute()
+    return int(count)
+
+
 def check_ingest_quota(user_id: str) -> None:
     if MAX_INGESTS_PER_DAY <= 0:
         return
@@ -55,9 +68,7 @@ def check_ingest_quota(user_id: str) -> None:
         return
     key = f"quota:ingest:drive:{user_id}:{_today()}"
     try:
-        count = redis.incr(key)
-        if count == 1:
-            redis.expire(key, 48 * 3600)
+        count = _incr_daily(redis, key)
         if count > MAX_INGESTS_PER_DAY:
             log_event(
                 "quota_denied",
@@ -90,9 +101,7 @@ def check_rag_quota(user_id: str) -> None:
         return
     key = f"quota:rag_answer:day:{user_id}:{_today()}"
     try:
-        count = redis.incr(key)
-        if count == 1:
-            redis.expire(key, 48 * 3600)
+        count = _incr_daily(redis, key)
         if count > MAX_RAG_REQUESTS_PER_DAY:
             log_event(
                 "quota_denied",
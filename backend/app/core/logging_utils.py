@@ -4,6 +4,8 @@ import os
 from datetime import datetime, timezone
 from typing import Any, Dict
 
+import orjson
+
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(level=LOG_LEVEL, format="%(message)s")
@@ -14,7 +16,18 @@ def _timestamp() -> str:
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
+def _dumps(payload: Dict[str, Any]) -> str:
+    try:
+        return orjson.dumps(payload).decode()
+    except TypeError:
+        # orjson is stricter (non-str keys, >64-bit ints); keep json's behavior
+        return json.dumps(payload, separators=(",", ":"))
+
+
 def log_event(event: str, *, level: str = "info", **fields: Any) -> None:
+    levelno = getattr(logging, level.upper(), logging.INFO)
+    if not LOGGER.isEnabledFor(levelno):
+        return
     payload: Dict[str, Any] = {
         "event": event,
         "ts": _timestamp(),
@@ -23,4 +36,4 @@ def log_event(event: str, *, level: str = "info", **fields: Any) -> None:
     for key, value in fields.items():
         if value is not None:
             payload[key] = value
-    LOGGER.log(getattr(logging, level.upper(), logging.INFO), json.dumps(payload, separators=(",", ":")))
+    LOGGER.log(levelno, _dumps(payload))
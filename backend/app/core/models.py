@@ -2,7 +2,7 @@ from datetime import datetime, timezone
 from uuid import uuid4
 
 from sqlalchemy import (
-    Column, String, Integer, DateTime, Boolean, JSON, UniqueConstraint, Index, ForeignKey
+    Column, String, Integer, DateTime, Boolean, JSON, LargeBinary, UniqueConstraint, Index, ForeignKey, text
 )
 from sqlalchemy.orm import declarative_base
 
@@ -30,11 +30,14 @@ class UserSession(Base):
 
     id = Column(String, primary_key=True, default=lambda: str(uuid4()))
     user_id = Column(String, ForeignKey("users.id"), index=True, nullable=False)
-    token_hash = Column(String, unique=True, nullable=False, index=True)
+    token_hash = Column(LargeBinary(32), nullable=False)
     created_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
     last_used_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=False)
 
+    # the unique constraint's btree serves the per-request token lookups
+    __table_args__ = (UniqueConstraint("token_hash", name="uq_user_sessions_token_hash"),)
+
 class IngestionJob(Base):
     __tablename__ = "ingestion_jobs"
     id = Column(String, primary_key=True, default=lambda: str(uuid4()))
@@ -52,7 +55,18 @@ class IngestionJob(Base):
     error_summary = Column(String, nullable=True)
     metrics = Column(JSON, default=dict)
 
-    __table_args__ = (Index("ix_job_user_source_status", "user_id", "source", "status"),)
+    __table_args__ = (
+        Index("ix_job_user_source_status", "user_id", "source", "status"),
+        Index("ix_jobs_user_created", "user_id", "created_at"),
+        # only the handful of in-flight jobs, so find_active_job is a single probe
+        Index(
+            "ix_job_active",
+            "user_id",
+            "created_at",
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')"),
+        ),
+    )
 
 class SourceState(Base):
     __tablename__ = "source_state"
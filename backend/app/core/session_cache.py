@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from redis import Redis, from_url
+from redis.exceptions import RedisError
+
+from app.core.logging_utils import log_event
+
+log = logging.getLogger("session_cache")
+
+
+_redis_url = os.getenv("SESSION_CACHE_REDIS_URL") or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+_redis: Optional[Redis] = None
+_retry_at = 0.0
+
+SESSION_CACHE_ENABLED = os.getenv("SESSION_CACHE_ENABLED", "1").lower() in {"1", "true", "yes"}
+SESSION_CACHE_MAX_TTL_SECONDS = int(os.getenv("SESSION_CACHE_MAX_TTL_SECONDS", "900"))
+LAST_USED_WINDOW_SECONDS = int(os.getenv("SESSION_LAST_USED_WINDOW_SECONDS", "300"))
+LOCAL_CACHE_SIZE = int(os.getenv("SESSION_LOCAL_CACHE_SIZE", "10000"))
+# Bounds how long another worker can keep serving a session revoked elsewhere.
+LOCAL_CACHE_TTL_SECONDS = float(os.getenv("SESSION_LOCAL_CACHE_TTL_SECONDS", "60"))
+_RECONNECT_BACKOFF_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Detached view of a `User` row served from the session cache."""
+
+    id: str
+    email: str
+    full_name: Optional[str] = None
+    picture: Optional[str] = None
+
+    @property
+    def user_id(self) -> str:
+        return self.id
+
+
+class _LocalCache:
+    """Small thread-safe TTL LRU that sits in front of Redis in each process."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (deadline, user, monotonic time of this process's last touch claim)
+        self._data: "OrderedDict[bytes, Tuple[float, CachedUser, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[CachedUser]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            deadline, user, _ = entry
+            if deadline <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return user
+
+    def touched_within(self, key: bytes, window: float) -> bool:
+        """True if this process already claimed a touch for `key` in the last `window` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False
+            deadline, user, touched_at = entry
+            if touched_at and now - touched_at < window:
+                return True
+            self._data[key] = (deadline, user, now)
+            return False
+
+    def set(self, key: bytes, user: CachedUser, ttl: float) -> None:
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        deadline = time.monotonic() + min(ttl, self.ttl)
+        with self._lock:
+            previous = self._data.get(key)
+            self._data[key] = (deadline, user, previous[2] if previous else 0.0)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: bytes) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_local = _LocalCache(LOCAL_CACHE_SIZE, LOCAL_CACHE_TTL_SECONDS)
+
+
+def _redis_conn() -> Optional[Redis]:
+    global _redis, _retry_at
+    if not SESSION_CACHE_ENABLED:
+        return None
+    if _redis is not None:
+        return _redis
+    now = time.monotonic()
+    if now < _retry_at:
+        return None
+    try:
+        client = from_url(_redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        client.ping()
+        _redis = client
+        return _redis
+    except Exception as exc:
+        # Don't pay a connect timeout on every request while Redis is down.
+        _retry_at = now + _RECONNECT_BACKOFF_SECONDS
+        log.warning("[session_cache] Redis unavailable; falling back to database lookups")
+        log_event("session_cache_unavailable", backend="redis", level="warning", error=str(exc))
+        return None
+
+
+def _key(token_hash: bytes) -> bytes:
+    return b"sess:" + token_hash
+
+
+def _last_used_key(token_hash: bytes) -> bytes:
+    return b"sess:lu:" + token_hash
+
+
+def get_user(token_hash: bytes) -> Optional[CachedUser]:
+    if not SESSION_CACHE_ENABLED:
+        return None
+    user = _local.get(token_hash)
+    if user is not None:
+        return user
+    redis = _redis_conn()
+    if not redis:
+        return None
+    try:
+        raw = redis.get(_key(token_hash))
+    except RedisError:
+        log.warning("[session_cache] Redis error reading session", exc_info=True)
+        return None
+    if not raw:
+        return None
+    try:
+        data: Dict[str, Any] = json.loads(raw)
+    except ValueError:
+        return None
+    remaining = data.get("expires_at", 0) - time.time()
+    if remaining <= 0:
+        return None
+    user = CachedUser(
+        id=data["user_id"],
+        email=data.get("email") or "",
+        full_name=data.get("full_name"),
+        picture=data.get("picture"),
+    )
+    _local.set(token_hash, user, remaining)
+    return user
+
+
+def store_user(token_hash: bytes, user: Any, expires_at: Optional[datetime]) -> None:
+    if not SESSION_CACHE_ENABLED:
+        return
+    expires_ts = expires_at.timestamp() if expires_at else time.time() + SESSION_CACHE_MAX_TTL_SECONDS
+    ttl = int(min(expires_ts - time.time(), SESSION_CACHE_MAX_TTL_SECONDS))
+    if ttl <= 0:
+        return
+    _local.set(
+        token_hash,
+        CachedUser(id=user.id, email=user.email, full_name=user.full_name, picture=user.picture),
+        ttl,
+    )
+    redis = _redis_conn()
+    if not redis:
+        return
+    payload = {
+        "user_id": user.id,
+        "email": user.email,
+        "full_name": user.full_name,
+        "picture": user.picture,
+        "expires_at": expires_ts,
+    }
+    try:
+        redis.set(_key(token_hash), json.dumps(payload, separators=(",", ":")), ex=ttl)
+    except RedisError:
+        log.warning("[session_cache] Redis error caching session", exc_info=True)
+
+
+def claim_last_used(token_hash: bytes) -> bool:
+    """
+    Return True when the caller should persist `last_used_at` for this session.
+    Only the first request in each window wins. Sessions this process touched
+    within the window are answered locally; otherwise Redis arbitrates across
+    processes, and without Redis every such request wins.
+    """
+    if _local.touched_within(token_hash, LAST_USED_WINDOW_SECONDS):
+        return False
+    redis = _redis_conn()
+    if not redis:
+        return True
+    try:
+        return bool(redis.set(_last_used_key(token_hash), "1", ex=LAST_USED_WINDOW_SECONDS, nx=True))
+    except RedisError:
+        return True
+
+
+def invalidate(token_hashes: Iterable[bytes]) -> None:
+    keys = []
+    for token_hash in token_hashes:
+        _local.pop(token_hash)
+        keys.append(_key(token_hash))
+        keys.append(_last_used_key(token_hash))
+    if not keys:
+        return
+    redis = _redis_conn()
+    if not redis:
+        return
+    try:
+        redis.delete(*keys)
+    except RedisError:
+        log.warning("[session_cache] Redis error invalidating sessions", exc_info=True)
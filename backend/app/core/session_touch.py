@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import case, update
+
+from app.core import db as db_module
+from app.core.logging_utils import log_event
+from app.core.models import UserSession
+
+log = logging.getLogger("session_touch")
+
+
+FLUSH_INTERVAL_SECONDS = float(os.getenv("SESSION_TOUCH_FLUSH_SECONDS", "5.0"))
+MAX_BATCH = int(os.getenv("SESSION_TOUCH_MAX_BATCH", "500"))
+
+# latest touch per session; repeated touches between flushes collapse to one row
+_pending: Dict[bytes, datetime] = {}
+_pending_lock = threading.Lock()
+_wake = threading.Event()
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+
+def enqueue(token_hash: bytes, when: datetime) -> None:
+    """Record a session touch; the write happens later in a batched UPDATE."""
+    _ensure_worker()
+    with _pending_lock:
+        current = _pending.get(token_hash)
+        if current is None or when > current:
+            _pending[token_hash] = when
+        full = len(_pending) >= MAX_BATCH
+    if full:
+        _wake.set()
+
+
+def _ensure_worker() -> None:
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is not None and _worker.is_alive():
+            return
+        _worker = threading.Thread(target=_run, name="session-touch", daemon=True)
+        _worker.start()
+
+
+def _take() -> Dict[bytes, datetime]:
+    global _pending
+    with _pending_lock:
+        batch, _pending = _pending, {}
+    return batch
+
+
+def _write(batch: Dict[bytes, datetime]) -> None:
+    if not batch:
+        return
+    stmt = (
+        update(UserSession)
+        .where(UserSession.token_hash.in_(list(batch)))
+        .values(last_used_at=case(batch, value=UserSession.token_hash))
+        .execution_options(synchronize_session=False)
+    )
+    db = db_module.SessionLocal()
+    try:
+        db.execute(stmt)
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        log.warning("[session_touch] failed to persist last_used_at", exc_info=True)
+        log_event("session_touch_failed", sessions=len(batch), error=str(exc), level="warning")
+    finally:
+        db.close()
+
+
+def _write_all(pending: Dict[bytes, datetime]) -> None:
+    items = list(pending.items())
+    for offset in range(0, len(items), MAX_BATCH):
+        _write(dict(items[offset:offset + MAX_BATCH]))
+
+
+def _run() -> None:
+    while True:
+        _wake.wait(FLUSH_INTERVAL_SECONDS)
+        _wake.clear()
+        _write_all(_take())
+
+
+def flush() -> None:
+    """Synchronously write every pending touch (used at shutdown and in tests)."""
+    _write_all(_take())
@@ -6,11 +6,14 @@ from sqlalchemy.orm import Session
 from app.core.db import get_db
 from app.core.runtime import ensure_writes_enabled
 from app.core.auth import csrf_protect, get_current_user, get_google_credentials_for_user
-from app.rag.chunk import chunk_text
+from app.rag.chunk import chunk_text_batch
 from app.rag.vector import upsert as upsert_chunks
 
 router = APIRouter(prefix="/ingest/calendar", tags=["ingest"])
 
+UPSERT_BATCH_SIZE = 256
+RFC3339_UTC = "%Y-%m-%dT%H:%M:%SZ"
+
 @router.post("")
 def ingest_calendar(
     months: int = 6,
@@ -22,17 +25,18 @@ def ingest_calendar(
     creds = get_google_credentials_for_user(db, user.user_id)
     svc = build("calendar", "v3", credentials=creds)
 
-    now = dt.datetime.utcnow().isoformat() + "Z"
-    until = (dt.datetime.utcnow() + dt.timedelta(days=30 * months)).isoformat() + "Z"
+    now = dt.datetime.now(dt.timezone.utc)
+    until = now + dt.timedelta(days=30 * months)
 
     events = svc.events().list(
         calendarId="primary",
-        timeMin=now,
-        timeMax=until,
+        timeMin=now.strftime(RFC3339_UTC),
+        timeMax=until.strftime(RFC3339_UTC),
         singleEvents=True,
         orderBy="startTime"
     ).execute().get("items", [])
 
+    items = []
     for e in events:
         title = e.get("summary", "(no title)")
         start = e.get("start", {}).get("dateTime") or e.get("start", {}).get("date")
@@ -50,7 +54,10 @@ def ingest_calendar(
 
 
         meta = {"source": "calendar", "title": title, "id": e["id"], "user_id": user.user_id}
-        chunks = chunk_text(text, meta=meta)
-        upsert_chunks(chunks, user_id=user.user_id)
+        items.append((text, meta))
+
+    chunks = chunk_text_batch(items)
+    for offset in range(0, len(chunks), UPSERT_BATCH_SIZE):
+        upsert_chunks(chunks[offset:offset + UPSERT_BATCH_SIZE], user_id=user.user_id)
 
     return {"ingested": len(events)}
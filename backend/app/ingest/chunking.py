@@ -1,14 +1,14 @@
 from __future__ import annotations
-from typing import List
+from typing import Iterator
 
-def split_by_chars(text: str, max_chars: int = 1200, overlap: int = 120) -> List[str]:
+def split_by_chars(text: str, max_chars: int = 1200, overlap: int = 120) -> Iterator[str]:
+    """Yield overlapping character windows of `text` lazily, one slice at a time."""
     if not text:
-        return []
-    out, i, n = [], 0, len(text)
+        return
+    i, n = 0, len(text)
     while i < n:
         j = min(i + max_chars, n)
-        out.append(text[i:j])
+        yield text[i:j]
         if j == n:
             break
         i = max(0, j - overlap)
-    return out
\ No newline at end of file
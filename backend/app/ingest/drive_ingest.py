@@ -1,13 +1,27 @@
+import codecs
+import importlib.util
 import io
 import os
 import random
+import socket
+import tempfile
+import threading
 import time
-from typing import Any, Callable, Dict, List, Optional
-
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import httplib2
+import httpx
+import orjson
 from fastapi import APIRouter, Depends, Query, HTTPException
-from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build, build_from_document
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaIoBaseDownload
+from googleapiclient.http import MediaIoBaseDownload, set_user_agent
+from googleapiclient.model import JsonModel
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db, SessionLocal
@@ -17,12 +31,12 @@ from app.core.auth import (
     get_google_credentials_for_user,
     get_google_credentials_for_user_unmanaged,
 )
+from .drive_limiter import limiter_for
 from .drive_pipeline import (
     run_drive_ingest_once,
     load_drive_cursor,
-    save_drive_cursor,
 )
-from .parser import to_text
+from .parser import CSV_MIMES, DOCX_MIMES, to_text
 
 router = APIRouter(prefix="/ingest/drive", tags=["ingest"])
 
@@ -34,36 +48,166 @@ EXPORT_MIME = {
 }
 
 DEFAULT_JOB_MAX = int(os.getenv("INGEST_DRIVE_DEFAULT_MAX", "50"))
-MAX_PAGE_SIZE = int(os.getenv("INGEST_DRIVE_PAGE_SIZE", "200"))
+# files.list carries all the metadata should_reingest needs (see LIST_FIELDS),
+# so one listing call per up to 1000 files (the Drive maximum) replaces any
+# per-file metadata requests.
+DRIVE_LIST_MAX_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = max(1, min(DRIVE_LIST_MAX_PAGE_SIZE, int(os.getenv("INGEST_DRIVE_PAGE_SIZE", "1000"))))
 MAX_LIST_RETRIES = int(os.getenv("INGEST_DRIVE_LIST_RETRIES", "4"))
 LIST_BACKOFF_BASE = float(os.getenv("INGEST_DRIVE_BACKOFF_BASE", "0.8"))
+LIST_FIELDS = "nextPageToken, files(id,name,mimeType,md5Checksum,size,modifiedTime,trashed,version)"
+CHANGES_FIELDS = (
+    "nextPageToken, newStartPageToken, "
+    "changes(removed,file(id,name,mimeType,md5Checksum,size,modifiedTime,trashed,version))"
+)
+# Listings include files from shared drives the user is a member of.
+SHARED_DRIVE_PARAMS = {"supportsAllDrives": True, "includeItemsFromAllDrives": True}
+# Stored cursors: "changes:<token>" resumes the change log; "scan:<start>:<page>"
+# is a files.list scan in progress that switches to the log at <start> when done.
+CHANGES_CURSOR_PREFIX = "changes:"
+SCAN_CURSOR_PREFIX = "scan:"
+
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("INGEST_DRIVE_DOWNLOAD_CHUNK_SIZE", str(1024 * 1024)))
+DOWNLOAD_SPOOL_MAX_BYTES = int(os.getenv("INGEST_DRIVE_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+DRIVE_USER_AGENT = "local-context-agent (gzip)"
+HTTP_TIMEOUT_SECONDS = float(os.getenv("INGEST_DRIVE_HTTP_TIMEOUT", "30"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("INGEST_DRIVE_HTTP_MAX_CONNECTIONS", "32"))
+# HTTP/2 needs the optional h2 package (httpx[http2]); without it httpx pools HTTP/1.1.
+HTTP2_ENABLED = importlib.util.find_spec("h2") is not None
+SERVICE_CACHE_SIZE = 64
+
+_SERVICE_CACHE: "OrderedDict[Tuple[str, int], Tuple[Any, Any]]" = OrderedDict()
+_SERVICE_LOCK = threading.Lock()
+_list_prefetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="drive-list")
+
+
+class _OrjsonModel(JsonModel):
+    """JsonModel that decodes response bodies with orjson (large files.list pages)."""
+
+    def deserialize(self, content):
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return content.decode("utf-8") if isinstance(content, bytes) else content
+        if self._data_wrapper and isinstance(body, dict) and "data" in body:
+            body = body["data"]
+        return body
+
+
+_DRIVE_MODEL = _OrjsonModel()
+
+
+@lru_cache(maxsize=1)
+def _http_client() -> httpx.Client:
+    # httpx.Client is thread-safe, so every service in the process shares one
+    # connection pool (one multiplexed connection per host under HTTP/2).
+    return httpx.Client(
+        http2=HTTP2_ENABLED,
+        timeout=HTTP_TIMEOUT_SECONDS,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS),
+    )
+
+
+class _HttpxHttp(httplib2.Http):
+    """httplib2.Http facade over the shared httpx client, for googleapiclient/AuthorizedHttp."""
+
+    def __init__(self):
+        super().__init__(cache=None, timeout=HTTP_TIMEOUT_SECONDS)
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=None, connection_type=None):
+        # googleapiclient's num_retries and queue._is_transient_error only know
+        # socket errors, so network failures surface as the OSErrors httplib2 raises
+        try:
+            resp = _http_client().request(method, uri, content=body, headers=headers)
+        except httpx.TimeoutException as exc:
+            raise socket.timeout(str(exc)) from exc
+        except httpx.TransportError as exc:
+            raise ConnectionError(str(exc)) from exc
+        info = {key.lower(): value for key, value in resp.headers.items()}
+        # httpx already decoded the body; mirror httplib2's _decompressContent,
+        # which hides the encoding and reports the decoded length
+        if "content-encoding" in info:
+            info["-content-encoding"] = info.pop("content-encoding")
+            info["content-length"] = str(len(resp.content))
+        info["status"] = str(resp.status_code)
+        response = httplib2.Response(info)
+        response.reason = resp.reason_phrase
+        return response, resp.content
+
+
+@lru_cache(maxsize=1)
+def _drive_discovery_doc() -> Optional[str]:
+    # The bundled static discovery document, read from disk once per process.
+    return discovery_cache.get_static_doc("drive", "v3")
 
 
 def _drive_service(creds):
-    return build("drive", "v3", credentials=creds, cache_discovery=False)
+    # Requests go through the process-wide httpx pool instead of a connection
+    # per service. httpx sends Accept-Encoding: gzip; Google APIs also want
+    # "(gzip)" in the User-Agent.
+    transport = set_user_agent(_HttpxHttp(), DRIVE_USER_AGENT)
+    http = AuthorizedHttp(creds, http=transport)
+    doc = _drive_discovery_doc()
+    if doc is None:
+        return build("drive", "v3", http=http, cache_discovery=False, model=_DRIVE_MODEL)
+    return build_from_document(doc, http=http, model=_DRIVE_MODEL)
+
+
+def _service_for_user(user_id: str, creds):
+    # httplib2 is not thread-safe, so services are cached per (user, thread);
+    # a different credentials object (e.g. after re-auth) rebuilds the service.
+    # Only the owning thread writes its key, so hits skip the lock entirely.
+    key = (user_id, threading.get_ident())
+    entry = _SERVICE_CACHE.get(key)
+    if entry is not None and entry[0] is creds:
+        return entry[1]
+    svc = _drive_service(creds)
+    with _SERVICE_LOCK:
+        _SERVICE_CACHE.pop(key, None)
+        _SERVICE_CACHE[key] = (creds, svc)
+        while len(_SERVICE_CACHE) > SERVICE_CACHE_SIZE:
+            _SERVICE_CACHE.popitem(last=False)
+    return svc
 
 
-def _list_page_factory(svc, name_filter: Optional[str]):
-    def _list_page(user_id: str, page_token: Optional[str], page_size: int) -> Dict[str, Any]:
-        q = "trashed=false"
-        if name_filter:
-            q += f" and name contains '{name_filter}'"
+def _thread_service_factory(svc, creds=None):
+    def _service(user_id: str):
+        if creds is None:
+            return svc
+        return _service_for_user(user_id, creds)
+
+    return _service
+
+
+def _list_page_factory(
+    svc,
+    name_filter: Optional[str],
+    creds=None,
+    use_changes: bool = False,
+    limit: Optional[int] = None,
+):
+    """
+    With `use_changes`, page tokens are the cursors stored in SourceState: a
+    first sync scans files.list and then hands over to Drive's change log
+    (changes.list), so later syncs only list what changed since the last one.
+
+    `limit` is the caller's file budget; the next page is only prefetched
+    while some of it is left. Call `list_page.cancel_prefetch()` once done
+    listing to drop a prefetch the caller never asked for.
+    """
+    service = _thread_service_factory(svc, creds)
+    prefetched: Dict[Optional[str], Tuple[int, Future]] = {}
+    remaining = limit
+    q = "trashed=false"
+    if name_filter:
+        q += f" and name contains '{name_filter}'"
+
+    def _execute(user_id: str, make_request: Callable[[], Any]) -> Dict[str, Any]:
         retries = 0
         while True:
             try:
-                req = (
-                    svc.files()
-                    .list(
-                        q=q,
-                        pageToken=page_token,
-                        pageSize=page_size,
-                        fields=(
-                            "nextPageToken, files(id,name,mimeType,md5Checksum,size,"
-                            "modifiedTime,trashed,version)"
-                        ),
-                    )
-                )
-                return req.execute()
+                return _limited(user_id, make_request().execute)
             except HttpError as err:
                 if _should_retry(err, retries):
                     _sleep_with_backoff(err, retries)
@@ -71,15 +215,100 @@ def _list_page_factory(svc, name_filter: Optional[str]):
                     continue
                 raise
 
+    def _list_files(user_id: str, page_token: Optional[str], page_size: int) -> Dict[str, Any]:
+        return _execute(
+            user_id,
+            lambda: service(user_id).files().list(
+                q=q, pageToken=page_token, pageSize=page_size, fields=LIST_FIELDS, **SHARED_DRIVE_PARAMS
+            ),
+        )
+
+    def _scan(user_id: str, start: Optional[str], page_token: Optional[str], page_size: int) -> Dict[str, Any]:
+        resp = _list_files(user_id, page_token, page_size)
+        if not start:
+            return resp
+        next_token = resp.get("nextPageToken")
+        cursor = f"{SCAN_CURSOR_PREFIX}{start}:{next_token}" if next_token else CHANGES_CURSOR_PREFIX + start
+        return {"files": resp.get("files", []), "nextPageToken": cursor if next_token else None, "cursorToken": cursor}
+
+    def _list_changes(user_id: str, token: str, page_size: int) -> Dict[str, Any]:
+        resp = _execute(
+            user_id,
+            lambda: service(user_id).changes().list(
+                pageToken=token, pageSize=page_size, fields=CHANGES_FIELDS, **SHARED_DRIVE_PARAMS
+            ),
+        )
+        files = [
+            change["file"]
+            for change in resp.get("changes") or []
+            if not change.get("removed") and change.get("file") and not change["file"].get("trashed")
+        ]
+        next_token = resp.get("nextPageToken")
+        resume = next_token or resp.get("newStartPageToken") or token
+        return {
+            "files": files,
+            "nextPageToken": CHANGES_CURSOR_PREFIX + next_token if next_token else None,
+            "cursorToken": CHANGES_CURSOR_PREFIX + resume,
+        }
+
+    def _fetch_page(user_id: str, page_token: Optional[str], page_size: int) -> Dict[str, Any]:
+        if not use_changes:
+            return _list_files(user_id, page_token, page_size)
+        if page_token is None:
+            # take the change-log position before scanning so edits made
+            # during the scan are picked up by the next sync
+            start = _execute(
+                user_id, lambda: service(user_id).changes().getStartPageToken(supportsAllDrives=True)
+            ).get("startPageToken")
+            return _scan(user_id, start, None, page_size)
+        if page_token.startswith(CHANGES_CURSOR_PREFIX):
+            return _list_changes(user_id, page_token[len(CHANGES_CURSOR_PREFIX):], page_size)
+        if page_token.startswith(SCAN_CURSOR_PREFIX):
+            start, _, token = page_token[len(SCAN_CURSOR_PREFIX):].partition(":")
+            return _scan(user_id, start, token, page_size)
+        # a files.list token saved before change-log cursors existed
+        return _list_files(user_id, page_token, page_size)
+
+    def _cancel_prefetch() -> None:
+        while prefetched:
+            _, (_, future) = prefetched.popitem()
+            future.cancel()
+
+    def _list_page(user_id: str, page_token: Optional[str], page_size: int) -> Dict[str, Any]:
+        nonlocal remaining
+        entry = prefetched.pop(page_token, None)
+        # anything else in flight is for a page the caller moved past
+        _cancel_prefetch()
+        if entry is not None and entry[0] <= page_size:
+            resp = entry[1].result()
+        else:
+            if entry is not None:
+                entry[1].cancel()
+            resp = _fetch_page(user_id, page_token, page_size)
+        if remaining is not None:
+            remaining -= len(resp.get("files") or [])
+        next_token = resp.get("nextPageToken")
+        if creds is not None and next_token and (remaining is None or remaining > 0):
+            # request the next page while the caller works through this one
+            next_size = page_size if remaining is None else min(MAX_PAGE_SIZE, remaining)
+            prefetched[next_token] = (
+                next_size,
+                _list_prefetch_pool.submit(_fetch_page, user_id, next_token, next_size),
+            )
+        return resp
+
+    _list_page.cancel_prefetch = _cancel_prefetch
     return _list_page
 
 
-def _fetch_file_factory(svc):
-    def _fetch_file(user_id: str, file_id: str, mime_type: Optional[str]) -> bytes:
+def _fetch_file_factory(svc, creds=None):
+    service = _thread_service_factory(svc, creds)
+
+    def _fetch_file(user_id: str, file_id: str, mime_type: Optional[str]) -> Union[bytes, str, BinaryIO]:
         retries = 0
         while True:
             try:
-                return _download(svc, file_id, mime_type)
+                return _limited(user_id, lambda: _download(service(user_id), file_id, mime_type))
             except HttpError as err:
                 if _should_retry(err, retries):
                     _sleep_with_backoff(err, retries)
@@ -90,8 +319,12 @@ def _fetch_file_factory(svc):
     return _fetch_file
 
 
-def _parse_bytes(content: bytes, mime: Optional[str]) -> str:
-    return to_text(content, filename="", mime=mime)
+def _parse_bytes(content: Union[bytes, str, BinaryIO], mime: Optional[str]) -> str:
+    try:
+        return to_text(content, filename="", mime=mime)
+    finally:
+        if hasattr(content, "close"):
+            content.close()
 
 
 @router.post("")
@@ -103,41 +336,43 @@ def ingest_drive_endpoint(
     _csrf=Depends(csrf_protect),
 ):
     creds = get_google_credentials_for_user(db, user.user_id)
-    svc = _drive_service(creds)
-    list_page = _list_page_factory(svc, name_contains)
-    fetch_file = _fetch_file_factory(svc)
+    svc = _service_for_user(user.user_id, creds)
+    use_cursor = name_contains is None
+    list_page = _list_page_factory(svc, name_contains, creds, use_changes=use_cursor, limit=limit)
+    fetch_file = _fetch_file_factory(svc, creds)
 
     processed = embedded = errors = 0
-    use_cursor = name_contains is None
     next_page: Optional[str] = load_drive_cursor(db, user.user_id) if use_cursor else None
     remaining = limit
 
-    while remaining > 0:
-        page_size = min(MAX_PAGE_SIZE, remaining)
-        try:
-            summary = run_drive_ingest_once(
-                db=db,
-                user_id=user.user_id,
-                list_page=list_page,
-                fetch_file_bytes=fetch_file,
-                parse_bytes=_parse_bytes,
-                job=None,
-                page_token=next_page,
-                page_size=page_size,
-            )
-        except RuntimeError as exc:
-            raise HTTPException(status_code=502, detail=str(exc)) from exc
-        processed += summary.get("processed", 0)
-        embedded += summary.get("embedded", 0)
-        errors += summary.get("errors", 0)
-        remaining -= summary.get("processed", 0)
-        next_page = summary.get("nextPageToken")
-        if summary.get("errors"):
-            break
-        if use_cursor and not summary.get("listing_failed"):
-            save_drive_cursor(db, user.user_id, next_page)
-        if not next_page or summary.get("processed", 0) == 0:
-            break
+    try:
+        while remaining > 0:
+            page_size = min(MAX_PAGE_SIZE, remaining)
+            try:
+                summary = run_drive_ingest_once(
+                    db=db,
+                    user_id=user.user_id,
+                    list_page=list_page,
+                    fetch_file_bytes=fetch_file,
+                    parse_bytes=_parse_bytes,
+                    job=None,
+                    page_token=next_page,
+                    page_size=page_size,
+                    save_cursor=use_cursor,
+                )
+            except RuntimeError as exc:
+                raise HTTPException(status_code=502, detail=str(exc)) from exc
+            processed += summary.get("processed", 0)
+            embedded += summary.get("embedded", 0)
+            errors += summary.get("errors", 0)
+            remaining -= summary.get("processed", 0)
+            next_page = summary.get("nextPageToken")
+            if summary.get("errors"):
+                break
+            if not next_page or summary.get("processed", 0) == 0:
+                break
+    finally:
+        list_page.cancel_prefetch()
 
     if errors:
         raise HTTPException(
@@ -146,19 +381,69 @@ def ingest_drive_endpoint(
         )
     return {"found": processed, "ingested": embedded, "errors": errors}
 
-def _download(svc, file_id: str, mime: str | None):
-    buf = io.BytesIO()
+def _media_request(svc, file_id: str, mime: str | None):
     if mime in EXPORT_MIME:
-        req = svc.files().export_media(fileId=file_id, mimeType=EXPORT_MIME[mime])
-    else:
-        req = svc.files().get_media(fileId=file_id)
-    downloader = MediaIoBaseDownload(buf, req)
+        return svc.files().export_media(fileId=file_id, mimeType=EXPORT_MIME[mime])
+    return svc.files().get_media(fileId=file_id)
+
+
+def _iter_download(svc, file_id: str, mime: str | None) -> Iterator[bytes]:
+    buf = io.BytesIO()
+    downloader = MediaIoBaseDownload(buf, _media_request(svc, file_id, mime), chunksize=DOWNLOAD_CHUNK_SIZE)
     done = False
     while not done:
         _, done = downloader.next_chunk()
+        chunk = buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        if chunk:
+            yield chunk
+
+
+def _streams_as_text(mime: str | None) -> bool:
+    # Types that to_text would only utf-8 decode; exports are always text.
+    if mime in EXPORT_MIME:
+        return True
+    return bool(mime and mime.startswith("text/") and mime not in CSV_MIMES)
+
+
+def _streams_as_file(mime: str | None) -> bool:
+    return mime == "application/pdf" or mime in DOCX_MIMES
+
+
+def _download(svc, file_id: str, mime: str | None) -> Union[bytes, str, BinaryIO]:
+    """
+    Text content is decoded chunk by chunk as it arrives (to_text passes str
+    through), so the raw bytes are never held alongside the decoded text.
+    PDF/DOCX go to a spooled temp file (in memory when small, on disk when
+    large) that the parser reads from directly.
+    """
+    if _streams_as_text(mime):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        parts = [decoder.decode(chunk) for chunk in _iter_download(svc, file_id, mime)]
+        parts.append(decoder.decode(b"", final=True))
+        return "".join(parts)
+    if _streams_as_file(mime):
+        sink = tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_MAX_BYTES)
+        try:
+            _download_into(sink, svc, file_id, mime)
+        except BaseException:
+            sink.close()
+            raise
+        sink.seek(0)
+        return sink
+    buf = io.BytesIO()
+    _download_into(buf, svc, file_id, mime)
     return buf.getvalue()
 
 
+def _download_into(sink, svc, file_id: str, mime: str | None) -> None:
+    downloader = MediaIoBaseDownload(sink, _media_request(svc, file_id, mime), chunksize=DOWNLOAD_CHUNK_SIZE)
+    done = False
+    while not done:
+        _, done = downloader.next_chunk()
+
+
 def ingest_drive(
     user_id: str,
     name_filter: Optional[str] = None,
@@ -173,12 +458,12 @@ def ingest_drive(
     limit = max(1, limit)
 
     creds = get_google_credentials_for_user_unmanaged(user_id)
-    svc = _drive_service(creds)
-    list_page = _list_page_factory(svc, name_filter)
-    fetch_file = _fetch_file_factory(svc)
+    svc = _service_for_user(user_id, creds)
+    use_cursor = not reembed_all and name_filter is None
+    list_page = _list_page_factory(svc, name_filter, creds, use_changes=use_cursor, limit=limit)
+    fetch_file = _fetch_file_factory(svc, creds)
 
     processed = embedded = errors = 0
-    use_cursor = not reembed_all and name_filter is None
     page_token: Optional[str] = None
     remaining = limit
 
@@ -198,6 +483,7 @@ def ingest_drive(
                 page_token=page_token,
                 page_size=page_size,
                 force_reembed=reembed_all,
+                save_cursor=use_cursor,
             )
             processed += summary.get("processed", 0)
             embedded += summary.get("embedded", 0)
@@ -206,8 +492,6 @@ def ingest_drive(
             page_token = summary.get("nextPageToken")
             if summary.get("errors"):
                 break
-            if use_cursor and not summary.get("listing_failed"):
-                save_drive_cursor(db, user_id, page_token)
 
             if on_progress:
                 total_hint = processed + max(remaining, 0)
@@ -218,6 +502,7 @@ def ingest_drive(
 
         return {"found": processed, "ingested": embedded, "errors": errors}
     finally:
+        list_page.cancel_prefetch()
         db.close()
 
 
@@ -229,7 +514,7 @@ def ensure_drive_session(user_id: str) -> None:
     get_google_credentials_for_user_unmanaged(user_id)
 
 
-def _list_drive_files(svc, query: str, limit: int) -> List[Dict[str, Any]]:
+def _list_drive_files(svc, query: str, limit: int, user_id: str) -> List[Dict[str, Any]]:
     files: List[Dict[str, Any]] = []
     page_token: Optional[str] = None
     retries = 0
@@ -237,16 +522,14 @@ def _list_drive_files(svc, query: str, limit: int) -> List[Dict[str, Any]]:
     while len(files) < limit:
         page_size = min(MAX_PAGE_SIZE, max(1, limit - len(files)))
         try:
-            resp = (
-                svc.files()
-                .list(
-                    q=query,
-                    pageToken=page_token,
-                    pageSize=page_size,
-                    fields="nextPageToken, files(id,name,mimeType)",
-                )
-                .execute()
+            req = svc.files().list(
+                q=query,
+                pageToken=page_token,
+                pageSize=page_size,
+                fields=LIST_FIELDS,
+                **SHARED_DRIVE_PARAMS,
             )
+            resp = _limited(user_id, req.execute)
         except HttpError as err:
             if _should_retry(err, retries):
                 _sleep_with_backoff(err, retries)
@@ -264,18 +547,36 @@ def _list_drive_files(svc, query: str, limit: int) -> List[Dict[str, Any]]:
     return files[:limit]
 
 
-def _should_retry(err: HttpError, attempt: int) -> bool:
-    if attempt >= MAX_LIST_RETRIES:
-        return False
+def _limited(user_id: str, call: Callable[[], Any]) -> Any:
+    # Every Drive call for a user goes through that user's shared bucket;
+    # 429s shrink its refill rate and successes grow it back (AIMD).
+    limiter = limiter_for(user_id)
+    limiter.acquire()
+    try:
+        result = call()
+    except HttpError as err:
+        if _status_code(err) == 429:
+            limiter.penalize(_retry_after_seconds(err))
+        raise
+    limiter.record_success()
+    return result
+
+
+def _status_code(err: HttpError) -> Optional[int]:
     status = getattr(getattr(err, "resp", None), "status", None)
     try:
-        code = int(status)
+        return int(status)
     except (TypeError, ValueError):
-        code = None
-    return code in {429, 500, 502, 503, 504}
+        return None
 
 
-def _sleep_with_backoff(err: HttpError, attempt: int) -> None:
+def _should_retry(err: HttpError, attempt: int) -> bool:
+    if attempt >= MAX_LIST_RETRIES:
+        return False
+    return _status_code(err) in {429, 500, 502, 503, 504}
+
+
+def _retry_after_seconds(err: HttpError) -> Optional[float]:
     retry_after = None
     resp = getattr(err, "resp", None)
     if resp:
@@ -283,10 +584,13 @@ def _sleep_with_backoff(err: HttpError, attempt: int) -> None:
         if retry_after is None:
             retry_after = getattr(resp, "retry_after", None)
     try:
-        retry_after = float(retry_after) if retry_after is not None else None
+        return float(retry_after) if retry_after is not None else None
     except (TypeError, ValueError):
-        retry_after = None
+        return None
+
 
+def _sleep_with_backoff(err: HttpError, attempt: int) -> None:
+    retry_after = _retry_after_seconds(err)
     if retry_after is not None and retry_after > 0:
         delay = retry_after
     else:
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from app.core.logging_utils import log_event
+
+
+DRIVE_REQUESTS_PER_SECOND = float(os.getenv("INGEST_DRIVE_REQUESTS_PER_SECOND", "10"))
+DRIVE_BURST = float(os.getenv("INGEST_DRIVE_BURST", "10"))
+DRIVE_MIN_REQUESTS_PER_SECOND = 0.5
+# AIMD: halve the refill rate on every 429, add this much back per success.
+DRIVE_RATE_DECREASE = 0.5
+DRIVE_RATE_INCREASE = 0.1
+# EWMA weight of the most recent call when tracking the observed 429 rate;
+# the rate only recovers once recent throttling has decayed below the ceiling.
+EWMA_ALPHA = 0.1
+RECOVER_BELOW_429_RATE = 0.05
+
+_limiters: Dict[str, "DriveLimiter"] = {}
+_limiters_lock = threading.Lock()
+
+
+class DriveLimiter:
+    """
+    Client-side token bucket in front of Drive API calls for one account.
+
+    Every worker thread for the same user draws from the same bucket, so a
+    429 slows all of them down instead of each retrying on its own.
+    """
+
+    def __init__(
+        self,
+        rate: float = DRIVE_REQUESTS_PER_SECOND,
+        capacity: float = DRIVE_BURST,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.max_rate = max(rate, DRIVE_MIN_REQUESTS_PER_SECOND)
+        self.rate = self.max_rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.ewma_429_rate = 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            self._sleep(wait)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.ewma_429_rate *= 1 - EWMA_ALPHA
+            if self.ewma_429_rate < RECOVER_BELOW_429_RATE:
+                self.rate = min(self.max_rate, self.rate + DRIVE_RATE_INCREASE)
+
+    def penalize(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self.ewma_429_rate = self.ewma_429_rate * (1 - EWMA_ALPHA) + EWMA_ALPHA
+            self.rate = max(DRIVE_MIN_REQUESTS_PER_SECOND, self.rate * DRIVE_RATE_DECREASE)
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after and retry_after > 0:
+                self._blocked_until = max(self._blocked_until, self._clock() + retry_after)
+            rate = self.rate
+        log_event("drive_rate_limited", rate=round(rate, 2), retry_after=retry_after, level="warning")
+
+
+def limiter_for(user_id: str) -> DriveLimiter:
+    limiter = _limiters.get(user_id)
+    if limiter is not None:
+        return limiter
+    with _limiters_lock:
+        limiter = _limiters.get(user_id)
+        if limiter is None:
+            limiter = _limiters[user_id] = DriveLimiter()
+        return limiter
@@ -1,14 +1,24 @@
 from __future__ import annotations
 
+import multiprocessing
 import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
+from functools import partial
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, List, Callable, Tuple
+from typing import Deque, Dict, Any, Optional, Iterator, List, Callable, Tuple
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm.attributes import flag_modified
 from sqlalchemy.orm import Session
 
 from app.core.models import ContentIndex, IngestionJob, SourceState
-from app.ingest.text_normalize import normalize_text, compute_content_hash
-from app.ingest.should_ingest import should_reingest
+from app.ingest.text_normalize import normalize_text, sha256_text
+from app.ingest.should_ingest import _to_dt, md5_content_hash, should_reingest
 from app.ingest.chunking import split_by_chars
 from app.rag import vector
 from app.core.logging_utils import log_event
@@ -18,12 +28,34 @@ DRIVE_SOURCE = "drive"
 PROGRESS_FLUSH_INTERVAL = max(1, int(os.getenv("INGEST_PROGRESS_FLUSH_INTERVAL", "10")))
 EMBED_BATCH_SIZE = max(1, int(os.getenv("EMBED_BATCH_SIZE", "48")))
 EMBED_TOKEN_LIMIT = max(1000, int(os.getenv("EMBED_TOKEN_LIMIT", "120000")))
+# embedding requests in flight at once per ingest (each is one provider round trip)
+EMBED_CONCURRENCY = max(1, int(os.getenv("EMBED_CONCURRENCY", "4")))
+EMBED_SUBMIT_JITTER_SECONDS = 0.05
+DOWNLOAD_CONCURRENCY = max(1, int(os.getenv("INGEST_DRIVE_DOWNLOAD_CONCURRENCY", "8")))
+# downloads kept in flight ahead of processing, as a multiple of the concurrency
+DOWNLOAD_WINDOW_FACTOR = 2
+ROW_LOOKUP_BATCH_SIZE = 200
+MAX_FAILED_DOCS = 25
+# normalize_text is regex work that holds the GIL; large texts go to worker
+# processes (0 disables). Smaller ones aren't worth the pickling round trip.
+NORMALIZE_PROCESSES = max(0, int(os.getenv("INGEST_NORMALIZE_PROCESSES", str(os.cpu_count() or 1))))
+NORMALIZE_OFFLOAD_MIN_CHARS = int(os.getenv("INGEST_NORMALIZE_OFFLOAD_MIN_CHARS", str(1024 * 1024)))
+
+_download_pool: Optional[ThreadPoolExecutor] = None
+_download_pool_lock = threading.Lock()
+_normalize_pool: Optional[ProcessPoolExecutor] = None
+_embed_pool: Optional[ThreadPoolExecutor] = None
+_embed_pool_lock = threading.Lock()
+_normalize_pool_lock = threading.Lock()
 
 
 class EmbeddingBatchError(RuntimeError):
-    def __init__(self, message: str, docs: List["DocWork"]):
+    """Some batches failed; `ready_docs` finished in the same pass and still need finalizing."""
+
+    def __init__(self, message: str, docs: List["DocWork"], ready_docs: Optional[List["DocWork"]] = None):
         super().__init__(message)
         self.docs = docs
+        self.ready_docs = ready_docs or []
 
 
 @dataclass
@@ -38,13 +70,33 @@ class DocWork:
     new_chunk_ids: List[str] = field(default_factory=list)
 
 
+# (batch items, estimated tokens, error) for an embedding call that failed
+_FailedBatch = Tuple[List[Tuple[DocWork, Dict[str, Any]]], int, BaseException]
+
+
 class EmbeddingBatcher:
-    def __init__(self, user_id: str, max_batch_size: int = EMBED_BATCH_SIZE, max_tokens: int = EMBED_TOKEN_LIMIT):
+    """
+    Groups chunks from many documents into embedding batches. Chunks are
+    buffered until `max_inflight` batches' worth is pending, then sorted by
+    length and packed so each request holds similarly sized inputs. Batches are
+    embedded on a shared thread pool, up to `max_inflight` at a time, and
+    upserted on the calling thread as their vectors come back.
+    """
+
+    def __init__(
+        self,
+        user_id: str,
+        max_batch_size: int = EMBED_BATCH_SIZE,
+        max_tokens: int = EMBED_TOKEN_LIMIT,
+        max_inflight: int = EMBED_CONCURRENCY,
+    ):
         self.user_id = user_id
         self.max_batch_size = max_batch_size
         self.max_tokens = max_tokens
-        self._pending: List[Tuple[DocWork, Dict[str, Any]]] = []
+        self.max_inflight = max(1, max_inflight)
+        self._pending: Deque[Tuple[DocWork, Dict[str, Any]]] = deque()
         self._pending_tokens = 0
+        self._inflight: List[Tuple[Future, List[Tuple[DocWork, Dict[str, Any]]], int]] = []
         self._doc_states: Dict[str, Dict[str, Any]] = {}
         self._collection = None
 
@@ -53,92 +105,225 @@ class EmbeddingBatcher:
             raise RuntimeError(f"Embedding returned no chunks for document {work.doc_id}; aborting update.")
         if work.doc_id in self._doc_states:
             raise RuntimeError(f"Duplicate doc_id registered in batcher: {work.doc_id}")
-        self._doc_states[work.doc_id] = {"work": work, "inserted": 0}
-        work.embedded_count = len(work.chunks)
+        # The batcher owns the chunk dicts from here; once a batch is upserted
+        # nothing else references them, so only the pending batch stays alive.
+        chunks, work.chunks = work.chunks, []
+        self._doc_states[work.doc_id] = {
+            "work": work,
+            "inserted": 0,
+            "expected": len(chunks),
+            "order": {chunk["id"]: idx for idx, chunk in enumerate(chunks)},
+        }
+        work.embedded_count = len(chunks)
         ready: List[DocWork] = []
-        for chunk in work.chunks:
+        error: Optional[EmbeddingBatchError] = None
+        # Per-chunk work stays inline (token estimate included); _maybe_flush
+        # is only entered once a threshold is actually crossed.
+        max_chars = vector.MAX_CHARS_PER_CHUNK
+        flush_chunks = self.max_batch_size * self.max_inflight
+        flush_tokens = self.max_tokens * self.max_inflight
+        for chunk in chunks:
             text = (chunk.get("text") or "").strip()
             if not text:
                 continue
-            chunk["text"] = text[: vector.MAX_CHARS_PER_CHUNK]
+            text = chunk["text"] = text[:max_chars]
             self._pending.append((work, chunk))
-            self._pending_tokens += self._estimate_tokens(chunk["text"])
-            ready.extend(self._maybe_flush())
+            self._pending_tokens += len(text) // 4 + 1
+            if error is None and (len(self._pending) >= flush_chunks or self._pending_tokens >= flush_tokens):
+                try:
+                    ready.extend(self._maybe_flush())
+                except EmbeddingBatchError as exc:
+                    # keep queueing this doc's remaining chunks so it can still complete
+                    error = exc
+        if error is not None:
+            error.ready_docs = ready + error.ready_docs
+            raise error
         return ready
 
     def flush(self, force: bool = False) -> List[DocWork]:
         if not force:
             return []
-        return self._flush_pending()
+        ready: List[DocWork] = []
+        failed: List[_FailedBatch] = []
+        self._dispatch(ready, failed)
+        if self._inflight:
+            wait([future for future, _, _ in self._inflight])
+        self._reap(ready, failed)
+        self._raise_failures(ready, failed)
+        return ready
+
+    def discard(self, docs: List[DocWork]) -> None:
+        """
+        Forget `docs` entirely: their queued chunks are dropped, batches still
+        embedding for them upsert nothing for them, vectors already upserted
+        are deleted, and they are never reported ready.
+        """
+        doc_ids = {doc.doc_id for doc in docs}
+        written: List[str] = []
+        for doc_id in doc_ids:
+            state = self._doc_states.pop(doc_id, None)
+            if state is not None:
+                written.extend(state["work"].new_chunk_ids)
+        self._pending = deque(item for item in self._pending if item[0].doc_id not in doc_ids)
+        self._pending_tokens = sum(self._estimate_tokens(chunk["text"]) for _, chunk in self._pending)
+        # _reap skips chunks of forgotten docs; batches holding nothing else
+        # are cancelled when they haven't started yet
+        self._inflight = [
+            entry
+            for entry in self._inflight
+            if any(work.doc_id not in doc_ids for work, _ in entry[1]) or not entry[0].cancel()
+        ]
+        if written:
+            vector.delete_ids(written, user_id=self.user_id)
 
     def _maybe_flush(self) -> List[DocWork]:
-        if len(self._pending) >= self.max_batch_size or self._pending_tokens >= self.max_tokens:
-            return self._flush_pending()
+        if (
+            len(self._pending) >= self.max_batch_size * self.max_inflight
+            or self._pending_tokens >= self.max_tokens * self.max_inflight
+        ):
+            ready: List[DocWork] = []
+            failed: List[_FailedBatch] = []
+            self._dispatch(ready, failed)
+            self._reap(ready, failed)
+            self._raise_failures(ready, failed)
+            return ready
         return []
 
     def _estimate_tokens(self, text: str) -> int:
-        return max(1, len(text) // 4 + 1)
-
-    def _flush_pending(self) -> List[DocWork]:
+        # enqueue_doc inlines the same estimate
+        return len(text) // 4 + 1
+
+    def _dispatch(
+        self,
+        ready: List[DocWork],
+        failed: List[_FailedBatch],
+    ) -> None:
         if not self._pending:
-            return []
-        items = self._pending
-        tokens = self._pending_tokens
-        self._pending = []
+            return
+        items = list(self._pending)
+        self._pending.clear()
         self._pending_tokens = 0
-        try:
-            return self._execute_flush(items)
-        except Exception as exc:
-            # restore pending state so upstream retry/failure has the original queue
-            self._pending = items + self._pending
-            self._pending_tokens += tokens
-            involved_docs = list({doc.doc_id: doc for doc, _ in items}.values())
-            raise EmbeddingBatchError(str(exc), list(involved_docs)) from exc
-
-    def _execute_flush(self, items: List[Tuple[DocWork, Dict[str, Any]]]) -> List[DocWork]:
+        for batch, tokens in self._pack(items):
+            # at most max_inflight embedding calls at once: wait for a free slot
+            while len(self._inflight) >= self.max_inflight:
+                wait([future for future, _, _ in self._inflight], return_when=FIRST_COMPLETED)
+                self._reap(ready, failed)
+            texts = [chunk["text"] for _, chunk in batch]
+            future = _get_embed_pool().submit(_embed_batch, texts, bool(self._inflight))
+            self._inflight.append((future, batch, tokens))
+
+    def _pack(
+        self, items: List[Tuple[DocWork, Dict[str, Any]]]
+    ) -> Iterator[Tuple[List[Tuple[DocWork, Dict[str, Any]]], int]]:
+        # Shortest first, so each request's inputs are close in length and the
+        # token budget fills evenly instead of one long chunk per mixed batch.
+        items.sort(key=lambda item: len(item[1]["text"]))
+        batch: List[Tuple[DocWork, Dict[str, Any]]] = []
+        tokens = 0
+        for item in items:
+            estimate = self._estimate_tokens(item[1]["text"])
+            if batch and (len(batch) >= self.max_batch_size or tokens + estimate > self.max_tokens):
+                yield batch, tokens
+                batch, tokens = [], 0
+            batch.append(item)
+            tokens += estimate
+        if batch:
+            yield batch, tokens
+
+    def _reap(
+        self,
+        ready: List[DocWork],
+        failed: List[_FailedBatch],
+    ) -> None:
+        """Upsert every finished batch; failures are collected for _raise_failures."""
+        still_running = []
+        for future, items, tokens in self._inflight:
+            if not future.done():
+                still_running.append((future, items, tokens))
+                continue
+            # chunks of discarded docs are dropped, vectors and failures alike
+            keep = [i for i, (work, _) in enumerate(items) if work.doc_id in self._doc_states]
+            if not keep:
+                continue
+            trimmed = len(keep) < len(items)
+            if trimmed:
+                items = [items[i] for i in keep]
+                tokens = sum(self._estimate_tokens(chunk["text"]) for _, chunk in items)
+            try:
+                vectors = future.result()
+                if trimmed:
+                    vectors = [vectors[i] for i in keep]
+                ready.extend(self._upsert(items, vectors))
+            except Exception as exc:
+                failed.append((items, tokens, exc))
+        self._inflight = still_running
+
+    def _raise_failures(
+        self,
+        ready: List[DocWork],
+        failed: List[_FailedBatch],
+    ) -> None:
+        if not failed:
+            return
+        # restore pending state so upstream retry/failure has the original queue
+        restored = [item for items, _, _ in failed for item in items]
+        self._pending.extendleft(reversed(restored))
+        self._pending_tokens += sum(tokens for _, tokens, _ in failed)
+        involved_docs = list({doc.doc_id: doc for doc, _ in restored}.values())
+        first_error = failed[0][2]
+        raise EmbeddingBatchError(str(first_error), involved_docs, ready) from first_error
+
+    def _upsert(self, items: List[Tuple[DocWork, Dict[str, Any]]], vectors: List[List[float]]) -> List[DocWork]:
         try:
             col = self._collection or vector._col(user_id=self.user_id)
             self._collection = col
         except Exception as exc:
             raise RuntimeError(f"Vector store unavailable: {exc}") from exc
 
-        ids: List[str] = []
-        docs: List[str] = []
-        metas: List[Dict[str, Any]] = []
-        doc_refs: List[DocWork] = []
-
-        for work, chunk in items:
-            ids.append(chunk["id"])
-            docs.append(chunk["text"])
-            metas.append(chunk.get("meta", {}))
-            doc_refs.append(work)
-
-        vectors = vector._embed_with_retry(docs)
-        if len(vectors) != len(docs):
-            raise RuntimeError("Embedding returned mismatched vector count.")
-
-        col.upsert(ids=ids, documents=docs, metadatas=metas, embeddings=vectors)
+        ids = [chunk["id"] for _, chunk in items]
+        col.upsert(
+            ids=ids,
+            documents=[chunk["text"] for _, chunk in items],
+            metadatas=[chunk.get("meta", {}) for _, chunk in items],
+            embeddings=vectors,
+        )
 
         ready: List[DocWork] = []
-        for work, chunk_id in zip(doc_refs, ids):
+        for (work, _), chunk_id in zip(items, ids):
             state = self._doc_states.get(work.doc_id)
             if not state:
                 continue
             state["inserted"] += 1
             work.new_chunk_ids.append(chunk_id)
-            expected = len(work.chunks)
-            if state["inserted"] >= expected:
+            if state["inserted"] >= state["expected"]:
+                # batches finish out of order; report ids in the document's chunk order
+                work.new_chunk_ids.sort(key=state["order"].get)
                 ready.append(work)
                 self._doc_states.pop(work.doc_id, None)
         return ready
 
 
+def _embed_batch(texts: List[str], jitter: bool) -> List[List[float]]:
+    if jitter:
+        # spread concurrent requests out so a 429 doesn't hit every batch at once
+        time.sleep(random.uniform(0, EMBED_SUBMIT_JITTER_SECONDS))
+    vectors = vector._embed_with_retry(texts)
+    if len(vectors) != len(texts):
+        raise RuntimeError("Embedding returned mismatched vector count.")
+    return vectors
+
+
+def _get_embed_pool() -> ThreadPoolExecutor:
+    global _embed_pool
+    if _embed_pool is None:
+        with _embed_pool_lock:
+            if _embed_pool is None:
+                _embed_pool = ThreadPoolExecutor(max_workers=EMBED_CONCURRENCY, thread_name_prefix="embed")
+    return _embed_pool
+
+
 def _load_source_state(db: Session, user_id: str) -> Optional[SourceState]:
-    return (
-        db.query(SourceState)
-        .filter(SourceState.user_id == user_id, SourceState.source == DRIVE_SOURCE)
-        .one_or_none()
-    )
+    return db.get(SourceState, (user_id, DRIVE_SOURCE))
 
 
 def load_drive_cursor(db: Session, user_id: str) -> Optional[str]:
@@ -152,56 +337,91 @@ def save_drive_cursor(
     cursor_token: Optional[str],
     *,
     extra: Optional[Dict[str, Any]] = None,
+    commit: bool = True,
+    completed: bool = False,
 ) -> None:
-    state = _load_source_state(db, user_id)
+    """
+    Persist the cursor with a single UPDATE (an INSERT only the first time),
+    without loading the row. With `commit=False` the write joins the caller's
+    transaction, which is how run_drive_ingest_once saves it with the page.
+    `last_sync` moves to now whenever a sync pass completes: on a committed
+    save, or when the caller marks the page as the last one (`completed`).
+    """
     now = datetime.now(timezone.utc)
-    if state is None:
-        state = SourceState(user_id=user_id, source=DRIVE_SOURCE)
-        db.add(state)
-    state.cursor_token = cursor_token
-    state.last_sync = now if cursor_token is None else state.last_sync or now
+    sync_done = commit or completed or cursor_token is None
+    values: Dict[str, Any] = {
+        "cursor_token": cursor_token,
+        "last_sync": now if sync_done else func.coalesce(SourceState.last_sync, now),
+        "updated_at": now,
+    }
     if extra is not None:
-        state.extra = extra
-    state.updated_at = now
-    db.commit()
+        values["extra"] = extra
+    result = db.execute(
+        update(SourceState)
+        .where(SourceState.user_id == user_id, SourceState.source == DRIVE_SOURCE)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        db.add(
+            SourceState(
+                user_id=user_id,
+                source=DRIVE_SOURCE,
+                cursor_token=cursor_token,
+                last_sync=now,
+                extra=extra if extra is not None else {},
+                updated_at=now,
+            )
+        )
+    if commit:
+        db.commit()
 
 
-def _to_dt(val) -> Optional[datetime]:
-    if not val:
-        return None
-    if isinstance(val, datetime):
-        return val
-    s = str(val).strip()
-    if s.endswith("Z"):
-        s = s[:-1] + "+00:00"
-    else:
-        if len(s) >= 5 and (s[-5] in "+-") and s[-3] != ":":
-            s = s[:-2] + ":" + s[-2:]
-    if "T" in s:
-        date_part, time_part = s.split("T", 1)
-        frac_idx = time_part.find(".")
-        if frac_idx != -1:
-            tz_idx = max(time_part.find("+", frac_idx), time_part.find("-", frac_idx))
-            if tz_idx == -1:
-                tz_idx = len(time_part)
-            frac = time_part[frac_idx + 1 : tz_idx]
-            if len(frac) > 6:
-                time_part = time_part[: frac_idx + 1] + frac[:6] + time_part[tz_idx:]
-        s = date_part + "T" + time_part
-    try:
-        if "T" not in s and len(s) == 10:
-            return datetime.fromisoformat(s).replace(tzinfo=timezone.utc)
-        return datetime.fromisoformat(s)
-    except Exception:
+def _get_row(db: Session, user_id: str, source: str, obj_id: str) -> Optional[ContentIndex]:
+    # `id` alone is the primary key, so rows already in the session need no query.
+    row = db.get(ContentIndex, obj_id)
+    if row is None or row.user_id != user_id or row.source != source:
         return None
+    return row
 
 
-def _get_row(db: Session, user_id: str, source: str, obj_id: str) -> Optional[ContentIndex]:
-    return (
-        db.query(ContentIndex)
-        .filter_by(user_id=user_id, source=source, id=obj_id)
-        .one_or_none()
-    )
+def _load_rows(db: Session, user_id: str, file_ids: List[str]) -> Dict[str, Optional[ContentIndex]]:
+    """Fetch the index rows for a page of files in a few IN queries instead of one per file."""
+    rows: Dict[str, Optional[ContentIndex]] = {fid: None for fid in file_ids}
+    ids = list(rows)
+    for offset in range(0, len(ids), ROW_LOOKUP_BATCH_SIZE):
+        batch = ids[offset:offset + ROW_LOOKUP_BATCH_SIZE]
+        found = (
+            db.query(ContentIndex)
+            .filter(ContentIndex.user_id == user_id, ContentIndex.source == "drive", ContentIndex.id.in_(batch))
+            .all()
+        )
+        for row in found:
+            rows[row.id] = row
+    return rows
+
+
+def _new_row_values(
+    user_id: str, meta: Dict[str, Any], content_hash: Optional[str], now: datetime
+) -> Dict[str, Any]:
+    fid = meta["id"]
+    return {
+        "id": fid,
+        "user_id": user_id,
+        "source": "drive",
+        "external_id": fid,
+        "name": meta.get("name"),
+        "path": None,
+        "mime_type": meta.get("mimeType"),
+        "md5": meta.get("md5Checksum") or meta.get("md5"),
+        "modified_time": _to_dt(meta.get("modifiedTime") or meta.get("modified_time")),
+        "size_bytes": int(meta["size"]) if str(meta.get("size", "")).isdigit() else None,
+        "version": meta.get("version"),
+        "is_trashed": bool(meta.get("trashed") or meta.get("is_trashed")),
+        "content_hash": content_hash,
+        "last_ingested_at": now if content_hash else None,
+        "extra": {},
+    }
 
 
 def _upsert_row(
@@ -209,29 +429,20 @@ def _upsert_row(
     user_id: str,
     meta: Dict[str, Any],
     content_hash: Optional[str],
+    stored_rows: Optional[Dict[str, Optional[ContentIndex]]] = None,
+    now: Optional[datetime] = None,
 ) -> ContentIndex:
     fid = meta["id"]
-    row = _get_row(db, user_id, "drive", fid)
-    now = datetime.now(timezone.utc)
+    if stored_rows is not None and fid in stored_rows:
+        row = stored_rows[fid]
+    else:
+        row = _get_row(db, user_id, "drive", fid)
+    now = now or datetime.now(timezone.utc)
     if row is None:
-        row = ContentIndex(
-            id=fid,
-            user_id=user_id,
-            source="drive",
-            external_id=fid,
-            name=meta.get("name"),
-            path=None,
-            mime_type=meta.get("mimeType"),
-            md5=meta.get("md5Checksum") or meta.get("md5"),
-            modified_time=_to_dt(meta.get("modifiedTime") or meta.get("modified_time")),
-            size_bytes=int(meta["size"]) if str(meta.get("size", "")).isdigit() else None,
-            version=meta.get("version"),
-            is_trashed=bool(meta.get("trashed") or meta.get("is_trashed")),
-            content_hash=content_hash,
-            last_ingested_at=now if content_hash else None,
-            extra={},
-        )
+        row = ContentIndex(**_new_row_values(user_id, meta, content_hash, now))
         db.add(row)
+        if stored_rows is not None:
+            stored_rows[fid] = row
     else:
         row.name = meta.get("name") or row.name
         row.mime_type = meta.get("mimeType") or row.mime_type
@@ -248,6 +459,24 @@ def _upsert_row(
     return row
 
 
+def _listing_meta_changed(row: ContentIndex, meta: Dict[str, Any]) -> bool:
+    version = meta.get("version")
+    name = meta.get("name")
+    return bool((version and version != row.version) or (name and name != row.name))
+
+
+def _content_hash(file_meta: Dict[str, Any], normalized: str) -> str:
+    """
+    Binary files carry Drive's md5 of their bytes, which already identifies the
+    extracted text for a given parser/normalizer, so only Google-native files
+    (no md5) pay for hashing the full text. Bare hex values are sha256.
+    """
+    md5 = file_meta.get("md5Checksum") or file_meta.get("md5")
+    if md5:
+        return md5_content_hash(md5)
+    return sha256_text(normalized)
+
+
 def _build_drive_chunk_meta(file_meta: Dict[str, Any]) -> Dict[str, Any]:
     doc_id = file_meta.get("id")
     title = file_meta.get("name") or file_meta.get("title") or "(untitled)"
@@ -275,39 +504,89 @@ def _build_chunk_rows(
     if doc_meta:
         base_meta.update({k: v for k, v in doc_meta.items() if v is not None})
 
+    # Chroma stores each metadata dict as given, so every row still needs its
+    # own; the prefix and limit are just hoisted out of the per-chunk loop.
+    id_prefix = f"{user_id}-{doc_id}-"
+    max_chars = vector.MAX_CHARS_PER_CHUNK
     rows: List[Dict[str, Any]] = []
     for i, ch in enumerate(split_by_chars(text)):
-        snippet = (ch or "").strip()
+        snippet = ch.strip() if ch else ""
         if not snippet:
             continue
-        row_meta = dict(base_meta)
-        row_meta["chunk_index"] = i
         rows.append(
             {
-                "id": f"{user_id}-{doc_id}-{i}",
-                "text": snippet[: vector.MAX_CHARS_PER_CHUNK],
-                "meta": row_meta,
+                "id": id_prefix + str(i),
+                "text": snippet[:max_chars],
+                "meta": {**base_meta, "chunk_index": i},
             }
         )
     return rows
 
 
-def _finalize_ready_docs(db: Session, user_id: str, docs: List[DocWork]) -> int:
+def _finalize_ready_docs(
+    db: Session,
+    user_id: str,
+    docs: List[DocWork],
+    stored_rows: Optional[Dict[str, Optional[ContentIndex]]] = None,
+) -> int:
     if not docs:
         return 0
     total_embedded = 0
+    stale_ids: List[str] = []
     for work in docs:
-        new_ids = list(work.new_chunk_ids)
-        if len(new_ids) != work.embedded_count:
+        if len(work.new_chunk_ids) != work.embedded_count:
             raise RuntimeError(f"Embedding incomplete for document {work.doc_id}; aborting update.")
-        stale_ids = [cid for cid in work.existing_chunk_ids if cid not in new_ids]
-        if stale_ids:
-            vector.delete_ids(stale_ids, user_id=user_id)
-        _upsert_row(db, user_id, work.file_meta, work.content_hash)
+        new_ids = set(work.new_chunk_ids)
+        stale_ids.extend(cid for cid in work.existing_chunk_ids if cid not in new_ids)
+    if stale_ids:
+        vector.delete_ids(stale_ids, user_id=user_id)
+    # Files the page lookup already showed to be new are inserted in one
+    # executemany instead of one ORM object (and flush bookkeeping) each.
+    now = datetime.now(timezone.utc)
+    new_rows: List[Dict[str, Any]] = []
+    for work in docs:
+        fid = work.file_meta["id"]
+        if stored_rows is not None and fid in stored_rows and stored_rows[fid] is None:
+            new_rows.append(_new_row_values(user_id, work.file_meta, work.content_hash, now))
+            # now in the table but not the session; later lookups go through db.get
+            del stored_rows[fid]
+        else:
+            _upsert_row(db, user_id, work.file_meta, work.content_hash, stored_rows, now)
         total_embedded += work.embedded_count
+    if new_rows:
+        _insert_new_rows(db, new_rows)
     return total_embedded
 
 
+def _insert_new_rows(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Insert index rows the page lookup found missing in one statement. Another
+    worker may have inserted the same file since, so on Postgres/SQLite a
+    conflict merges into that row the way `_upsert_row` would instead of
+    failing the page; rows owned by a different user are left alone.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        db.execute(insert(ContentIndex), rows)
+        return
+
+    stmt = dialect_insert(ContentIndex)
+    excluded = stmt.excluded
+    keep_existing = ("name", "mime_type", "md5", "modified_time", "size_bytes", "version", "content_hash", "last_ingested_at")
+    set_ = {col: func.coalesce(getattr(excluded, col), getattr(ContentIndex, col)) for col in keep_existing}
+    set_["is_trashed"] = excluded.is_trashed
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ContentIndex.id],
+        set_=set_,
+        where=ContentIndex.user_id == excluded.user_id,
+    )
+    db.execute(stmt, rows)
+
+
 def process_drive_file(
     db: Session,
     *,
@@ -316,39 +595,59 @@ def process_drive_file(
     fetch_file_bytes: Callable[[str, str, Optional[str]], bytes],
     parse_bytes: Callable[[bytes, Optional[str]], str],
     force_reembed: bool = False,
+    stored_rows: Optional[Dict[str, Optional[ContentIndex]]] = None,
+    chunk_ids: Optional[Dict[str, List[str]]] = None,
+    prepare_doc: Optional[Callable[..., Tuple[str, Optional[str], List[Dict[str, Any]]]]] = None,
+    needs_fetch: Optional[bool] = None,
 ) -> Dict[str, int]:
     """
     Normalize, dedupe, embed, and persist metadata for a single Drive file.
     Returns {"processed": 1, "embedded": N} when work was attempted.
+    `stored_rows` is an optional preloaded {file_id: row} map from `_load_rows`,
+    `chunk_ids` an optional {file_id: existing chunk ids} map from the vector store,
+    and `prepare_doc` an optional download+parse+chunk stage run ahead of time
+    (see `_prepare_doc` and `_prefetch_downloads`); without it the file is
+    fetched, parsed and chunked inline.
+    `needs_fetch` is the caller's should_reingest verdict when it already
+    classified the page (see `_reingest_candidates`).
     """
     fid = file_meta["id"]
-    stored = _get_row(db, user_id, "drive", fid)
+    if stored_rows is not None and fid in stored_rows:
+        stored = stored_rows[fid]
+    else:
+        stored = _get_row(db, user_id, "drive", fid)
     result = {"processed": 0, "embedded": 0}
 
-    if not force_reembed and not should_reingest(stored, file_meta):
-        result["processed"] = 1
-        return result
-
-    raw = fetch_file_bytes(user_id=user_id, file_id=fid, mime_type=file_meta.get("mimeType"))
-    if not raw:
+    if needs_fetch is None:
+        needs_fetch = force_reembed or should_reingest(stored, file_meta)
+    if not needs_fetch:
+        if stored is not None and _listing_meta_changed(stored, file_meta):
+            # same bytes, new name/version: refresh the index row without downloading
+            _upsert_row(db, user_id, file_meta, None, stored_rows)
         result["processed"] = 1
         return result
 
-    parsed = parse_bytes(raw, file_meta.get("mimeType"))
-    normalized = normalize_text(parsed)
+    if prepare_doc is None:
+        prepare_doc = partial(
+            _prepare_doc,
+            partial(_load_text, fetch_file_bytes, parse_bytes),
+            file_meta=file_meta,
+            stored_hash=None if force_reembed or stored is None else stored.content_hash,
+        )
+    normalized, chash, chunk_rows = prepare_doc(user_id=user_id, file_id=fid, mime_type=file_meta.get("mimeType"))
     if not normalized:
         result["processed"] = 1
         return result
-    chash = compute_content_hash(normalized)
 
     if not force_reembed and stored and (stored.content_hash or "") == chash:
-        _upsert_row(db, user_id, file_meta, stored.content_hash)
+        _upsert_row(db, user_id, file_meta, stored.content_hash, stored_rows)
         result["processed"] = 1
         return result
 
-    existing_ids = vector.list_doc_chunk_ids(fid, user_id=user_id)
-    doc_meta = _build_drive_chunk_meta(file_meta)
-    chunk_rows = _build_chunk_rows(user_id, fid, normalized, chash, doc_meta)
+    if chunk_ids is not None and fid in chunk_ids:
+        existing_ids = chunk_ids[fid]
+    else:
+        existing_ids = vector.list_doc_chunk_ids(fid, user_id=user_id)
     if not chunk_rows:
         raise RuntimeError(f"Embedding returned no chunks for document {fid}; aborting update.")
 
@@ -368,6 +667,147 @@ def process_drive_file(
     return result
 
 
+def _load_text(
+    fetch_file_bytes: Callable[..., bytes],
+    parse_bytes: Callable[[bytes, Optional[str]], str],
+    *,
+    user_id: str,
+    file_id: str,
+    mime_type: Optional[str],
+) -> str:
+    """Download, parse and normalize one file; empty downloads yield ""."""
+    raw = fetch_file_bytes(user_id=user_id, file_id=file_id, mime_type=mime_type)
+    if not raw:
+        return ""
+    return _normalize(parse_bytes(raw, mime_type))
+
+
+def _prepare_doc(
+    load_text: Callable[..., str],
+    *,
+    user_id: str,
+    file_id: str,
+    mime_type: Optional[str],
+    file_meta: Dict[str, Any],
+    stored_hash: Optional[str] = None,
+) -> Tuple[str, Optional[str], List[Dict[str, Any]]]:
+    """
+    Load one file and cut it into chunk rows: (normalized, content_hash, rows).
+    Chunking is skipped when the hash matches `stored_hash`, since the caller
+    will only refresh the index row.
+    """
+    normalized = load_text(user_id=user_id, file_id=file_id, mime_type=mime_type)
+    if not normalized:
+        return "", None, []
+    chash = _content_hash(file_meta, normalized)
+    if stored_hash is not None and stored_hash == chash:
+        return normalized, chash, []
+    rows = _build_chunk_rows(user_id, file_id, normalized, chash, _build_drive_chunk_meta(file_meta))
+    return normalized, chash, rows
+
+
+def _get_normalize_pool() -> ProcessPoolExecutor:
+    global _normalize_pool
+    if _normalize_pool is None:
+        with _normalize_pool_lock:
+            if _normalize_pool is None:
+                # forkserver children don't inherit the ingest threads or open
+                # connections, and only import text_normalize on first use
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else None
+                _normalize_pool = ProcessPoolExecutor(
+                    max_workers=NORMALIZE_PROCESSES, mp_context=multiprocessing.get_context(method)
+                )
+    return _normalize_pool
+
+
+def _normalize(text: Optional[str]) -> str:
+    global _normalize_pool
+    if not text or NORMALIZE_PROCESSES <= 0 or len(text) < NORMALIZE_OFFLOAD_MIN_CHARS:
+        return normalize_text(text)
+    try:
+        return _get_normalize_pool().submit(normalize_text, text).result()
+    except BrokenProcessPool:
+        log_event("normalize_pool_broken", level="warning")
+        with _normalize_pool_lock:
+            _normalize_pool = None
+        return normalize_text(text)
+
+
+def _get_download_pool() -> ThreadPoolExecutor:
+    global _download_pool
+    if _download_pool is None:
+        with _download_pool_lock:
+            if _download_pool is None:
+                _download_pool = ThreadPoolExecutor(
+                    max_workers=DOWNLOAD_CONCURRENCY, thread_name_prefix="drive-download"
+                )
+    return _download_pool
+
+
+def _reingest_candidates(
+    files: List[Dict[str, Any]],
+    stored_rows: Dict[str, Optional[ContentIndex]],
+    force_reembed: bool,
+) -> "OrderedDict[str, Dict[str, Any]]":
+    """Files on the page whose bytes will be needed, in listing order."""
+    candidates: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    for f in files:
+        fid = f.get("id")
+        if not fid or fid in candidates:
+            continue
+        if not force_reembed and not should_reingest(stored_rows.get(fid), f):
+            continue
+        candidates[fid] = f
+    return candidates
+
+
+def _prefetch_downloads(
+    db: Session,
+    user_id: str,
+    files: List[Dict[str, Any]],
+    fetch_file_bytes: Callable[..., bytes],
+    force_reembed: bool,
+    stored_rows: Dict[str, Optional[ContentIndex]],
+    candidates: Optional["OrderedDict[str, Dict[str, Any]]"] = None,
+) -> Tuple[Callable[..., bytes], Dict[str, Future]]:
+    """
+    Keep a sliding window of downloads in flight ahead of the file being
+    processed, so network time overlaps with embedding without holding a whole
+    page of file bodies in memory. `fetch_file_bytes` may be any per-file stage
+    (run_drive_ingest_once passes download+parse+chunk). Returns a callable that hands
+    back the prefetched result (or runs the stage inline).
+    """
+    futures: Dict[str, Future] = {}
+    waiting: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    if DOWNLOAD_CONCURRENCY > 1 and len(files) > 1:
+        if candidates is None:
+            candidates = _reingest_candidates(files, stored_rows, force_reembed)
+        waiting.update(candidates)
+    window = DOWNLOAD_CONCURRENCY * DOWNLOAD_WINDOW_FACTOR
+
+    def _top_up() -> None:
+        if not waiting:
+            return
+        pool = _get_download_pool()
+        while waiting and len(futures) < window:
+            fid, f = waiting.popitem(last=False)
+            futures[fid] = pool.submit(
+                fetch_file_bytes, user_id=user_id, file_id=fid, mime_type=f.get("mimeType")
+            )
+
+    _top_up()
+
+    def _fetch(user_id: str, file_id: str, mime_type: Optional[str]) -> bytes:
+        future = futures.pop(file_id, None)
+        waiting.pop(file_id, None)
+        _top_up()
+        if future is None:
+            return fetch_file_bytes(user_id=user_id, file_id=file_id, mime_type=mime_type)
+        return future.result()
+
+    return _fetch, futures
+
+
 def run_drive_ingest_once(
     db: Session,
     user_id: str,
@@ -378,36 +818,69 @@ def run_drive_ingest_once(
     page_token: Optional[str] = None,
     page_size: int = 50,
     force_reembed: bool = False,
+    save_cursor: bool = False,
 ) -> Dict[str, Any]:
     processed = embedded = errors = 0
     next_token = None
+    cursor_token = None
     listing_failed = False
     pending_progress = 0
-    metrics_dirty = False
+    new_failures: List[Dict[str, Any]] = []
+    metrics: Optional[Dict[str, Any]] = None
     batcher = EmbeddingBatcher(user_id)
 
     def flush_job_updates(force: bool = False) -> None:
-        nonlocal pending_progress, metrics_dirty
+        # Counters live in locals; the job row (and its metrics dict) is only
+        # updated here, every PROGRESS_FLUSH_INTERVAL files and at page end.
+        nonlocal pending_progress, metrics
         if not job:
             return
-        if not force and pending_progress <= 0 and not metrics_dirty:
+        if not force and pending_progress <= 0:
             return
         current = int(getattr(job, "processed_files", 0) or 0)
         if pending_progress:
             job.processed_files = current + pending_progress
-        metrics = dict(job.metrics or {}) if job.metrics else {}
+        if metrics is None:
+            # copied once per page, then updated in place on later flushes
+            metrics = dict(job.metrics or {})
+            if "failed_docs" in metrics:
+                metrics["failed_docs"] = list(metrics["failed_docs"] or [])
         metrics["embedded"] = embedded
         metrics["errors"] = errors
+        if new_failures:
+            failed_docs = metrics.setdefault("failed_docs", [])
+            failed_docs.extend(new_failures[: max(0, MAX_FAILED_DOCS - len(failed_docs))])
+            new_failures.clear()
         job.metrics = metrics
+        flag_modified(job, "metrics")
         job.updated_at = datetime.now(timezone.utc)
         pending_progress = 0
-        metrics_dirty = False
+
+    def record_batch_failure(exc: EmbeddingBatchError) -> None:
+        nonlocal errors
+        batcher.discard(exc.docs)
+        errors += len(exc.docs)
+        for failed in exc.docs:
+            log_event(
+                "drive_file_error",
+                user_id=user_id,
+                doc_id=failed.doc_id,
+                name=failed.file_meta.get("name"),
+                error=str(exc),
+            )
+            if job and len(new_failures) < MAX_FAILED_DOCS:
+                new_failures.append(
+                    {"doc_id": failed.doc_id, "name": failed.file_meta.get("name"), "error": str(exc)}
+                )
 
     try:
         with StageTimer("drive_list_page", user_id=user_id):
             listing = list_page(user_id=user_id, page_token=page_token, page_size=page_size)
         files: List[Dict[str, Any]] = list(listing.get("files", []) or [])
         next_token = listing.get("nextPageToken")
+        # A listing may persist a different cursor than the page it continues
+        # with (e.g. the changes token to resume from once a scan completes).
+        cursor_token = listing.get("cursorToken", next_token)
         if job:
             job.total_files = (job.total_files or 0) + len(files)
     except Exception as e:
@@ -419,7 +892,41 @@ def run_drive_ingest_once(
             db.commit()
         raise RuntimeError(f"Drive listing failed: {e}") from e
 
+    stored_rows = _load_rows(db, user_id, [f["id"] for f in files if f.get("id")])
+    candidates = _reingest_candidates(files, stored_rows, force_reembed)
+    # Download, parse and chunking run together on the pool threads, so the
+    # main thread only embeds and writes while the next files are being prepared.
+    # Workers never touch the session: stored hashes are read here up front.
+    load_text = partial(_load_text, fetch_file_bytes, parse_bytes)
+    stored_hashes = {
+        fid: row.content_hash
+        for fid, row in stored_rows.items()
+        if row is not None and fid in candidates and not force_reembed
+    }
+
+    def prepare(user_id: str, file_id: str, mime_type: Optional[str]):
+        return _prepare_doc(
+            load_text,
+            user_id=user_id,
+            file_id=file_id,
+            mime_type=mime_type,
+            file_meta=candidates[file_id],
+            stored_hash=stored_hashes.get(file_id),
+        )
+
+    prepare_prefetched, inflight = _prefetch_downloads(
+        db,
+        user_id,
+        files,
+        prepare,
+        force_reembed,
+        stored_rows,
+        candidates=candidates,
+    )
     try:
+        # One vector-store read for every changed file's existing chunk ids;
+        # issued after the first downloads are submitted so it overlaps them.
+        chunk_ids = vector.list_doc_chunk_ids_bulk(list(candidates), user_id=user_id) if len(candidates) > 1 else None
         for f in files:
             processed_delta = 0
             try:
@@ -431,6 +938,10 @@ def run_drive_ingest_once(
                         fetch_file_bytes=fetch_file_bytes,
                         parse_bytes=parse_bytes,
                         force_reembed=force_reembed,
+                        stored_rows=stored_rows,
+                        chunk_ids=chunk_ids,
+                        prepare_doc=prepare_prefetched,
+                        needs_fetch=f.get("id") in candidates,
                     )
                 processed_delta = summary.get("processed", 0)
                 processed += processed_delta
@@ -439,17 +950,10 @@ def run_drive_ingest_once(
                     try:
                         ready_docs = batcher.enqueue_doc(doc_work)
                     except EmbeddingBatchError as exc:
-                        errors += len(exc.docs)
-                        for failed in exc.docs:
-                            log_event(
-                                "drive_file_error",
-                                user_id=user_id,
-                                doc_id=failed.doc_id,
-                                name=failed.file_meta.get("name"),
-                                error=str(exc),
-                            )
-                        raise
-                    embedded += _finalize_ready_docs(db, user_id, ready_docs)
+                        # the failed docs are accounted for here, not by the per-file handler
+                        ready_docs = exc.ready_docs
+                        record_batch_failure(exc)
+                    embedded += _finalize_ready_docs(db, user_id, ready_docs, stored_rows)
                 else:
                     embedded += summary.get("embedded", 0)
             except Exception as exc:
@@ -461,42 +965,31 @@ def run_drive_ingest_once(
                     name=f.get("name"),
                     error=str(exc),
                 )
-                if job:
-                    metrics = dict(job.metrics or {}) if job.metrics else {}
-                    failed_docs = list(metrics.get("failed_docs") or [])
-                    if len(failed_docs) < 25:
-                        failed_docs.append({"doc_id": f.get("id"), "name": f.get("name"), "error": str(exc)})
-                    metrics["failed_docs"] = failed_docs
-                    job.metrics = metrics
-                    metrics_dirty = True
+                if job and len(new_failures) < MAX_FAILED_DOCS:
+                    new_failures.append({"doc_id": f.get("id"), "name": f.get("name"), "error": str(exc)})
 
             if job:
-                inc = processed_delta or 1
-                pending_progress += inc
-                metrics_dirty = True
+                pending_progress += processed_delta or 1
                 if pending_progress >= PROGRESS_FLUSH_INTERVAL:
                     flush_job_updates()
     except Exception:
         db.rollback()
         raise
+    finally:
+        for future in inflight.values():
+            future.cancel()
 
     try:
         ready_docs = batcher.flush(force=True)
     except EmbeddingBatchError as exc:
-        errors += len(exc.docs)
-        for failed in exc.docs:
-            log_event(
-                "drive_file_error",
-                user_id=user_id,
-                doc_id=failed.doc_id,
-                name=failed.file_meta.get("name"),
-                error=str(exc),
-            )
-        db.rollback()
-        raise
-    embedded += _finalize_ready_docs(db, user_id, ready_docs)
+        ready_docs = exc.ready_docs
+        record_batch_failure(exc)
+    embedded += _finalize_ready_docs(db, user_id, ready_docs, stored_rows)
 
     flush_job_updates(force=True)
+    if save_cursor and not errors:
+        # advance the cursor in the same commit as the page's rows
+        save_drive_cursor(db, user_id, cursor_token, commit=False, completed=not next_token)
     try:
         db.commit()
     except Exception:
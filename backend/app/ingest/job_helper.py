@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+import os
+import threading
+import time
+from collections import OrderedDict
+from copy import deepcopy
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Sequence
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+from sqlalchemy import bindparam
 from sqlalchemy.orm import Session
 from app.core.models import IngestionJob
 
@@ -19,6 +25,19 @@ ALLOWED_STATUSES: Sequence[str] = (
     "queued", "running", "succeeded", "failed", "partial"
 )
 ACTIVE_STATUSES: Sequence[str] = ("queued", "running")
+# Rendered inline (not as bind params) so the planner can match the
+# partial ix_job_active index predicate.
+_ACTIVE_STATUS_LITERALS = bindparam(
+    "active_statuses", list(ACTIVE_STATUSES), expanding=True, literal_execute=True
+)
+
+# Short-lived per-process cache for job status polling. Only finished jobs are
+# cached, so a queued/running job's progress and completion are read fresh;
+# writes made through this module also drop the entry.
+JOB_CACHE_TTL_SECONDS = float(os.getenv("JOB_CACHE_TTL_SECONDS", "2.0"))
+JOB_CACHE_SIZE = int(os.getenv("JOB_CACHE_SIZE", "10000"))
+_job_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_job_cache_lock = threading.Lock()
 
 def _validate_status(status: str) -> None:
     if status not in ALLOWED_STATUSES:
@@ -36,12 +55,12 @@ def _set_if_attr(obj: Any, name: str, value: Any) -> None:
 def _get_or_default(obj: Any, name: str, default: Any) -> Any:
     return getattr(obj, name) if hasattr(obj, name) else default
 
-def _append_log_to_job(job: IngestionJob, message: str) -> None:
+def _append_log_to_job(job: IngestionJob, message: str, now: Optional[datetime] = None) -> None:
     """
     Append a timestamped message to a 'logs' JSON/list column if present.
     If no 'logs' field on the model, fall back to embedding logs under metrics['logs'].
     """
-    ts = utcnow().isoformat()
+    ts = (now or utcnow()).isoformat()
     entry = {"ts": ts, "message": str(message)}
 
     if hasattr(job, "logs"):
@@ -98,6 +117,7 @@ def create_job(
     Any missing columns are ignored.
     """
     _validate_status(status)
+    now = utcnow()
 
     job = IngestionJob()  # type: ignore[call-arg]
 
@@ -110,8 +130,8 @@ def create_job(
     _set_if_attr(job, "processed_files", 0)
     _set_if_attr(job, "error_summary", None)
     _set_if_attr(job, "metrics", {})
-    _set_if_attr(job, "created_at", utcnow())
-    _set_if_attr(job, "updated_at", utcnow())
+    _set_if_attr(job, "created_at", now)
+    _set_if_attr(job, "updated_at", now)
     _set_if_attr(job, "started_at", None)
     _set_if_attr(job, "finished_at", None)
 
@@ -126,7 +146,7 @@ def create_job(
 def find_active_job(db: Session, user_id: str) -> Optional[Dict[str, Any]]:
     q = (
         db.query(IngestionJob)
-        .filter(IngestionJob.user_id == user_id, IngestionJob.status.in_(ACTIVE_STATUSES))  # type: ignore[attr-defined]
+        .filter(IngestionJob.user_id == user_id, IngestionJob.status.in_(_ACTIVE_STATUS_LITERALS))  # type: ignore[attr-defined]
         .order_by(IngestionJob.created_at.desc())  # type: ignore[attr-defined]
     )
     row = q.first()
@@ -160,6 +180,33 @@ def get_job(db: Session, job_id: str) -> Optional[Dict[str, Any]]:
         "finished_at": _get_or_default(job, "finished_at", None),
     }
 
+def get_job_cached(db: Session, job_id: str) -> Optional[Dict[str, Any]]:
+    """`get_job` for polling endpoints; finished jobs are served from the cache."""
+    now = time.monotonic()
+    with _job_cache_lock:
+        entry = _job_cache.get(job_id)
+        if entry is not None and entry[0] > now:
+            _job_cache.move_to_end(job_id)
+            return deepcopy(entry[1])
+    job = get_job(db, job_id)
+    if (
+        job is None
+        or job.get("status") in ACTIVE_STATUSES
+        or JOB_CACHE_SIZE <= 0
+        or JOB_CACHE_TTL_SECONDS <= 0
+    ):
+        return job
+    with _job_cache_lock:
+        _job_cache[job_id] = (now + JOB_CACHE_TTL_SECONDS, job)
+        _job_cache.move_to_end(job_id)
+        while len(_job_cache) > JOB_CACHE_SIZE:
+            _job_cache.popitem(last=False)
+    return deepcopy(job)
+
+def _forget_job(job_id: str) -> None:
+    with _job_cache_lock:
+        _job_cache.pop(job_id, None)
+
 def list_jobs(
     db: Session,
     *,
@@ -194,31 +241,46 @@ def mark_job_running(db: Session, job_id: str, total_files: int) -> None:
     job = db.get(IngestionJob, job_id)
     if not job:
         raise ValueError(f"IngestionJob {job_id} not found")
+    now = utcnow()
     _set_if_attr(job, "status", "running")
     _set_if_attr(job, "total_files", int(total_files or 0))
     if hasattr(job, "started_at") and _get_or_default(job, "started_at", None) is None:
-        _set_if_attr(job, "started_at", utcnow())
-    _set_if_attr(job, "updated_at", utcnow())
+        _set_if_attr(job, "started_at", now)
+    _set_if_attr(job, "updated_at", now)
     db.commit()
+    _forget_job(job_id)
 
-def bump_job_progress(db: Session, job_id: str, inc: int = 1, message: Optional[str] = None) -> None:
+def bump_job_progress(
+    db: Session,
+    job_id: str,
+    inc: int = 1,
+    message: Optional[str] = None,
+    total_files: Optional[int] = None,
+) -> None:
+    """Add progress (and optionally a new total) to a job in one commit."""
     job = db.get(IngestionJob, job_id)
     if not job:
         raise ValueError(f"IngestionJob {job_id} not found")
     current = int(_get_or_default(job, "processed_files", 0) or 0)
+    now = utcnow()
     _set_if_attr(job, "processed_files", current + int(inc or 0))
-    _set_if_attr(job, "updated_at", utcnow())
+    if total_files is not None:
+        _set_if_attr(job, "total_files", int(total_files))
+    _set_if_attr(job, "updated_at", now)
     if message:
-        _append_log_to_job(job, message)
+        _append_log_to_job(job, message, now)
     db.commit()
+    _forget_job(job_id)
 
 def append_job_log(db: Session, job_id: str, message: str) -> None:
     job = db.get(IngestionJob, job_id)
     if not job:
         raise ValueError(f"IngestionJob {job_id} not found")
-    _append_log_to_job(job, message)
-    _set_if_attr(job, "updated_at", utcnow())
+    now = utcnow()
+    _append_log_to_job(job, message, now)
+    _set_if_attr(job, "updated_at", now)
     db.commit()
+    _forget_job(job_id)
 
 
 def record_job_error(db: Session, job_id: str, message: str) -> None:
@@ -231,9 +293,11 @@ def record_job_error(db: Session, job_id: str, message: str) -> None:
     errors = int(metrics.get("errors") or 0)
     metrics["errors"] = errors + 1
     _set_if_attr(job, "metrics", dict(metrics))
-    _append_log_to_job(job, message)
-    _set_if_attr(job, "updated_at", utcnow())
+    now = utcnow()
+    _append_log_to_job(job, message, now)
+    _set_if_attr(job, "updated_at", now)
     db.commit()
+    _forget_job(job_id)
 
 def finish_job(
     db: Session,
@@ -258,8 +322,10 @@ def finish_job(
         merged.update(metrics)
         _set_if_attr(job, "metrics", merged)
 
-    _set_if_attr(job, "updated_at", utcnow())
+    now = utcnow()
+    _set_if_attr(job, "updated_at", now)
     if hasattr(job, "finished_at"):
-        _set_if_attr(job, "finished_at", utcnow())
+        _set_if_attr(job, "finished_at", now)
 
     db.commit()
+    _forget_job(job_id)
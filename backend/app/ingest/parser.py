@@ -1,10 +1,13 @@
 import io
 import csv
 import zipfile
-from typing import Union
+from typing import BinaryIO, Union
 from xml.etree import ElementTree as ET
 from pypdf import PdfReader
 
+# Bump when extracted text for the same bytes changes; md5-keyed content
+# hashes include it so a parser upgrade re-embeds binary files.
+PARSER_VERSION = 1
 
 DOCX_MIMES = {
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
@@ -17,22 +20,36 @@ CSV_MIMES = {
 }
 
 
-def to_text(content: Union[str, bytes], filename: str, mime: str | None = None) -> str:
+def to_text(content: Union[str, bytes, BinaryIO], filename: str, mime: str | None = None) -> str:
     if isinstance(content, str):
         return content
 
+    lower_name = (filename or "").lower()
+    is_pdf = lower_name.endswith(".pdf") or mime == "application/pdf"
+    is_docx = mime in DOCX_MIMES or lower_name.endswith(".docx")
+
+    if hasattr(content, "read"):
+        # File handles (e.g. spooled Drive downloads) go straight to the PDF/DOCX
+        # readers without materializing the whole payload as bytes first.
+        try:
+            if is_pdf:
+                return _pdf_to_text(content)
+            if is_docx:
+                return _docx_to_text(content)
+            content = content.read()
+        except Exception:
+            return ""
+
     if not isinstance(content, (bytes, bytearray)):
         return ""
 
     data = bytes(content)
-    lower_name = (filename or "").lower()
 
     try:
-        if lower_name.endswith(".pdf") or mime == "application/pdf":
-            reader = PdfReader(io.BytesIO(data))
-            return "\n".join((page.extract_text() or "") for page in reader.pages)
+        if is_pdf:
+            return _pdf_to_text(data)
 
-        if mime in DOCX_MIMES or lower_name.endswith(".docx"):
+        if is_docx:
             return _docx_to_text(data)
 
         if mime in CSV_MIMES or lower_name.endswith(('.csv', '.tsv')):
@@ -47,9 +64,18 @@ def to_text(content: Union[str, bytes], filename: str, mime: str | None = None)
         return ""
 
 
-def _docx_to_text(data: bytes) -> str:
+def _as_stream(data: Union[bytes, BinaryIO]) -> BinaryIO:
+    return io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+
+
+def _pdf_to_text(data: Union[bytes, BinaryIO]) -> str:
+    reader = PdfReader(_as_stream(data))
+    return "\n".join((page.extract_text() or "") for page in reader.pages)
+
+
+def _docx_to_text(data: Union[bytes, BinaryIO]) -> str:
     try:
-        with zipfile.ZipFile(io.BytesIO(data)) as doc:
+        with zipfile.ZipFile(_as_stream(data)) as doc:
             xml = doc.read("word/document.xml")
     except Exception:
         return ""
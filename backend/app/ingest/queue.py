@@ -1,9 +1,10 @@
 import os
 import socket
+import threading
 import time
 from typing import Any, Dict, Optional
 
-from redis import Redis, from_url
+from redis import ConnectionPool, Redis
 from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
 from rq import Queue, Retry, get_current_job
 
@@ -13,15 +14,25 @@ from app.core.logging_utils import log_event
 
 
 _redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-_redis_conn: Optional[Redis] = None
-try:
-    candidate = from_url(_redis_url)
-    candidate.ping()
-    _redis_conn = candidate
-except Exception:
-    _redis_conn = None
-
-INGEST_QUEUE = Queue("ingest", connection=_redis_conn) if _redis_conn else None
+REDIS_MAX_CONNECTIONS = int(os.getenv("INGEST_REDIS_MAX_CONNECTIONS", "16"))
+# While Redis is unreachable, re-ping at most this often instead of on every request.
+QUEUE_RECHECK_SECONDS = float(os.getenv("INGEST_QUEUE_RECHECK_SECONDS", "30"))
+
+# Pooled keepalive connections: enqueues reuse a warm socket, and a dropped
+# one is health-checked and reconnected instead of failing the request.
+_redis_pool = ConnectionPool.from_url(
+    _redis_url,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    socket_keepalive=True,
+    socket_timeout=2,
+    socket_connect_timeout=2,
+    health_check_interval=30,
+    retry_on_timeout=True,
+)
+_redis_conn = Redis(connection_pool=_redis_pool)
+_queue: Optional[Queue] = None
+_queue_retry_at = 0.0
+_queue_lock = threading.Lock()
 RETRY_POLICY = Retry(max=3, interval=[10, 60])
 TRANSIENT_STATUSES = {429, 500, 502, 503, 504}
 PROGRESS_FLUSH_INTERVAL = max(1, int(os.getenv("INGEST_PROGRESS_FLUSH_INTERVAL", "10")))
@@ -79,28 +90,37 @@ def _run_ingest(job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         last_reported = 0
         latest_done = 0
         last_known_total: Optional[int] = None
+        pending_total: Optional[int] = None
         pending_logs: list[str] = []
 
         def flush_progress(force: bool = False) -> None:
-            nonlocal last_reported
-            if not pending_logs and latest_done - last_reported <= 0 and not force:
+            nonlocal last_reported, pending_total
+            if not pending_logs and latest_done - last_reported <= 0 and pending_total is None and not force:
                 return
             increment = max(0, latest_done - last_reported)
             message = "\n".join(pending_logs) if pending_logs else None
-            if increment <= 0 and not message:
+            if increment <= 0 and not message and pending_total is None:
                 return
-            job_helper.bump_job_progress(db, job_id, inc=increment or 0, message=message)
+            job_helper.bump_job_progress(
+                db, job_id, inc=increment or 0, message=message, total_files=pending_total
+            )
             pending_logs.clear()
+            pending_total = None
             if increment:
                 last_reported = latest_done
 
         def on_progress(done: int, total: Optional[int], msg: str = "") -> None:
-            nonlocal latest_done, last_known_total
-            if total is not None:
+            nonlocal latest_done, last_known_total, pending_total
+            # the total repeats on every file; only a new value needs work
+            if total is not None and total != last_known_total:
                 total_val = max(0, int(total or 0))
-                if last_known_total != total_val:
+                if last_known_total is None:
+                    # first total: write it now so the job shows a denominator
                     job_helper.mark_job_running(db, job_id, total_files=total_val)
-                    last_known_total = total_val
+                elif last_known_total != total_val:
+                    # later totals (one per listed page) ride along with the next progress flush
+                    pending_total = total_val
+                last_known_total = total_val
             done_val = max(0, int(done or 0))
             if done_val > latest_done:
                 latest_done = done_val
@@ -143,10 +163,13 @@ def _run_ingest(job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         )
         return result
     except Exception as exc:  # pragma: no cover
+        # a failed flush leaves the session unusable until it is rolled back,
+        # which would also make the job bookkeeping below raise
+        db.rollback()
         try:
             flush_progress(force=True)
         except Exception:
-            pass
+            db.rollback()
         summary = _format_error(exc)
         duration_ms = round((time.perf_counter() - timing_start) * 1000, 3)
         if _is_transient_error(exc):
@@ -181,10 +204,32 @@ def _run_ingest(job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         db.close()
 
 
+def _ingest_queue() -> Optional[Queue]:
+    """The RQ queue once Redis has answered a ping; None while it is unreachable."""
+    global _queue, _queue_retry_at
+    if _queue is not None:
+        return _queue
+    with _queue_lock:
+        if _queue is not None:
+            return _queue
+        now = time.monotonic()
+        if now < _queue_retry_at:
+            return None
+        try:
+            _redis_conn.ping()
+        except Exception as exc:
+            _queue_retry_at = now + QUEUE_RECHECK_SECONDS
+            log_event("ingest_queue_unavailable", backend="redis", error=str(exc), level="warning")
+            return None
+        _queue = Queue("ingest", connection=_redis_conn)
+        return _queue
+
+
 def enqueue_drive_job(job_id: str, payload: Dict[str, Any]) -> str:
-    if INGEST_QUEUE is None:
+    queue = _ingest_queue()
+    if queue is None:
         raise RuntimeError("ingest queue is not available")
-    job = INGEST_QUEUE.enqueue(
+    job = queue.enqueue(
         _run_ingest,
         job_id,
         payload,
@@ -195,7 +240,7 @@ def enqueue_drive_job(job_id: str, payload: Dict[str, Any]) -> str:
 
 
 def queue_enabled() -> bool:
-    return INGEST_QUEUE is not None
+    return _ingest_queue() is not None
 
 
 def _format_error(exc: Exception) -> str:
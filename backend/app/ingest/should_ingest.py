@@ -1,45 +1,76 @@
 from __future__ import annotations
-from datetime import datetime, timezone
+import re
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Mapping, Any
 from app.core.models import ContentIndex
-from app.ingest.text_normalize import compute_content_hash
+from app.ingest.parser import PARSER_VERSION
+from app.ingest.text_normalize import NORMALIZER_VERSION, compute_content_hash
+
+try:
+    import ciso8601
+except ImportError:  # pragma: no cover - optional C accelerator
+    ciso8601 = None
+
+
+_ISO_RE = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})"
+    r"(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:[.,](\d+))?)?)?"
+    r"(Z|[+-]\d{2}:?\d{2})?\Z"
+)
+
 
 def _to_dt(val: Optional[str | datetime]) -> Optional[datetime]:
-    if val is None:
+    if not val:
         return None
     if isinstance(val, datetime):
         return val
     s = str(val).strip()
-
-
-    if s.endswith("Z"):
-        s = s[:-1] + "+00:00"
+    if ciso8601 is not None:
+        try:
+            parsed = ciso8601.parse_datetime(s)
+        except ValueError:
+            return _parse_iso_fallback(s)
+        if parsed.tzinfo is None and len(s) == 10:
+            return parsed.replace(tzinfo=timezone.utc)
+        return parsed
+    return _parse_iso_fallback(s)
+
+
+def _parse_iso_fallback(s: str) -> Optional[datetime]:
+    """One-pass ISO 8601 parse for when ciso8601 is missing or rejects the value."""
+    m = _ISO_RE.match(s)
+    if m is None:
+        return None
+    year, month, day, hour, minute, second, frac, offset = m.groups()
+    if offset is None:
+        # bare dates are Drive day stamps in UTC; bare datetimes stay naive
+        tz = timezone.utc if hour is None else None
+    elif offset == "Z":
+        tz = timezone.utc
     else:
-
-        if len(s) >= 5 and (s[-5] in "+-") and s[-3] != ":":
-            s = s[:-2] + ":" + s[-2:]
-
-
-    if "T" in s:
-        date_part, time_part = s.split("T", 1)
-        frac_idx = time_part.find(".")
-        if frac_idx != -1:
-            tz_idx = max(time_part.find("+", frac_idx), time_part.find("-", frac_idx))
-            if tz_idx == -1:
-                tz_idx = len(time_part)
-            frac = time_part[frac_idx + 1 : tz_idx]
-            if len(frac) > 6:
-                time_part = time_part[: frac_idx + 1] + frac[:6] + time_part[tz_idx:]
-        s = date_part + "T" + time_part
-
+        sign = -1 if offset[0] == "-" else 1
+        digits = offset[1:].replace(":", "")
+        tz = timezone(sign * timedelta(hours=int(digits[:2]), minutes=int(digits[2:])))
     try:
-
-        if "T" not in s and len(s) == 10:
-            return datetime.fromisoformat(s).replace(tzinfo=timezone.utc)
-        return datetime.fromisoformat(s)
-    except Exception:
+        return datetime(
+            int(year),
+            int(month),
+            int(day),
+            int(hour or 0),
+            int(minute or 0),
+            int(second or 0),
+            int((frac or "")[:6].ljust(6, "0")),
+            tzinfo=tz,
+        )
+    except ValueError:
         return None
 
+def md5_content_hash(md5: str) -> str:
+    """Content hash of a file Drive reports an md5 for: its bytes plus the
+    parser/normalizer versions that turn them into text."""
+    return f"md5:{md5}:pv{PARSER_VERSION}:nv{NORMALIZER_VERSION}"
+
+
 def should_reingest(
     stored: Optional[ContentIndex],
     incoming_meta: Mapping[str, Any],
@@ -52,6 +83,16 @@ def should_reingest(
     if incoming_trashed != bool(stored.is_trashed):
         return True
 
+    # Drive only reports md5Checksum for binary files; when both sides have one
+    # it is authoritative, so renames/touches (new version/modifiedTime) with
+    # identical bytes don't trigger a download. The stored hash is keyed on it
+    # too, so a parser/normalizer bump still re-ingests.
+    inc_md5 = incoming_meta.get("md5Checksum") or incoming_meta.get("md5")
+    if inc_md5 and stored.md5:
+        if inc_md5 != stored.md5:
+            return True
+        return stored.content_hash != md5_content_hash(inc_md5)
+
     inc_mod = _to_dt(
         incoming_meta.get("modifiedTime") or incoming_meta.get("modified_time") or incoming_meta.get("updated")
     )
@@ -59,6 +100,13 @@ def should_reingest(
 
         if not stored.modified_time or inc_mod > stored.modified_time:
             return True
+        # Without an md5, an unchanged timestamp plus an unchanged byte size is
+        # the best content signal Drive gives; a version/etag bump on its own
+        # is then a metadata edit (sharing, comments) and needs no download.
+        inc_size = incoming_meta.get("size")
+        if inc_size is not None and stored.size_bytes is not None and stored.content_hash:
+            if str(inc_size) == str(stored.size_bytes):
+                return new_text is not None and compute_content_hash(new_text) != stored.content_hash
 
     inc_ver = incoming_meta.get("version")
     if inc_ver and inc_ver != (stored.version or ""):
@@ -3,26 +3,42 @@ import re
 import unicodedata
 from typing import Optional
 
-_CRLF = re.compile(r"\r\n?")
-_WHITESPACE_RUN = re.compile(r"[ \t]+")
+_ZERO_WIDTH = ("\u200B", "\u200C", "\u200D", "\uFEFF")
+# Only runs that actually change: a lone space is left alone, so ordinary
+# prose produces no matches at all.
+_WHITESPACE_RUN = re.compile(r"\t[ \t]*| [ \t]+")
 _BLANK_LINES = re.compile(r"\n{3,}")
-_TRAILING_WS = re.compile(r"[ \t]+\n")
-_ZERO_WIDTH = re.compile(r"[\u200B-\u200D\uFEFF]")
+
+# sha256_text encodes in slices of this many characters so hashing a large
+# document never holds a second full-size UTF-8 copy of it.
+_HASH_SLICE_CHARS = 1 << 20
+
+# Bump whenever normalize_text output changes for the same input.
+NORMALIZER_VERSION = 1
 
 def normalize_text(txt: Optional[str]) -> str:
     if not txt:
         return ""
-    txt = unicodedata.normalize("NFC", txt)
-    txt = _CRLF.sub("\n", txt)
-    txt = txt.replace("\u00A0", " ")
-    txt = _ZERO_WIDTH.sub("", txt)
+    if not unicodedata.is_normalized("NFC", txt):
+        txt = unicodedata.normalize("NFC", txt)
+    # plain str.replace is a fast scan that returns the input untouched when
+    # there is nothing to do; str.translate is slow on non-ASCII text
+    txt = txt.replace("\r\n", "\n").replace("\r", "\n").replace("\u00A0", " ")
+    for ch in _ZERO_WIDTH:
+        txt = txt.replace(ch, "")
     txt = _WHITESPACE_RUN.sub(" ", txt)
-    txt = _TRAILING_WS.sub("\n", txt)
+    # runs are single spaces by now, so trailing whitespace is just " \n"
+    txt = txt.replace(" \n", "\n")
     txt = _BLANK_LINES.sub("\n\n", txt)
     return txt.strip()
 
 def sha256_text(txt: str) -> str:
-    return hashlib.sha256(txt.encode("utf-8")).hexdigest()
+    if len(txt) <= _HASH_SLICE_CHARS:
+        return hashlib.sha256(txt.encode("utf-8")).hexdigest()
+    h = hashlib.sha256()
+    for start in range(0, len(txt), _HASH_SLICE_CHARS):
+        h.update(txt[start:start + _HASH_SLICE_CHARS].encode("utf-8"))
+    return h.hexdigest()
 
 def compute_content_hash(raw_text: Optional[str]) -> str:
     return sha256_text(normalize_text(raw_text or ""))
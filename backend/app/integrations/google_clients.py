@@ -1,4 +1,7 @@
 import os
+from functools import lru_cache
+from typing import Any, Dict
+
 from google_auth_oauthlib.flow import Flow
 
 SCOPES = [
@@ -9,16 +12,18 @@ SCOPES = [
     "https://www.googleapis.com/auth/calendar.readonly",
 ]
 
+
+@lru_cache(maxsize=1)
+def _client_config() -> Dict[str, Any]:
+    return {
+        "client_id": os.getenv("GOOGLE_CLIENT_ID"),
+        "client_secret": os.getenv("GOOGLE_CLIENT_SECRET"),
+        "redirect_uris": [os.getenv("OAUTH_REDIRECT_URI")],
+        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+        "token_uri": "https://oauth2.googleapis.com/token",
+    }
+
+
 def build_flow():
-    return Flow.from_client_config(
-        {
-            "web": {
-                "client_id": os.getenv("GOOGLE_CLIENT_ID"),
-                "client_secret": os.getenv("GOOGLE_CLIENT_SECRET"),
-                "redirect_uris": [os.getenv("OAUTH_REDIRECT_URI")],
-                "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                "token_uri": "https://oauth2.googleapis.com/token",
-            }
-        },
-        scopes=SCOPES,
-    )
+    # fresh outer dict per flow so nothing mutable is shared across requests
+    return Flow.from_client_config({"web": dict(_client_config())}, scopes=SCOPES)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 import re
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, List, Tuple, Optional
 
 
 
@@ -258,3 +258,31 @@ def chunk_text(
         })
     return out
 
+
+def chunk_text_batch(
+    items: Iterable[Tuple[str, Dict]],
+    target_tokens: int = 350,
+    overlap_tokens: int = 80,
+    sentence_level: bool = True,
+) -> List[Dict]:
+    """
+    Chunk many short documents (e.g. calendar events) in one call.
+
+    Texts that already fit in `target_tokens` become a single chunk without
+    going through section/sentence splitting; longer ones use `chunk_text`.
+    """
+    out: List[Dict] = []
+    for text, meta in items:
+        norm = _normalize(text)
+        if not norm:
+            continue
+        n_tokens = _count_tokens(norm)
+        if n_tokens > target_tokens:
+            out.extend(chunk_text(norm, meta, target_tokens, overlap_tokens, sentence_level))
+            continue
+        out.append({
+            "id": f"{meta.get('id', 'doc')}:0",
+            "text": norm,
+            "meta": {**meta, "chunk_index": 0, "n_tokens": n_tokens},
+        })
+    return out
@@ -350,6 +350,28 @@ def list_doc_chunk_ids(doc_id: str, user_id: Optional[str] = None) -> List[str]:
     return list(ids)
 
 
+def list_doc_chunk_ids_bulk(doc_ids: List[str], user_id: Optional[str] = None) -> Dict[str, List[str]]:
+    """Chunk ids for many documents in one collection read: {doc_id: [chunk_id, ...]}."""
+    found: Dict[str, List[str]] = {doc_id: [] for doc_id in doc_ids}
+    if not found:
+        return found
+    try:
+        col = _col(user_id=user_id)
+    except VectorStoreReset:
+        return found
+    try:
+        res: GetResult = col.get(where={"doc_id": {"$in": list(found)}}, include=["metadatas"])
+    except Exception as exc:
+        # empty map: callers fall back to per-document lookups
+        log.error("[vector] list_doc_chunk_ids_bulk failed: %s", exc)
+        return {}
+    for chunk_id, meta in zip(res.get("ids") or [], res.get("metadatas") or []):
+        doc_id = (meta or {}).get("doc_id")
+        if doc_id in found:
+            found[doc_id].append(chunk_id)
+    return found
+
+
 def delete_ids(ids: List[str], user_id: Optional[str] = None) -> int:
     if not ids:
         return 0
@@ -377,7 +399,8 @@ def reset_collection(user_id: Optional[str] = None, name: Optional[str] = None)
     key = _collection_key(user_id, name)
     with _chroma_lock:
         _db().delete_collection(key)
-        _db().get_or_create_collection(key)
+        # the cached handle points at the dropped collection
+        _collection_cache[key] = _db().get_or_create_collection(key)
         try:
             _db().persist()
         except Exception:
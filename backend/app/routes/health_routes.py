@@ -1,9 +1,11 @@
 import os
+from typing import Optional
 
+import anyio
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 from sqlalchemy import text
-from redis import from_url
+from redis import Redis, from_url
 from redis.exceptions import RedisError
 
 from app.core.db import SessionLocal
@@ -15,31 +17,59 @@ router = APIRouter(tags=["health"])
 APP_VERSION = os.getenv("APP_VERSION") or os.getenv("GIT_SHA") or "dev"
 
 
-@router.get("/healthz")
-def healthz():
-    status = {
-        "db": "ok",
-        "redis": "ok",
-        "openai": "configured" if os.getenv("OPENAI_API_KEY") else "missing",
-    }
-    http_status = 200
+_redis: Optional[Redis] = None
+
 
+def _redis_client() -> Redis:
+    # one pooled client per process; probes must not pay a TCP connect each
+    global _redis
+    if _redis is None:
+        _redis = from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5,
+            health_check_interval=30,
+        )
+    return _redis
+
+
+def _check_db() -> bool:
     try:
         with SessionLocal() as session:
             session.execute(text("SELECT 1"))
+        return True
     except Exception as exc:
-        status["db"] = "error"
-        http_status = 503
         log_event("healthz_db_error", error=str(exc), level="error")
+        return False
 
-    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+def _check_redis() -> bool:
     try:
-        client = from_url(redis_url)
-        client.ping()
+        _redis_client().ping()
+        return True
     except RedisError as exc:
-        status["redis"] = "error"
-        http_status = 503
         log_event("healthz_redis_error", error=str(exc), level="error")
+        return False
+
+
+@router.get("/healthz")
+async def healthz():
+    results = {}
+
+    async def run_check(name, check):
+        results[name] = await anyio.to_thread.run_sync(check)
+
+    # both checks block, so run them side by side on the worker threadpool
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(run_check, "db", _check_db)
+        tg.start_soon(run_check, "redis", _check_redis)
+
+    status = {
+        "db": "ok" if results["db"] else "error",
+        "redis": "ok" if results["redis"] else "error",
+        "openai": "configured" if os.getenv("OPENAI_API_KEY") else "missing",
+    }
+    http_status = 200 if results["db"] and results["redis"] else 503
 
     payload = {
         "status": "ok" if http_status == 200 else "degraded",
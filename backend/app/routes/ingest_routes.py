@@ -1,19 +1,16 @@
 from __future__ import annotations
 
-from typing import Optional, Callable, Protocol
-import inspect
-import os
-import time
+from datetime import datetime
+from typing import Any, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Depends as FastAPIDepends
-from pydantic import BaseModel
+from pydantic import BaseModel, field_serializer
 
 
 try:
-    from app.core.db import get_db, SessionLocal  # type: ignore
+    from app.core.db import get_db  # type: ignore
 except Exception:  # pragma: no cover
     get_db = None
-    SessionLocal = None
 
 from sqlalchemy.orm import Session
 
@@ -24,59 +21,8 @@ from app.core.runtime import ensure_writes_enabled
 from app.core.auth import csrf_protect, get_current_user
 from app.core.logging_utils import log_event
 
-PROGRESS_FLUSH_INTERVAL = max(1, int(os.getenv("INGEST_PROGRESS_FLUSH_INTERVAL", "10")))
-
-
-class DriveIngestCallable(Protocol):
-    def __call__(
-        self,
-        user_id: str,
-        name_filter: Optional[str] = None,
-        max_files: Optional[int] = None,
-        reembed_all: bool = False,
-        on_progress: Optional[Callable[[int, int, str], None]] = None,
-    ) -> None: ...
-
-
-def _fallback_ingest(
-    user_id: str,
-    name_filter: Optional[str] = None,
-    max_files: Optional[int] = None,
-    reembed_all: bool = False,
-    on_progress: Optional[Callable[[int, int, str], None]] = None,
-) -> None:
-    """Fallback shim that simulates work so the API remains callable."""
-    total = int(max_files or 3)
-    for i in range(1, total + 1):
-        if on_progress:
-            on_progress(i, total, f"processed demo_file_{i}")
-
-
-def _load_drive_ingest_callable() -> DriveIngestCallable:
-    try:
-        from app.ingest import drive_ingest as drive_mod  # type: ignore
-    except Exception:  # pragma: no cover
-        return _fallback_ingest
-
-    candidate = getattr(drive_mod, "ingest_drive", None)
-    if not callable(candidate):
-        return _fallback_ingest
-
-    try:
-        sig = inspect.signature(candidate)
-        required = ["user_id", "name_filter", "max_files", "reembed_all", "on_progress"]
-        if all(name in sig.parameters for name in required):
-            return candidate  # type: ignore[return-value]
-    except (TypeError, ValueError):
-        pass
-
-    return _fallback_ingest
-
-
-INGEST_DRIVE_CALLABLE: DriveIngestCallable = _load_drive_ingest_callable()
 try:
-    from app.ingest import drive_ingest as drive_ingest_module  # type: ignore
-    ENSURE_DRIVE_SESSION = getattr(drive_ingest_module, "ensure_drive_session", None)
+    from app.ingest.drive_ingest import ensure_drive_session as ENSURE_DRIVE_SESSION  # type: ignore
 except Exception:  # pragma: no cover
     ENSURE_DRIVE_SESSION = None
 
@@ -91,6 +37,30 @@ class DriveStartBody(BaseModel):
     reembed_all: bool = False
 
 
+class IngestJobOut(BaseModel):
+    """Shape of job_helper.get_job; as a response model FastAPI serializes it straight to JSON bytes."""
+
+    job_id: Optional[str] = None
+    user_id: Optional[str] = None
+    kind: Optional[str] = None
+    payload: Any = None
+    status: Optional[str] = None
+    total_files: Optional[int] = None
+    processed_files: Optional[int] = None
+    error_summary: Optional[str] = None
+    metrics: Any = None
+    logs: Any = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @field_serializer("created_at", "updated_at", "started_at", "finished_at")
+    def _isoformat(self, value: Optional[datetime]) -> Optional[str]:
+        # same strings as before the response model ("+00:00", not pydantic's "Z")
+        return value.isoformat() if value is not None else None
+
+
 
 if get_db is None:
     def _db_dependency():
@@ -102,17 +72,6 @@ else:
     _db_dependency = get_db
 
 
-def _bg_db_session() -> Session:
-    """
-    Creates a DB session for background tasks.
-    Requires SessionLocal to be available.
-    """
-    if SessionLocal is None:
-        raise RuntimeError("SessionLocal is not configured; cannot run background job.")
-    return SessionLocal()
-
-
-
 @router.post("/drive/start")
 def start_drive_ingest(
     body: DriveStartBody,
@@ -121,8 +80,10 @@ def start_drive_ingest(
     _csrf=Depends(csrf_protect),
 ):
     """
-    Creates a new Drive ingestion job and schedules it to run in the background.
+    Creates a new Drive ingestion job and enqueues it for the ingest workers.
     Returns a job_id immediately; poll /ingest/jobs/{job_id} to monitor progress.
+    Drive ingest never runs in the API process: without a reachable queue the
+    request fails with 503.
     """
     if ENSURE_DRIVE_SESSION:
         try:
@@ -143,6 +104,11 @@ def start_drive_ingest(
         }
 
     ensure_writes_enabled()
+    if not ingest_queue.queue_enabled():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="ingest queue is unavailable; try again shortly",
+        )
     check_ingest_quota(user.user_id)
 
     job_id = job_helper.create_job(
@@ -165,25 +131,26 @@ def start_drive_ingest(
         "max_files": body.max_files,
         "reembed_all": body.reembed_all,
     }
-    response = {"job_id": job_id, "status": "queued", "queue_job_id": None, "existing": False}
-    if ingest_queue.queue_enabled():
+    try:
         rq_id = ingest_queue.enqueue_drive_job(job_id, payload=payload)
-        response["queue_job_id"] = rq_id
-        return response
-    _run_drive_job(job_id)
-    latest = job_helper.get_job(db, job_id)
-    if latest:
-        response["status"] = latest["status"]
-    return response
+    except Exception as exc:
+        # don't leave a queued row behind that find_active_job would keep returning
+        job_helper.finish_job(db, job_id, status="failed", error_summary=f"enqueue failed: {exc}")
+        log_event("ingest_enqueue_failed", job_id=job_id, user_id=user.user_id, error=str(exc), level="error")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="ingest queue is unavailable; try again shortly",
+        )
+    return {"job_id": job_id, "status": "queued", "queue_job_id": rq_id, "existing": False}
 
 
-@router.get("/jobs/{job_id}")
+@router.get("/jobs/{job_id}", response_model=IngestJobOut)
 def get_job(job_id: str, user=Depends(get_current_user), db: Session = Depends(_db_dependency)):
     """
     Returns the current status and metadata for a single ingestion job.
     Enforces that the job belongs to the current user.
     """
-    job = job_helper.get_job(db, job_id)
+    job = job_helper.get_job_cached(db, job_id)
     if not job:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="job not found")
     owner = (job.get("user_id") or job.get("payload", {}).get("user_id"))
@@ -192,131 +159,9 @@ def get_job(job_id: str, user=Depends(get_current_user), db: Session = Depends(_
     return job
 
 
-@router.get("/jobs")
+@router.get("/jobs", response_model=List[IngestJobOut])
 def list_jobs(user=Depends(get_current_user), db: Session = Depends(_db_dependency)):
     """
     Lists recent ingestion jobs for the current user, newest first.
     """
     return job_helper.list_jobs(db, user_id=user.user_id, kind=None, limit=50, offset=0)
-
-
-
-def _run_drive_job(job_id: str) -> None:
-    """
-    Background worker that executes a Drive ingestion job:
-    - marks job running
-    - calls ingest_drive with an on_progress callback
-    - finishes the job with succeeded/failed
-    Uses its own DB session independent of the request.
-    """
-    db = _bg_db_session()
-    start_time = time.perf_counter()
-    user_id = None
-    try:
-        job = job_helper.get_job(db, job_id)
-        if not job:
-            log_event("ingest_job_missing", job_id=job_id, mode="inline", level="warning")
-            return
-
-        payload = job.get("payload") or {}
-        user_id = payload.get("user_id")
-        if not user_id:
-            job_helper.finish_job(db, job_id, status="failed", error_summary="missing user_id in job payload")
-            _log_inline_failure(job_id, user_id, start_time, "missing user_id in job payload")
-            return
-
-        log_event(
-            "ingest_job_start",
-            job_id=job_id,
-            user_id=user_id,
-            attempt=1,
-            max_attempts=1,
-            mode="inline",
-        )
-        job_helper.mark_job_running(db, job_id, total_files=0)
-
-        ingest_callable = INGEST_DRIVE_CALLABLE
-        last_reported = 0
-        latest_done = 0
-        pending_logs: list[str] = []
-
-        def flush_progress(force: bool = False) -> None:
-            nonlocal last_reported
-            if not pending_logs and latest_done - last_reported <= 0 and not force:
-                return
-            increment = max(0, latest_done - last_reported)
-            message = "\n".join(pending_logs) if pending_logs else None
-            if increment <= 0 and not message:
-                return
-            job_helper.bump_job_progress(db, job_id, inc=increment or 0, message=message)
-            pending_logs.clear()
-            if increment:
-                last_reported = latest_done
-
-        def on_progress(done: int, total: int, msg: str = ""):
-            if total is not None and total >= 0:
-                job_helper.mark_job_running(db, job_id, total_files=int(total))
-
-            nonlocal latest_done
-            done_val = max(0, int(done or 0))
-            if done_val > latest_done:
-                latest_done = done_val
-            if msg:
-                pending_logs.append(msg)
-            if latest_done - last_reported >= PROGRESS_FLUSH_INTERVAL:
-                flush_progress()
-
-        try:
-            result = ingest_callable(
-                user_id=user_id,
-                name_filter=payload.get("query"),
-                max_files=payload.get("max_files"),
-                reembed_all=payload.get("reembed_all", False),
-                on_progress=on_progress,
-            )
-        except NotImplementedError as err:
-            job_helper.finish_job(db, job_id, status="failed", error_summary=str(err))
-            _log_inline_failure(job_id, user_id, start_time, str(err))
-            return
-        flush_progress(force=True)
-        errors = int((result or {}).get("errors") or 0)
-        if errors:
-            summary = f"Ingest completed with {errors} error(s)."
-            job_helper.finish_job(db, job_id, status="failed", error_summary=summary, metrics=result)
-            _log_inline_failure(job_id, user_id, start_time, summary)
-            return
-
-        job_helper.finish_job(db, job_id, status="succeeded", metrics=result)
-        duration_ms = round((time.perf_counter() - start_time) * 1000, 3)
-        log_event(
-            "ingest_job_completed",
-            job_id=job_id,
-            user_id=user_id,
-            status="succeeded",
-            duration_ms=duration_ms,
-            mode="inline",
-        )
-
-    except Exception as e:  # pragma: no cover
-        try:
-            job_helper.finish_job(db, job_id, status="failed", error_summary=str(e))
-        except Exception:
-            pass
-        _log_inline_failure(job_id, user_id, start_time, str(e))
-        raise
-    finally:
-        db.close()
-
-
-def _log_inline_failure(job_id: str, user_id: Optional[str], start_time: float, error: str) -> None:
-    duration_ms = round((time.perf_counter() - start_time) * 1000, 3)
-    log_event(
-        "ingest_job_failed",
-        job_id=job_id,
-        user_id=user_id,
-        status="failed",
-        duration_ms=duration_ms,
-        error=error,
-        mode="inline",
-        level="error",
-    )
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from uuid import uuid4
 from sqlalchemy.orm import Session
 
-from app.core.db import get_db
+from app.core.db import get_db, get_read_db
 from app.core.models import IngestionJob
 from app.core.auth import csrf_protect, get_current_user
 
@@ -30,7 +30,7 @@ def start_ingest(
     return {"job_id": job_id, "status": "queued"}
 
 @router.get("/{job_id}")
-def get_job(job_id: str, user=Depends(get_current_user), db: Session = Depends(get_db)):
+def get_job(job_id: str, user=Depends(get_current_user), db: Session = Depends(get_read_db)):
     """
     Return the current status and metrics for a given job.
     """
@@ -6,6 +6,11 @@ from redis.exceptions import RedisError
 import app.routes.health_routes as health_module
 
 
+@pytest.fixture(autouse=True)
+def _fresh_redis_client(monkeypatch):
+    monkeypatch.setattr(health_module, "_redis", None)
+
+
 @pytest.mark.asyncio
 async def test_healthz_ok(api_client, monkeypatch):
     class FakeRedis:
@@ -63,3 +68,24 @@ async def test_healthz_redis_error(api_client, monkeypatch):
     assert data["status"] == "degraded"
     assert data["checks"]["redis"] == "error"
     assert data["checks"]["db"] == "ok"
+
+
+@pytest.mark.asyncio
+async def test_healthz_reuses_redis_client(api_client, monkeypatch):
+    created = []
+
+    class FakeRedis:
+        def ping(self):
+            return True
+
+    def fake_from_url(*args, **kwargs):
+        created.append(kwargs)
+        return FakeRedis()
+
+    monkeypatch.setattr(health_module, "from_url", fake_from_url)
+
+    for _ in range(3):
+        resp = await api_client.get("/healthz")
+        assert resp.status_code == 200
+    assert len(created) == 1
+    assert created[0]["socket_timeout"] == 0.5
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import pytest
+from anyio import to_thread
+
+from app.api import main as main_module
+
+
+@pytest.mark.asyncio
+async def test_lifespan_sizes_threadpool_to_db_pool(monkeypatch):
+    monkeypatch.setattr(main_module, "API_THREADPOOL_SIZE", 7)
+    monkeypatch.setattr(main_module.session_touch, "flush", lambda: None)
+    limiter = to_thread.current_default_thread_limiter()
+    original = limiter.total_tokens
+    try:
+        async with main_module.lifespan(main_module.create_app()):
+            assert limiter.total_tokens == 7
+    finally:
+        limiter.total_tokens = original
+
+
+@pytest.mark.asyncio
+async def test_lifespan_closes_userinfo_client(monkeypatch):
+    import httpx
+
+    monkeypatch.setattr(main_module.session_touch, "flush", lambda: None)
+    client = httpx.AsyncClient()
+    monkeypatch.setattr(main_module.auth, "_http", client)
+    async with main_module.lifespan(main_module.create_app()):
+        assert not client.is_closed
+    assert client.is_closed
+    assert not main_module.auth._http.is_closed
@@ -6,15 +6,37 @@ import pytest
 from app.core import limits
 
 
+class DummyPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def incr(self, key):
+        self.commands.append(("incr", key))
+
+    def expire(self, key, ttl):
+        self.commands.append(("expire", key, ttl))
+
+    def execute(self):
+        self.redis.round_trips += 1
+        return [getattr(self.redis, name)(*args) for name, *args in self.commands]
+
+
 class DummyRedis:
     def __init__(self):
         self.store = {}
+        self.ttls = {}
+        self.round_trips = 0
+
+    def pipeline(self):
+        return DummyPipeline(self)
 
     def incr(self, key):
         self.store[key] = self.store.get(key, 0) + 1
         return self.store[key]
 
     def expire(self, key, ttl):
+        self.ttls[key] = ttl
         return True
 
 
@@ -43,3 +65,10 @@ def test_check_rag_quota_exceeds_limit(monkeypatch):
     limits.check_rag_quota("user")
     with pytest.raises(Exception):
         limits.check_rag_quota("user")
+
+
+def test_check_ingest_quota_uses_one_round_trip(monkeypatch):
+    monkeypatch.setattr(limits, "MAX_INGESTS_PER_DAY", 5)
+    limits.check_ingest_quota("user")
+    assert limits._redis.round_trips == 1
+    assert list(limits._redis.ttls.values()) == [limits.QUOTA_KEY_TTL_SECONDS]
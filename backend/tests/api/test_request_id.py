@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import pytest
+
+from app.api import main as main_module
+
+
+@pytest.mark.asyncio
+async def test_request_ids_are_unique_per_request(api_client):
+    first = await api_client.get("/")
+    second = await api_client.get("/")
+    ids = {first.headers["X-Request-ID"], second.headers["X-Request-ID"]}
+    assert len(ids) == 2
+    assert all(rid.startswith(main_module._request_id_prefix) for rid in ids)
+
+
+def test_reseed_changes_prefix_and_restarts_counter():
+    before = main_module._request_id_prefix
+    main_module._next_request_id()
+    main_module._reseed_request_ids()
+    assert main_module._request_id_prefix != before
+    assert main_module._next_request_id() == f"{main_module._request_id_prefix}-0"
@@ -44,3 +44,13 @@ def test_missing_google_credentials_surface_http_error(db_session, user_factory)
     with pytest.raises(HTTPException) as exc:
         auth_module.get_google_credentials_for_user(db_session, user.id)
     assert exc.value.status_code == 400
+
+
+def test_legacy_fernet_credentials_still_decrypt(reload_auth, fernet_key):
+    from cryptography.fernet import Fernet
+    import json
+
+    auth = reload_auth(APP_ENV="production", SESSION_SECRET="y" * 40, DRIVE_CREDENTIALS_KEY=fernet_key)
+    legacy = Fernet(fernet_key).encrypt(json.dumps({"token": "legacy-token"}).encode("utf-8"))
+    decoded = auth._deserialize_credentials({"ciphertext": legacy.decode("utf-8")})
+    assert decoded["token"] == "legacy-token"
@@ -103,13 +103,19 @@ class FakeCollection:
         distances = [[dist for dist, _ in top]]
         return {"documents": documents, "metadatas": metadatas, "ids": ids, "distances": distances}
 
-    def get(self, where: Optional[Dict[str, Any]] = None) -> Dict[str, List[str]]:
+    def get(self, where: Optional[Dict[str, Any]] = None, include: Iterable[str] = ()) -> Dict[str, List[Any]]:
+        rows = list(self.rows.values())
         if where and "doc_id" in where:
             doc_id = where["doc_id"]
-            ids = [row.id for row in self.rows.values() if row.meta.get("doc_id") == doc_id]
-        else:
-            ids = list(self.rows.keys())
-        return {"ids": ids}
+            if isinstance(doc_id, dict) and "$in" in doc_id:
+                wanted = set(doc_id["$in"])
+                rows = [row for row in rows if row.meta.get("doc_id") in wanted]
+            else:
+                rows = [row for row in rows if row.meta.get("doc_id") == doc_id]
+        result: Dict[str, List[Any]] = {"ids": [row.id for row in rows]}
+        if "metadatas" in include:
+            result["metadatas"] = [row.meta for row in rows]
+        return result
 
     def delete(self, ids: Sequence[str]) -> None:
         for idx in ids:
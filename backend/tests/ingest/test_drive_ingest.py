@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from types import SimpleNamespace
 
+import httpx
 import pytest
 from fastapi import HTTPException
 from googleapiclient.errors import HttpError
 
 from app.ingest import drive_ingest
+from app.ingest.drive_limiter import DriveLimiter
 
 
 def test_should_retry_handles_429_until_limit():
@@ -57,7 +59,7 @@ def test_list_drive_files_accumulates_pages(monkeypatch):
             return self._files
 
     svc = FakeService()
-    files = drive_ingest._list_drive_files(svc, query="q", limit=5)
+    files = drive_ingest._list_drive_files(svc, query="q", limit=5, user_id="user")
     assert [f["id"] for f in files] == ["1", "2", "3"]
 
 
@@ -101,6 +103,127 @@ def test_list_page_factory_retries_on_transient_errors():
     assert attempts["count"] == 2
 
 
+def test_list_page_factory_hands_over_to_change_log():
+    class FakeRequest:
+        def __init__(self, payload):
+            self._payload = payload
+
+        def execute(self):
+            return self._payload
+
+    calls = []
+
+    class FakeFiles:
+        def list(self, **kwargs):
+            assert kwargs["supportsAllDrives"] and kwargs["includeItemsFromAllDrives"]
+            calls.append(("files", kwargs["pageToken"]))
+            if kwargs["pageToken"] is None:
+                return FakeRequest({"files": [{"id": "a"}], "nextPageToken": "p2"})
+            return FakeRequest({"files": [{"id": "b"}]})
+
+    class FakeChanges:
+        def getStartPageToken(self, **kwargs):
+            assert kwargs["supportsAllDrives"]
+            calls.append(("start", None))
+            return FakeRequest({"startPageToken": "100"})
+
+        def list(self, **kwargs):
+            assert kwargs["supportsAllDrives"] and kwargs["includeItemsFromAllDrives"]
+            calls.append(("changes", kwargs["pageToken"]))
+            return FakeRequest(
+                {
+                    "changes": [
+                        {"file": {"id": "c"}},
+                        {"removed": True},
+                        {"file": {"id": "d", "trashed": True}},
+                    ],
+                    "newStartPageToken": "105",
+                }
+            )
+
+    svc = SimpleNamespace(files=lambda: FakeFiles(), changes=lambda: FakeChanges())
+    page_fn = drive_ingest._list_page_factory(svc, name_filter=None, use_changes=True)
+
+    first = page_fn("user", None, 10)
+    assert first["nextPageToken"] == "scan:100:p2"
+    last = page_fn("user", first["nextPageToken"], 10)
+    assert last["nextPageToken"] is None
+    assert last["cursorToken"] == "changes:100"
+
+    changed = page_fn("user", last["cursorToken"], 10)
+    assert [f["id"] for f in changed["files"]] == ["c"]
+    assert changed["nextPageToken"] is None
+    assert changed["cursorToken"] == "changes:105"
+    assert calls == [("start", None), ("files", None), ("files", "p2"), ("changes", "100")]
+
+
+def test_list_page_factory_prefetches_within_the_file_budget(monkeypatch):
+    class FakeRequest:
+        def __init__(self, payload):
+            self._payload = payload
+
+        def execute(self):
+            return self._payload
+
+    calls = []
+
+    class FakeFiles:
+        def list(self, **kwargs):
+            calls.append((kwargs["pageToken"], kwargs["pageSize"]))
+            token = kwargs["pageToken"] or "t0"
+            files = [{"id": f"{token}-{i}"} for i in range(kwargs["pageSize"])]
+            return FakeRequest({"files": files, "nextPageToken": token + "+"})
+
+    svc = SimpleNamespace(files=lambda: FakeFiles())
+    monkeypatch.setattr(drive_ingest, "_service_for_user", lambda user_id, creds: svc)
+    page_fn = drive_ingest._list_page_factory(svc, name_filter=None, creds=object(), limit=15)
+
+    first = page_fn("user", None, 10)
+    # the final page is smaller than the first and is served from the prefetch
+    second = page_fn("user", first["nextPageToken"], 5)
+    page_fn.cancel_prefetch()
+
+    assert len(second["files"]) == 5
+    assert calls == [(None, 10), ("t0+", 5)]
+
+
+def test_drive_limiter_halves_rate_on_429_and_honors_retry_after():
+    now = {"t": 0.0}
+    sleeps = []
+
+    def fake_sleep(delay):
+        sleeps.append(delay)
+        now["t"] += delay
+
+    limiter = DriveLimiter(rate=10, capacity=2, clock=lambda: now["t"], sleep=fake_sleep)
+    limiter.acquire()
+    limiter.acquire()
+    assert sleeps == []
+
+    limiter.penalize(retry_after=3.0)
+    assert limiter.rate == 5
+    assert limiter.ewma_429_rate > 0
+    limiter.acquire()
+    assert now["t"] >= 3.0
+
+    for _ in range(100):
+        limiter.record_success()
+    assert limiter.rate == 10
+
+
+def test_limited_penalizes_shared_bucket_on_429(monkeypatch):
+    limiter = DriveLimiter(rate=10, capacity=10, sleep=lambda delay: None)
+    monkeypatch.setattr(drive_ingest, "limiter_for", lambda user_id: limiter)
+
+    def throttled():
+        raise HttpError(SimpleNamespace(status=429, reason="rate limit"), b"rate limit")
+
+    with pytest.raises(HttpError):
+        drive_ingest._limited("user", throttled)
+    assert limiter.rate == 5
+    assert drive_ingest._limited("user", lambda: "ok") == "ok"
+
+
 def test_fetch_file_factory_retries_download(monkeypatch):
     calls = {"count": 0}
 
@@ -115,3 +238,123 @@ def test_fetch_file_factory_retries_download(monkeypatch):
     blob = fetcher("user", "file-id", None)
     assert blob == b"ok"
     assert calls["count"] == 2
+
+
+def test_download_decodes_text_chunks_incrementally(monkeypatch):
+    payload = "naïve café ✓".encode("utf-8")
+
+    class FakeDownloader:
+        def __init__(self, fd, request, chunksize):
+            self._fd = fd
+            self._chunks = [payload[i:i + 3] for i in range(0, len(payload), 3)]
+
+        def next_chunk(self):
+            self._fd.write(self._chunks.pop(0))
+            return None, not self._chunks
+
+    class FakeFiles:
+        def get_media(self, fileId):
+            return object()
+
+    class FakeService:
+        def files(self):
+            return FakeFiles()
+
+    monkeypatch.setattr(drive_ingest, "MediaIoBaseDownload", FakeDownloader)
+    assert drive_ingest._download(FakeService(), "f", "text/plain") == "naïve café ✓"
+    assert drive_ingest._download(FakeService(), "f", "application/octet-stream") == payload
+    with drive_ingest._download(FakeService(), "f", "application/pdf") as spooled:
+        assert spooled.read() == payload
+
+
+def test_drive_service_requests_gzip(monkeypatch):
+    from google.oauth2.credentials import Credentials
+
+    seen = {}
+
+    def handler(request):
+        seen.update(request.headers)
+        return httpx.Response(200, json={"files": []})
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(drive_ingest, "_http_client", lambda: client)
+    svc = drive_ingest._drive_service(Credentials(token="token"))
+    svc.files().list(pageSize=1, fields=drive_ingest.LIST_FIELDS).execute()
+    assert "(gzip)" in seen["user-agent"]
+
+
+def test_drive_service_decodes_responses_with_orjson(monkeypatch):
+    from google.oauth2.credentials import Credentials
+
+    payload = b'{"files": [{"id": "1", "name": "caf\xc3\xa9"}], "nextPageToken": "t"}'
+    client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=payload)))
+    monkeypatch.setattr(drive_ingest, "_http_client", lambda: client)
+    svc = drive_ingest._drive_service(Credentials(token="token"))
+    resp = svc.files().list(pageSize=1, fields=drive_ingest.LIST_FIELDS).execute()
+    assert resp == {"files": [{"id": "1", "name": "café"}], "nextPageToken": "t"}
+    assert drive_ingest._DRIVE_MODEL.deserialize(b"not json") == "not json"
+
+
+def test_httpx_transport_returns_httplib2_style_responses(monkeypatch):
+    import gzip
+
+    def handler(request):
+        assert request.headers["range"] == "bytes=0-3"
+        return httpx.Response(
+            206,
+            content=gzip.compress(b"data"),
+            headers={"Content-Encoding": "gzip", "Content-Range": "bytes 0-3/4"},
+        )
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(drive_ingest, "_http_client", lambda: client)
+    resp, content = drive_ingest._HttpxHttp().request("https://example.test/f", headers={"range": "bytes=0-3"})
+    assert resp.status == 206
+    assert resp["content-range"] == "bytes 0-3/4"
+    assert "content-encoding" not in resp
+    assert content == b"data"
+
+
+def test_gzip_encoded_download_completes(monkeypatch):
+    import gzip
+
+    from google.oauth2.credentials import Credentials
+
+    body = b"exported text " * 300
+    compressed = gzip.compress(body)
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        # a download that never sees its total keeps requesting chunks
+        assert len(calls) < 3
+        return httpx.Response(
+            200,
+            content=compressed,
+            headers={"Content-Encoding": "gzip", "Content-Length": str(len(compressed))},
+        )
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(drive_ingest, "_http_client", lambda: client)
+    monkeypatch.setattr(drive_ingest, "DOWNLOAD_CHUNK_SIZE", 1024)
+    svc = drive_ingest._drive_service(Credentials(token="token"))
+
+    assert drive_ingest._download(svc, "f", "application/octet-stream") == body
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [(httpx.ReadTimeout("slow"), TimeoutError), (httpx.ConnectError("refused"), ConnectionError)],
+)
+def test_httpx_transport_errors_surface_as_socket_errors(monkeypatch, error, expected):
+    from app.ingest.queue import _is_transient_error
+
+    def handler(request):
+        raise error
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(drive_ingest, "_http_client", lambda: client)
+    with pytest.raises(expected) as exc:
+        drive_ingest._HttpxHttp().request("https://example.test/f")
+    assert _is_transient_error(exc.value)
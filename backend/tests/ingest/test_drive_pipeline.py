@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from functools import partial
 from typing import Any, Dict, List, Optional
 
 import pytest
@@ -75,6 +76,21 @@ def test_process_drive_file_skips_when_hash_unchanged(db_session, fake_vector_en
     assert embeddings.calls == []
 
 
+def test_process_drive_file_skips_download_when_md5_matches(db_session, fake_vector_env, test_user):
+    _add_index_row(db_session, test_user.id, "file-md5", drive_pipeline.md5_content_hash("md5"))
+
+    summary = drive_pipeline.process_drive_file(
+        db_session,
+        user_id=test_user.id,
+        file_meta=_make_file("file-md5", name="Renamed", version="7", modifiedTime=None),
+        fetch_file_bytes=lambda **_: pytest.fail("matching md5 should not be downloaded"),
+        parse_bytes=lambda data, mime: data.decode(),
+    )
+    assert summary == {"processed": 1, "embedded": 0}
+    row = drive_pipeline._get_row(db_session, test_user.id, "drive", "file-md5")
+    assert (row.name, row.version) == ("Renamed", "7")
+
+
 def test_process_drive_file_replaces_stale_chunks(db_session, fake_vector_env, test_user):
     first_text = "A" * 1300
     second_text = "fresh text"
@@ -91,7 +107,7 @@ def test_process_drive_file_replaces_stale_chunks(db_session, fake_vector_env, t
     summary = drive_pipeline.process_drive_file(
         db_session,
         user_id=test_user.id,
-        file_meta=_make_file("doc-1", version="2", modifiedTime=None),
+        file_meta=_make_file("doc-1", version="2", md5Checksum="md5-v2", modifiedTime=None),
         fetch_file_bytes=lambda **_: second_text.encode(),
         parse_bytes=lambda data, mime: data.decode(),
     )
@@ -140,6 +156,7 @@ def test_process_drive_file_does_not_delete_on_embedding_failure(monkeypatch, db
     batcher = drive_pipeline.EmbeddingBatcher(test_user.id, max_batch_size=1)
     with pytest.raises(drive_pipeline.EmbeddingBatchError):
         batcher.enqueue_doc(doc_work)
+        batcher.flush(force=True)
     assert deleted["called"] is False
 
 
@@ -217,6 +234,67 @@ def test_run_drive_ingest_once_handles_listing_errors(db_session, test_user):
     assert "list error" in (job.error_summary or "")
 
 
+def test_run_drive_ingest_once_records_failed_docs_on_flush(db_session, fake_vector_env, test_user):
+    job = IngestionJob(id="job-f", user_id=test_user.id, status="running", processed_files=0, total_files=0)
+    db_session.add(job)
+    db_session.commit()
+    files = [_make_file(f"doc-f{i}", modifiedTime=None) for i in range(3)]
+
+    def fetch(user_id, file_id, mime_type):
+        if file_id == "doc-f1":
+            raise RuntimeError("boom")
+        return f"body {file_id}".encode()
+
+    summary = drive_pipeline.run_drive_ingest_once(
+        db_session,
+        user_id=test_user.id,
+        list_page=lambda **_: {"files": files, "nextPageToken": None},
+        fetch_file_bytes=fetch,
+        parse_bytes=lambda data, mime: data.decode(),
+        job=job,
+    )
+    db_session.refresh(job)
+    assert summary["errors"] == 1
+    assert job.processed_files == 3
+    assert job.metrics["errors"] == 1
+    assert job.metrics["failed_docs"] == [{"doc_id": "doc-f1", "name": "file-doc-f1", "error": "boom"}]
+
+
+def test_run_drive_ingest_once_keeps_metrics_across_flushes(db_session, fake_vector_env, test_user, monkeypatch):
+    job = IngestionJob(
+        id="job-m",
+        user_id=test_user.id,
+        status="running",
+        processed_files=0,
+        total_files=0,
+        metrics={"failed_docs": [{"doc_id": "older", "name": "older", "error": "earlier page"}]},
+    )
+    db_session.add(job)
+    db_session.commit()
+    monkeypatch.setattr(drive_pipeline, "PROGRESS_FLUSH_INTERVAL", 1)
+    files = [_make_file(f"doc-m{i}", modifiedTime=None) for i in range(4)]
+
+    def fetch(user_id, file_id, mime_type):
+        if file_id in {"doc-m0", "doc-m2"}:
+            raise RuntimeError(f"boom {file_id}")
+        return f"body {file_id}".encode()
+
+    drive_pipeline.run_drive_ingest_once(
+        db_session,
+        user_id=test_user.id,
+        list_page=lambda **_: {"files": files, "nextPageToken": None},
+        fetch_file_bytes=fetch,
+        parse_bytes=lambda data, mime: data.decode(),
+        job=job,
+    )
+    db_session.expire_all()
+    job = db_session.get(IngestionJob, "job-m")
+    assert job.processed_files == 4
+    assert job.metrics["errors"] == 2
+    assert job.metrics["embedded"] == 2
+    assert [d["doc_id"] for d in job.metrics["failed_docs"]] == ["older", "doc-m0", "doc-m2"]
+
+
 def test_save_and_load_drive_cursor(db_session, test_user):
     assert drive_pipeline.load_drive_cursor(db_session, test_user.id) is None
     drive_pipeline.save_drive_cursor(db_session, test_user.id, "token-1", extra={"seen": 5})
@@ -226,6 +304,74 @@ def test_save_and_load_drive_cursor(db_session, test_user):
     assert state.extra == {"seen": 5}
 
 
+def test_run_drive_ingest_once_saves_cursor_with_the_page(db_session, fake_vector_env, test_user):
+    files = [_make_file("doc-c1", modifiedTime=None)]
+    for token in ("page-2", "page-3"):
+        drive_pipeline.run_drive_ingest_once(
+            db_session,
+            user_id=test_user.id,
+            list_page=lambda **_: {"files": files, "nextPageToken": token},
+            fetch_file_bytes=lambda **_: b"cursor body",
+            parse_bytes=lambda data, mime: data.decode(),
+            save_cursor=True,
+        )
+        assert drive_pipeline.load_drive_cursor(db_session, test_user.id) == token
+    state = db_session.get(SourceState, (test_user.id, drive_pipeline.DRIVE_SOURCE))
+    first_sync = state.last_sync
+
+    drive_pipeline.save_drive_cursor(db_session, test_user.id, "page-4")
+    db_session.expire_all()
+    state = db_session.get(SourceState, (test_user.id, drive_pipeline.DRIVE_SOURCE))
+    assert state.cursor_token == "page-4"
+    assert state.last_sync > first_sync
+
+
+def test_run_drive_ingest_once_stamps_last_sync_when_the_pass_completes(db_session, fake_vector_env, test_user):
+    files = [_make_file("doc-s1", modifiedTime=None)]
+    listings = [
+        {"files": files, "nextPageToken": "changes:7", "cursorToken": "changes:7"},
+        {"files": files, "nextPageToken": None, "cursorToken": "changes:9"},
+    ]
+    stamps = []
+    for listing in listings:
+        drive_pipeline.run_drive_ingest_once(
+            db_session,
+            user_id=test_user.id,
+            list_page=lambda **_: listing,
+            fetch_file_bytes=lambda **_: b"sync body",
+            parse_bytes=lambda data, mime: data.decode(),
+            save_cursor=True,
+        )
+        db_session.expire_all()
+        stamps.append(db_session.get(SourceState, (test_user.id, drive_pipeline.DRIVE_SOURCE)).last_sync)
+
+    assert drive_pipeline.load_drive_cursor(db_session, test_user.id) == "changes:9"
+    assert stamps[1] > stamps[0]
+
+
+def test_run_drive_ingest_once_persists_listing_cursor_token(db_session, fake_vector_env, test_user):
+    summary = drive_pipeline.run_drive_ingest_once(
+        db_session,
+        user_id=test_user.id,
+        list_page=lambda **_: {"files": [], "nextPageToken": None, "cursorToken": "changes:42"},
+        fetch_file_bytes=lambda **_: pytest.fail("no files to download"),
+        parse_bytes=lambda data, mime: data.decode(),
+        save_cursor=True,
+    )
+    assert summary["nextPageToken"] is None
+    assert drive_pipeline.load_drive_cursor(db_session, test_user.id) == "changes:42"
+
+
+def test_content_hash_uses_drive_md5_when_present():
+    text = "normalized body"
+    keyed = drive_pipeline._content_hash({"md5Checksum": "abc"}, text)
+    assert keyed.startswith("md5:abc:")
+    assert drive_pipeline._content_hash({"md5Checksum": "abc"}, "other text") == keyed
+    assert drive_pipeline._content_hash({"mimeType": "application/vnd.google-apps.document"}, text) == (
+        compute_content_hash(text)
+    )
+
+
 def test_process_drive_file_attaches_drive_metadata(db_session, fake_vector_env, test_user):
     file_meta = _make_file("doc-meta", name="Launch Plan", mimeType="application/pdf")
     summary = drive_pipeline.process_drive_file(
@@ -275,6 +421,201 @@ def test_embedding_batcher_batches_multiple_docs(db_session, fake_vector_env, te
     assert any("Doc Two" in text for text in combined_input)
 
 
+def test_embedding_batcher_embeds_batches_concurrently(db_session, fake_vector_env, test_user, monkeypatch):
+    import threading
+
+    barrier = threading.Barrier(2, timeout=5)
+
+    def embed(texts):
+        barrier.wait()  # only returns once two batches are in flight together
+        return [[0.1, 0.2] for _ in texts]
+
+    monkeypatch.setattr(drive_pipeline.vector, "_embed_with_retry", embed)
+    chunks = [
+        {"id": f"{test_user.id}-doc-cc-{i}", "text": f"part {i}", "meta": {"doc_id": "doc-cc"}} for i in range(2)
+    ]
+    work = drive_pipeline.DocWork(
+        doc_id="doc-cc",
+        user_id=test_user.id,
+        chunks=chunks,
+        existing_chunk_ids=[],
+        file_meta=_make_file("doc-cc", modifiedTime=None),
+        content_hash="hash",
+        embedded_count=len(chunks),
+    )
+    batcher = drive_pipeline.EmbeddingBatcher(test_user.id, max_batch_size=1, max_inflight=2)
+    ready = batcher.enqueue_doc(work) + batcher.flush(force=True)
+    assert ready == [work]
+    assert sorted(work.new_chunk_ids) == sorted(chunk["id"] for chunk in chunks)
+
+
+def test_embedding_batcher_caps_concurrent_embeds(db_session, fake_vector_env, test_user, monkeypatch):
+    import threading
+
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    def embed(texts):
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        # uneven durations leave a slow batch running while new ones are submitted;
+        # Event.wait because fake_vector_env stubs out time.sleep
+        threading.Event().wait(0.05 if texts[0].endswith(("0", "4", "8")) else 0.001)
+        with lock:
+            running["now"] -= 1
+        return [[0.1, 0.2] for _ in texts]
+
+    monkeypatch.setattr(drive_pipeline.vector, "_embed_with_retry", embed)
+    monkeypatch.setattr(drive_pipeline, "EMBED_SUBMIT_JITTER_SECONDS", 0)
+    chunks = [
+        {"id": f"{test_user.id}-doc-cap-{i}", "text": f"part {i}", "meta": {"doc_id": "doc-cap"}} for i in range(12)
+    ]
+    work = drive_pipeline.DocWork(
+        doc_id="doc-cap",
+        user_id=test_user.id,
+        chunks=chunks,
+        existing_chunk_ids=[],
+        file_meta=_make_file("doc-cap", modifiedTime=None),
+        content_hash="hash",
+        embedded_count=len(chunks),
+    )
+    batcher = drive_pipeline.EmbeddingBatcher(test_user.id, max_batch_size=1, max_inflight=2)
+    ready = batcher.enqueue_doc(work) + batcher.flush(force=True)
+    assert ready == [work]
+    assert running["peak"] <= 2
+
+
+def test_embedding_batcher_returns_ready_docs_with_batch_failure(db_session, fake_vector_env, test_user, monkeypatch):
+    def embed(texts):
+        if any("bad" in text for text in texts):
+            raise RuntimeError("embed failed")
+        return [[0.1, 0.2] for _ in texts]
+
+    monkeypatch.setattr(drive_pipeline.vector, "_embed_with_retry", embed)
+
+    def work_for(doc_id, text):
+        return drive_pipeline.DocWork(
+            doc_id=doc_id,
+            user_id=test_user.id,
+            chunks=[{"id": f"{test_user.id}-{doc_id}-0", "text": text, "meta": {"doc_id": doc_id}}],
+            existing_chunk_ids=[],
+            file_meta=_make_file(doc_id, modifiedTime=None),
+            content_hash="hash",
+            embedded_count=1,
+        )
+
+    good, bad = work_for("doc-good", "good text"), work_for("doc-bad", "bad text")
+    batcher = drive_pipeline.EmbeddingBatcher(test_user.id, max_batch_size=1, max_inflight=2)
+    batcher.enqueue_doc(good)
+    batcher.enqueue_doc(bad)
+    with pytest.raises(drive_pipeline.EmbeddingBatchError) as excinfo:
+        batcher.flush(force=True)
+    assert excinfo.value.ready_docs == [good]
+    assert excinfo.value.docs == [bad]
+
+    batcher.discard(excinfo.value.docs)
+    assert batcher.flush(force=True) == []
+
+
+def test_embedding_batcher_discard_drops_vectors_of_in_flight_batches(db_session, fake_vector_env, test_user, monkeypatch):
+    import threading
+
+    release = threading.Event()
+
+    def embed(texts):
+        if any("fail" in text for text in texts):
+            raise RuntimeError("embed failed")
+        if any("slow" in text for text in texts):
+            release.wait(5)
+        return [[0.1, 0.2] for _ in texts]
+
+    monkeypatch.setattr(drive_pipeline.vector, "_embed_with_retry", embed)
+    monkeypatch.setattr(drive_pipeline, "EMBED_SUBMIT_JITTER_SECONDS", 0)
+    doc_id = "doc-orphan"
+    work = drive_pipeline.DocWork(
+        doc_id=doc_id,
+        user_id=test_user.id,
+        chunks=[
+            {"id": f"{test_user.id}-{doc_id}-{i}", "text": text, "meta": {"doc_id": doc_id}}
+            for i, text in enumerate(["ok 0", "fail 1", "slow 2"])
+        ],
+        existing_chunk_ids=[],
+        file_meta=_make_file(doc_id, modifiedTime=None),
+        content_hash="hash",
+        embedded_count=3,
+    )
+    batcher = drive_pipeline.EmbeddingBatcher(test_user.id, max_batch_size=1, max_inflight=1)
+    with pytest.raises(drive_pipeline.EmbeddingBatchError) as excinfo:
+        batcher.enqueue_doc(work)
+    assert excinfo.value.docs == [work]
+    assert len(batcher._inflight) == 1  # the "slow" batch is still embedding
+
+    batcher.discard(excinfo.value.docs)
+    release.set()
+    assert batcher.flush(force=True) == []
+    assert drive_pipeline.vector.list_doc_chunk_ids(doc_id, user_id=test_user.id) == []
+
+
+def test_run_drive_ingest_once_counts_failed_embed_batches_once(db_session, fake_vector_env, test_user, monkeypatch):
+    job = IngestionJob(id="job-e", user_id=test_user.id, status="running", processed_files=0, total_files=0)
+    db_session.add(job)
+    db_session.commit()
+
+    def embed(texts):
+        if any("doc-e1" in text for text in texts):
+            raise RuntimeError("embed failed")
+        return [[0.1, 0.2] for _ in texts]
+
+    monkeypatch.setattr(drive_pipeline.vector, "_embed_with_retry", embed)
+    # small batches so failures surface while files are still being enqueued
+    monkeypatch.setattr(
+        drive_pipeline,
+        "EmbeddingBatcher",
+        partial(drive_pipeline.EmbeddingBatcher, max_batch_size=1, max_inflight=1),
+    )
+    files = [_make_file(f"doc-e{i}", modifiedTime=None) for i in range(4)]
+
+    summary = drive_pipeline.run_drive_ingest_once(
+        db_session,
+        user_id=test_user.id,
+        list_page=lambda **_: {"files": files, "nextPageToken": None},
+        fetch_file_bytes=lambda user_id, file_id, mime_type: f"body {file_id}".encode(),
+        parse_bytes=lambda data, mime: data.decode(),
+        job=job,
+    )
+    db_session.expire_all()
+    job = db_session.get(IngestionJob, "job-e")
+    assert summary["errors"] == 1
+    assert summary["embedded"] == 3
+    assert [d["doc_id"] for d in job.metrics["failed_docs"]] == ["doc-e1"]
+    stored = {row.id for row in db_session.query(ContentIndex).filter(ContentIndex.user_id == test_user.id)}
+    assert stored == {"doc-e0", "doc-e2", "doc-e3"}
+
+
+def test_embedding_batcher_packs_batches_by_length(db_session, fake_vector_env, test_user):
+    texts = ["x" * 400, "a", "y" * 410, "bb"]
+    chunks = [
+        {"id": f"{test_user.id}-doc-len-{i}", "text": text, "meta": {"doc_id": "doc-len"}}
+        for i, text in enumerate(texts)
+    ]
+    work = drive_pipeline.DocWork(
+        doc_id="doc-len",
+        user_id=test_user.id,
+        chunks=chunks,
+        existing_chunk_ids=[],
+        file_meta=_make_file("doc-len", modifiedTime=None),
+        content_hash="hash",
+        embedded_count=len(chunks),
+    )
+    batcher = drive_pipeline.EmbeddingBatcher(test_user.id, max_batch_size=2, max_inflight=4)
+    ready = batcher.enqueue_doc(work) + batcher.flush(force=True)
+    assert ready == [work]
+    _, embeddings = fake_vector_env
+    assert sorted(sorted(call["input"]) for call in embeddings.calls) == [["a", "bb"], ["x" * 400, "y" * 410]]
+    assert work.new_chunk_ids == [chunk["id"] for chunk in chunks]
+
+
 def test_embedding_batcher_splits_large_doc_when_token_limit_hit(db_session, fake_vector_env, test_user):
     doc_id = "doc-big"
     base_meta = {"user_id": test_user.id, "doc_id": doc_id, "content_hash": "hash"}
@@ -327,7 +668,7 @@ def test_stale_chunks_removed_after_doc_complete(monkeypatch, db_session, fake_v
     summary = drive_pipeline.process_drive_file(
         db_session,
         user_id=test_user.id,
-        file_meta=_make_file("doc-long", version="2", modifiedTime=None),
+        file_meta=_make_file("doc-long", version="2", md5Checksum="md5-v2", modifiedTime=None),
         fetch_file_bytes=lambda **_: long_text.encode(),
         parse_bytes=lambda data, mime: data.decode(),
     )
@@ -347,3 +688,262 @@ def test_stale_chunks_removed_after_doc_complete(monkeypatch, db_session, fake_v
     ready = batcher.flush(force=True)
     drive_pipeline._finalize_ready_docs(db_session, test_user.id, ready)
     assert len(delete_calls) == 1
+
+
+def test_run_drive_ingest_once_prefetches_each_download_once(db_session, fake_vector_env, test_user):
+    files = [_make_file(f"doc-p{i}", modifiedTime=None) for i in range(3)]
+    fetched: List[str] = []
+
+    def fetch(user_id: str, file_id: str, mime_type: Optional[str]) -> bytes:
+        fetched.append(file_id)
+        return f"body for {file_id}".encode()
+
+    summary = drive_pipeline.run_drive_ingest_once(
+        db_session,
+        user_id=test_user.id,
+        list_page=lambda **_: {"files": files, "nextPageToken": None},
+        fetch_file_bytes=fetch,
+        parse_bytes=lambda data, mime: data.decode(),
+    )
+    assert summary["processed"] == 3
+    assert summary["errors"] == 0
+    assert sorted(fetched) == ["doc-p0", "doc-p1", "doc-p2"]
+
+
+def _count_index_selects(db: Session, run) -> int:
+    from sqlalchemy import event
+
+    lookups: List[str] = []
+
+    def count_lookups(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "content_index" in statement:
+            lookups.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", count_lookups)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", count_lookups)
+    return len(lookups)
+
+
+def test_run_drive_ingest_once_skips_unchanged_files_with_one_lookup(db_session, fake_vector_env, test_user):
+    files = [_make_file(f"doc-u{i}", modifiedTime=None) for i in range(3)]
+    for f in files:
+        _add_index_row(db_session, test_user.id, f["id"], drive_pipeline.md5_content_hash("md5"))
+    db_session.expire_all()
+    summary: Dict[str, Any] = {}
+
+    def run():
+        summary.update(
+            drive_pipeline.run_drive_ingest_once(
+                db_session,
+                user_id=test_user.id,
+                list_page=lambda **_: {"files": files, "nextPageToken": None},
+                fetch_file_bytes=lambda **_: pytest.fail("unchanged file should not be downloaded"),
+                parse_bytes=lambda data, mime: data.decode(),
+            )
+        )
+
+    assert _count_index_selects(db_session, run) == 1
+    assert summary["processed"] == 3
+
+
+def test_run_drive_ingest_once_indexes_new_files_without_per_file_selects(db_session, fake_vector_env, test_user):
+    files = [_make_file(f"doc-n{i}", modifiedTime=None) for i in range(3)]
+
+    def run():
+        drive_pipeline.run_drive_ingest_once(
+            db_session,
+            user_id=test_user.id,
+            list_page=lambda **_: {"files": files, "nextPageToken": None},
+            fetch_file_bytes=lambda user_id, file_id, mime_type: f"body {file_id}".encode(),
+            parse_bytes=lambda data, mime: data.decode(),
+        )
+
+    assert _count_index_selects(db_session, run) == 1
+    assert db_session.query(ContentIndex).filter(ContentIndex.user_id == test_user.id).count() == 3
+
+
+def test_run_drive_ingest_once_inserts_new_rows_in_one_statement(db_session, fake_vector_env, test_user):
+    from sqlalchemy import event
+
+    files = [_make_file(f"doc-i{i}", modifiedTime=None) for i in range(4)]
+    inserts: List[bool] = []
+
+    def count_inserts(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT INTO CONTENT_INDEX"):
+            inserts.append(executemany)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", count_inserts)
+    try:
+        summary = drive_pipeline.run_drive_ingest_once(
+            db_session,
+            user_id=test_user.id,
+            list_page=lambda **_: {"files": files, "nextPageToken": None},
+            fetch_file_bytes=lambda user_id, file_id, mime_type: f"body {file_id}".encode(),
+            parse_bytes=lambda data, mime: data.decode(),
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", count_inserts)
+
+    assert summary["errors"] == 0
+    assert len(inserts) == 1
+    rows = db_session.query(ContentIndex).filter(ContentIndex.user_id == test_user.id).all()
+    assert sorted(r.id for r in rows) == [f["id"] for f in files]
+    assert all(r.content_hash and r.last_ingested_at for r in rows)
+
+
+def test_run_drive_ingest_once_looks_up_chunk_ids_while_downloading(
+    db_session, fake_vector_env, test_user, monkeypatch
+):
+    import threading
+
+    files = [_make_file(f"doc-b{i}", modifiedTime=None) for i in range(3)]
+    download_started = threading.Event()
+    lookups: List[List[str]] = []
+    bulk = vector_module.list_doc_chunk_ids_bulk
+
+    def fetch(user_id, file_id, mime_type):
+        download_started.set()
+        return f"body {file_id}".encode()
+
+    def spy(doc_ids, user_id=None):
+        assert download_started.wait(5), "chunk id lookup ran before any download was submitted"
+        lookups.append(list(doc_ids))
+        return bulk(doc_ids, user_id=user_id)
+
+    monkeypatch.setattr(vector_module, "list_doc_chunk_ids", lambda *a, **k: pytest.fail("per-file lookup"))
+    monkeypatch.setattr(vector_module, "list_doc_chunk_ids_bulk", spy)
+    summary = drive_pipeline.run_drive_ingest_once(
+        db_session,
+        user_id=test_user.id,
+        list_page=lambda **_: {"files": files, "nextPageToken": None},
+        fetch_file_bytes=fetch,
+        parse_bytes=lambda data, mime: data.decode(),
+    )
+    assert summary["errors"] == 0
+    assert lookups == [[f["id"] for f in files]]
+
+
+def test_finalize_merges_rows_inserted_since_the_page_lookup(db_session, fake_vector_env, test_user):
+    db_session.expunge(_add_index_row(db_session, test_user.id, "doc-race", "old-hash"))
+    meta = _make_file("doc-race", name="Renamed", modifiedTime=None)
+    work = drive_pipeline.DocWork(
+        doc_id="doc-race",
+        user_id=test_user.id,
+        chunks=[],
+        existing_chunk_ids=[],
+        file_meta=meta,
+        content_hash="new-hash",
+        embedded_count=1,
+        new_chunk_ids=[f"{test_user.id}-doc-race-0"],
+    )
+    # the page lookup ran before another worker inserted the row
+    stored_rows = {"doc-race": None}
+
+    drive_pipeline._finalize_ready_docs(db_session, test_user.id, [work], stored_rows)
+    db_session.commit()
+
+    row = db_session.get(ContentIndex, "doc-race")
+    assert row.name == "Renamed"
+    assert row.content_hash == "new-hash"
+    assert row.md5 == "md5"
+
+
+def test_run_drive_ingest_once_parses_on_download_threads(db_session, fake_vector_env, test_user, monkeypatch):
+    import threading
+
+    files = [_make_file(f"doc-t{i}", modifiedTime=None) for i in range(3)]
+    parse_threads: List[str] = []
+    chunk_threads: List[str] = []
+    build_rows = drive_pipeline._build_chunk_rows
+
+    def parse(data, mime):
+        parse_threads.append(threading.current_thread().name)
+        return data.decode()
+
+    def chunk(*args, **kwargs):
+        chunk_threads.append(threading.current_thread().name)
+        return build_rows(*args, **kwargs)
+
+    monkeypatch.setattr(drive_pipeline, "_build_chunk_rows", chunk)
+
+    summary = drive_pipeline.run_drive_ingest_once(
+        db_session,
+        user_id=test_user.id,
+        list_page=lambda **_: {"files": files, "nextPageToken": None},
+        fetch_file_bytes=lambda user_id, file_id, mime_type: f"body {file_id}".encode(),
+        parse_bytes=parse,
+    )
+    assert summary["processed"] == 3
+    assert summary["errors"] == 0
+    assert len(parse_threads) == 3
+    assert all(name.startswith("drive-download") for name in parse_threads)
+    assert len(chunk_threads) == 3
+    assert all(name.startswith("drive-download") for name in chunk_threads)
+
+
+def test_run_drive_ingest_once_classifies_each_file_once(db_session, fake_vector_env, test_user, monkeypatch):
+    files = [_make_file(f"doc-k{i}", modifiedTime=None) for i in range(4)]
+    _add_index_row(db_session, test_user.id, "doc-k0", drive_pipeline.md5_content_hash("md5"))
+    checked: List[str] = []
+    original = drive_pipeline.should_reingest
+
+    def spy(stored, meta, new_text=None):
+        checked.append(meta["id"])
+        return original(stored, meta, new_text)
+
+    monkeypatch.setattr(drive_pipeline, "should_reingest", spy)
+    summary = drive_pipeline.run_drive_ingest_once(
+        db_session,
+        user_id=test_user.id,
+        list_page=lambda **_: {"files": files, "nextPageToken": None},
+        fetch_file_bytes=lambda user_id, file_id, mime_type: f"body {file_id}".encode(),
+        parse_bytes=lambda data, mime: data.decode(),
+    )
+    assert summary["processed"] == 4
+    assert sorted(checked) == ["doc-k0", "doc-k1", "doc-k2", "doc-k3"]
+
+
+def test_normalize_offloads_only_large_texts(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    submitted: List[str] = []
+
+    class RecordingPool(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            submitted.extend(args)
+            return super().submit(fn, *args, **kwargs)
+
+    pool = RecordingPool(max_workers=1)
+    monkeypatch.setattr(drive_pipeline, "_get_normalize_pool", lambda: pool)
+    monkeypatch.setattr(drive_pipeline, "NORMALIZE_PROCESSES", 1)
+    monkeypatch.setattr(drive_pipeline, "NORMALIZE_OFFLOAD_MIN_CHARS", 10)
+    text = "Launch\u00a0plan \r\n\r\n\r\n\r\nnext   steps  "
+    assert drive_pipeline._normalize(text) == "Launch plan\n\nnext steps"
+    assert drive_pipeline._normalize("short") == "short"
+    assert drive_pipeline._normalize(None) == ""
+    assert submitted == [text]
+    pool.shutdown()
+
+
+def test_prefetch_downloads_keeps_a_bounded_window(monkeypatch, db_session, test_user):
+    monkeypatch.setattr(drive_pipeline, "DOWNLOAD_CONCURRENCY", 2)
+    files = [_make_file(f"doc-w{i}", modifiedTime=None) for i in range(10)]
+    fetch, inflight = drive_pipeline._prefetch_downloads(
+        db_session,
+        test_user.id,
+        files,
+        lambda user_id, file_id, mime_type: file_id.encode(),
+        False,
+        {},
+    )
+    window = 2 * drive_pipeline.DOWNLOAD_WINDOW_FACTOR
+    assert len(inflight) == window
+    for f in files:
+        assert fetch(user_id=test_user.id, file_id=f["id"], mime_type=None) == f["id"].encode()
+        assert len(inflight) <= window
+    assert not inflight
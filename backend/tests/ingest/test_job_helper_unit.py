@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
+from app.core.models import IngestionJob
 from app.ingest import job_helper
 
 
@@ -50,8 +51,58 @@ def test_finish_job_merges_metrics(db_session):
     assert job["finished_at"] is not None
 
 
+def test_job_timestamps_share_one_clock_read(db_session):
+    job_id = _new_job(db_session)
+    job = job_helper.get_job(db_session, job_id)
+    assert job["created_at"] == job["updated_at"]
+    job_helper.finish_job(db_session, job_id, status="succeeded")
+    job = job_helper.get_job(db_session, job_id)
+    assert job["finished_at"] == job["updated_at"]
+
+
 def test_record_job_error_increments_metrics(db_session):
     job_id = _new_job(db_session)
     job_helper.record_job_error(db_session, job_id, "temporary issue")
     job = job_helper.get_job(db_session, job_id)
     assert (job["metrics"] or {}).get("errors") == 1
+
+
+def test_find_active_job_returns_newest_in_flight_job(db_session):
+    _new_job(db_session, status="succeeded")
+    older = _new_job(db_session, status="running")
+    newer = _new_job(db_session, status="queued")
+    db_session.get(IngestionJob, older).created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    db_session.commit()
+
+    job = job_helper.find_active_job(db_session, "user-1")
+    assert job["job_id"] == newer
+    assert job_helper.find_active_job(db_session, "someone-else") is None
+
+
+def test_get_job_cached_only_caches_finished_jobs(db_session, monkeypatch):
+    job_id = _new_job(db_session)
+    calls = []
+    real_get_job = job_helper.get_job
+
+    def counting_get_job(db, jid):
+        calls.append(jid)
+        return real_get_job(db, jid)
+
+    monkeypatch.setattr(job_helper, "get_job", counting_get_job)
+
+    assert job_helper.get_job_cached(db_session, job_id)["status"] == "queued"
+    assert job_helper.get_job_cached(db_session, job_id)["status"] == "queued"
+    assert len(calls) == 2
+
+    job_helper.finish_job(db_session, job_id, metrics={"embedded": 3})
+    first = job_helper.get_job_cached(db_session, job_id)
+    first["metrics"]["embedded"] = 0
+    second = job_helper.get_job_cached(db_session, job_id)
+    assert second["status"] == "succeeded"
+    assert second["metrics"]["embedded"] == 3
+    assert len(calls) == 3
+
+
+def test_get_job_cached_does_not_cache_missing_jobs(db_session):
+    assert job_helper.get_job_cached(db_session, "missing-job") is None
+    assert "missing-job" not in job_helper._job_cache
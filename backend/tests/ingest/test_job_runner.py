@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.core.models import IngestionJob
 from app.ingest import job_helper, queue as ingest_queue
-from app.routes import ingest_routes
 
 
-def test_run_drive_job_succeeds_and_logs_progress(db_session, session_factory, test_user, monkeypatch):
+def test_worker_run_ingest_succeeds_and_logs_progress(db_session, session_factory, test_user, monkeypatch):
     job_id = job_helper.create_job(
         db_session,
         user_id=test_user.id,
@@ -16,18 +19,19 @@ def test_run_drive_job_succeeds_and_logs_progress(db_session, session_factory, t
     messages: list[str] = []
     original_append = job_helper._append_log_to_job
 
-    def spy(job, message):
+    def spy(job, message, now=None):
         messages.append(message)
-        original_append(job, message)
+        original_append(job, message, now)
 
-    def fake_ingest(user_id, name_filter, max_files, reembed_all, on_progress):
+    def fake_ingest(user_id, max_files, on_progress):
         assert user_id == test_user.id
         for i in range(1, 4):
             on_progress(i, 3, f"processed file {i}")
+        return {"found": 3, "ingested": 3, "errors": 0}
 
-    monkeypatch.setattr(ingest_routes, "INGEST_DRIVE_CALLABLE", fake_ingest)
+    monkeypatch.setattr(ingest_queue.drive_ingest, "ingest_drive", fake_ingest)
     monkeypatch.setattr(job_helper, "_append_log_to_job", spy)
-    ingest_routes._run_drive_job(job_id)
+    ingest_queue._run_ingest(job_id, {"user_id": test_user.id, "max_files": 3})
 
     db_session.expire_all()
     job = job_helper.get_job(db_session, job_id)
@@ -38,22 +42,37 @@ def test_run_drive_job_succeeds_and_logs_progress(db_session, session_factory, t
     assert "processed file 3" in messages[-1]
 
 
-def test_run_drive_job_fails_when_payload_missing_user(db_session, monkeypatch):
+def test_worker_run_ingest_only_commits_total_when_it_changes(db_session, session_factory, test_user, monkeypatch):
     job_id = job_helper.create_job(
         db_session,
-        user_id="ghost",
-        payload={"max_files": 1},
+        user_id=test_user.id,
+        payload={"user_id": test_user.id, "max_files": 4},
         total_files=0,
         status="queued",
     )
-    monkeypatch.setattr(ingest_routes, "INGEST_DRIVE_CALLABLE", lambda **_: None)
-    ingest_routes._run_drive_job(job_id)
-    job = job_helper.get_job(db_session, job_id)
-    assert job["status"] == "failed"
-    assert "missing user_id" in (job["error_summary"] or "")
+
+    totals: list[int] = []
+    original_mark = job_helper.mark_job_running
+
+    def spy_mark(db, job_id_arg, total_files):
+        totals.append(total_files)
+        return original_mark(db, job_id_arg, total_files=total_files)
+
+    def fake_ingest(user_id, max_files, on_progress):
+        for i in range(1, 5):
+            on_progress(i, 4)
+        return {"found": 4, "ingested": 4, "errors": 0}
+
+    monkeypatch.setattr(job_helper, "mark_job_running", spy_mark)
+    monkeypatch.setattr(ingest_queue.drive_ingest, "ingest_drive", fake_ingest)
+    ingest_queue._run_ingest(job_id, {"user_id": test_user.id, "max_files": 4})
+
+    assert totals == [0, 4]
+    db_session.expire_all()
+    assert job_helper.get_job(db_session, job_id)["processed_files"] == 4
 
 
-def test_run_drive_job_fails_when_ingest_reports_errors(db_session, session_factory, test_user, monkeypatch):
+def test_worker_run_ingest_folds_later_totals_into_progress_flushes(db_session, test_user, monkeypatch):
     job_id = job_helper.create_job(
         db_session,
         user_id=test_user.id,
@@ -62,16 +81,37 @@ def test_run_drive_job_fails_when_ingest_reports_errors(db_session, session_fact
         status="queued",
     )
 
-    def fake_ingest(**kwargs):
-        return {"found": 1, "ingested": 0, "errors": 1}
+    marks: list[int] = []
+    bumps: list[tuple[int, int | None]] = []
+    original_mark = job_helper.mark_job_running
+    original_bump = job_helper.bump_job_progress
+
+    def spy_mark(db, job_id_arg, total_files):
+        marks.append(total_files)
+        return original_mark(db, job_id_arg, total_files=total_files)
+
+    def spy_bump(db, job_id_arg, inc=1, message=None, total_files=None):
+        bumps.append((inc, total_files))
+        return original_bump(db, job_id_arg, inc=inc, message=message, total_files=total_files)
 
-    monkeypatch.setattr(ingest_routes, "INGEST_DRIVE_CALLABLE", fake_ingest)
-    ingest_routes._run_drive_job(job_id)
+    def fake_ingest(user_id, on_progress):
+        # two listed pages: the total grows from 2 to 4 mid-run
+        for i in range(1, 5):
+            on_progress(i, 2 if i <= 2 else 4)
+        return {"found": 4, "ingested": 4, "errors": 0}
 
+    monkeypatch.setattr(job_helper, "mark_job_running", spy_mark)
+    monkeypatch.setattr(job_helper, "bump_job_progress", spy_bump)
+    monkeypatch.setattr(ingest_queue, "PROGRESS_FLUSH_INTERVAL", 2)
+    monkeypatch.setattr(ingest_queue.drive_ingest, "ingest_drive", fake_ingest)
+    ingest_queue._run_ingest(job_id, {"user_id": test_user.id})
+
+    assert marks == [0, 2]
+    assert bumps == [(2, None), (2, 4)]
+    db_session.expire_all()
     job = job_helper.get_job(db_session, job_id)
-    assert job is not None
-    assert job["status"] == "failed"
-    assert "error" in (job["error_summary"] or "").lower()
+    assert job["total_files"] == 4
+    assert job["processed_files"] == 4
 
 
 def test_worker_run_ingest_throttles_progress_updates(db_session, session_factory, test_user, monkeypatch):
@@ -86,9 +126,9 @@ def test_worker_run_ingest_throttles_progress_updates(db_session, session_factor
     bumps: list[int] = []
     original_bump = job_helper.bump_job_progress
 
-    def spy_bump(db, job_id_arg, inc=1, message=None):
+    def spy_bump(db, job_id_arg, inc=1, message=None, total_files=None):
         bumps.append(int(inc or 0))
-        return original_bump(db, job_id_arg, inc=inc, message=message)
+        return original_bump(db, job_id_arg, inc=inc, message=message, total_files=total_files)
 
     def fake_ingest(user_id, name_filter=None, max_files=None, reembed_all=False, on_progress=None):
         assert on_progress is not None
@@ -108,3 +148,31 @@ def test_worker_run_ingest_throttles_progress_updates(db_session, session_factor
     assert job["status"] == "succeeded"
     assert job["processed_files"] == 5
     assert bumps == [2, 2, 1]
+
+
+def test_worker_run_ingest_marks_job_failed_after_db_error(db_session, test_user, monkeypatch):
+    job_id = job_helper.create_job(
+        db_session,
+        user_id=test_user.id,
+        payload={"user_id": test_user.id},
+        total_files=0,
+        status="queued",
+    )
+
+    def broken_bump(db, jid, inc=1, message=None, total_files=None):
+        # leaves the worker's session needing a rollback
+        db.add(IngestionJob(id=jid, user_id=test_user.id))
+        db.flush()
+
+    def fake_ingest(user_id, on_progress):
+        on_progress(1, 1, "processed file 1")
+        return {"found": 1, "ingested": 1, "errors": 0}
+
+    monkeypatch.setattr(job_helper, "bump_job_progress", broken_bump)
+    monkeypatch.setattr(ingest_queue.drive_ingest, "ingest_drive", fake_ingest)
+    with pytest.raises(IntegrityError):
+        ingest_queue._run_ingest(job_id, {"user_id": test_user.id})
+
+    db_session.expire_all()
+    job = job_helper.get_job(db_session, job_id)
+    assert job["status"] == "failed"
@@ -24,6 +24,12 @@ def test_to_text_handles_docx_bytes():
     assert "Hello Docx" in text
 
 
+def test_to_text_reads_docx_from_file_handle():
+    handle = io.BytesIO(_make_docx("Spooled Docx"))
+    text = parser.to_text(handle, filename="", mime=next(iter(parser.DOCX_MIMES)))
+    assert "Spooled Docx" in text
+
+
 def test_to_text_handles_csv_bytes():
     data = b"name,score\nAda,10\nGrace,9"
     text = parser.to_text(data, filename="scores.csv", mime="text/csv")
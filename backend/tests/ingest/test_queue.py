@@ -91,3 +91,34 @@ def test_run_ingest_marks_failed_when_result_has_errors(db_session, monkeypatch)
 
     job = job_helper.get_job(db_session, job_id)
     assert job["status"] == "failed"
+
+
+def test_queue_enabled_rechecks_redis_after_backoff(monkeypatch):
+    class FlakyRedis:
+        def __init__(self):
+            self.pings = 0
+            self.up = False
+
+        def ping(self):
+            self.pings += 1
+            if not self.up:
+                raise ConnectionError("connection refused")
+            return True
+
+    redis = FlakyRedis()
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(ingest_queue, "_redis_conn", redis)
+    monkeypatch.setattr(ingest_queue, "_queue", None)
+    monkeypatch.setattr(ingest_queue, "_queue_retry_at", 0.0)
+    monkeypatch.setattr(ingest_queue, "Queue", lambda name, connection: SimpleNamespace(name=name))
+    monkeypatch.setattr(ingest_queue.time, "monotonic", lambda: clock.now)
+
+    assert ingest_queue.queue_enabled() is False
+    redis.up = True
+    assert ingest_queue.queue_enabled() is False
+    assert redis.pings == 1
+
+    clock.now += ingest_queue.QUEUE_RECHECK_SECONDS
+    assert ingest_queue.queue_enabled() is True
+    assert ingest_queue.queue_enabled() is True
+    assert redis.pings == 2
@@ -8,26 +8,30 @@ from fastapi import HTTPException
 
 
 @pytest.mark.asyncio
-async def test_start_drive_ingest_creates_job(api_client, db_session, monkeypatch, test_user):
-    ran = {"called": False}
+async def test_start_drive_ingest_returns_503_without_queue(api_client, db_session, monkeypatch, test_user):
+    monkeypatch.setattr(ingest_routes, "ENSURE_DRIVE_SESSION", lambda user_id: None)
+    monkeypatch.setattr(ingest_routes.ingest_queue, "queue_enabled", lambda: False)
+
+    resp = await api_client.post("/ingest/drive/start", json={"max_files": 2, "reembed_all": False})
+    assert resp.status_code == 503, resp.text
+    assert job_helper.find_active_job(db_session, test_user.id) is None
 
-    def fake_run(job_id: str):
-        ran["called"] = True
 
-    monkeypatch.setattr(ingest_routes, "_run_drive_job", fake_run)
+@pytest.mark.asyncio
+async def test_start_drive_ingest_fails_job_when_enqueue_fails(api_client, db_session, monkeypatch, test_user):
     monkeypatch.setattr(ingest_routes, "ENSURE_DRIVE_SESSION", lambda user_id: None)
+    monkeypatch.setattr(ingest_routes.ingest_queue, "queue_enabled", lambda: True)
 
-    resp = await api_client.post("/ingest/drive/start", json={"max_files": 2, "reembed_all": False})
-    assert resp.status_code == 200, resp.text
-    body = resp.json()
-    assert body["existing"] is False
-    job_id = body["job_id"]
-    job = job_helper.get_job(db_session, job_id)
-    assert job and job["status"] == "queued"
-    if body.get("queue_job_id"):
-        assert ran["called"] is False
-    else:
-        assert ran["called"] is True
+    def broken_enqueue(job_id: str, payload: dict):
+        raise ConnectionError("redis went away")
+
+    monkeypatch.setattr(ingest_routes.ingest_queue, "enqueue_drive_job", broken_enqueue)
+
+    resp = await api_client.post("/ingest/drive/start", json={})
+    assert resp.status_code == 503
+    assert job_helper.find_active_job(db_session, test_user.id) is None
+    jobs = job_helper.list_jobs(db_session, user_id=test_user.id, kind=None, limit=5, offset=0)
+    assert [job["status"] for job in jobs] == ["failed"]
 
 
 @pytest.mark.asyncio
@@ -76,6 +80,7 @@ async def test_start_drive_ingest_respects_quota(api_client, monkeypatch, test_u
     def quota(*args, **kwargs):
         raise HTTPException(status_code=429, detail="limit")
 
+    monkeypatch.setattr(ingest_routes.ingest_queue, "queue_enabled", lambda: True)
     monkeypatch.setattr(ingest_routes, "check_ingest_quota", quota)
     resp = await api_client.post("/ingest/drive/start", json={})
     assert resp.status_code == 429
@@ -97,3 +102,42 @@ async def test_start_drive_ingest_read_only(api_client, monkeypatch, test_user):
 async def test_ingest_drive_endpoint_enforces_limit(api_client):
     resp = await api_client.post("/ingest/drive?limit=999")
     assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_job_endpoints_serialize_job_fields(api_client, db_session, test_user):
+    job_id = job_helper.create_job(
+        db_session,
+        user_id=test_user.id,
+        payload={"user_id": test_user.id, "max_files": 2},
+        total_files=2,
+        status="queued",
+    )
+    job_helper.mark_job_running(db_session, job_id, total_files=2)
+
+    resp = await api_client.get(f"/ingest/jobs/{job_id}")
+    assert resp.status_code == 200, resp.text
+    job = resp.json()
+    assert job["job_id"] == job_id
+    assert job["status"] == "running"
+    assert job["payload"] == {"user_id": test_user.id, "max_files": 2}
+    assert job["started_at"] is not None
+    assert job["finished_at"] is None
+
+    resp = await api_client.get("/ingest/jobs")
+    assert resp.status_code == 200
+    assert [j["job_id"] for j in resp.json()] == [job_id]
+
+
+@pytest.mark.asyncio
+async def test_job_endpoint_keeps_isoformat_timestamps(api_client, test_user, monkeypatch):
+    from datetime import datetime, timezone
+
+    stamp = datetime(2024, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc)
+    job = {"job_id": "job-t", "user_id": test_user.id, "status": "succeeded", "created_at": stamp, "finished_at": None}
+    monkeypatch.setattr(ingest_routes.job_helper, "get_job_cached", lambda db, job_id: job)
+
+    resp = await api_client.get("/ingest/jobs/job-t")
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["created_at"] == "2024-01-02T03:04:05.678000+00:00"
+    assert resp.json()["finished_at"] is None
@@ -21,6 +21,19 @@ def test_upsert_query_and_list_ids(fake_vector_env):
     assert {h["meta"]["doc_id"] for h in hits} == {"doc1", "doc2"}
 
 
+def test_list_doc_chunk_ids_bulk_groups_by_doc(fake_vector_env):
+    chunks = [
+        {"id": "u-d1-0", "text": "one", "meta": {"doc_id": "d1"}},
+        {"id": "u-d1-1", "text": "two", "meta": {"doc_id": "d1"}},
+        {"id": "u-d2-0", "text": "three", "meta": {"doc_id": "d2"}},
+    ]
+    vector.upsert(chunks, user_id="user-7")
+    found = vector.list_doc_chunk_ids_bulk(["d1", "d3"], user_id="user-7")
+    assert sorted(found["d1"]) == ["u-d1-0", "u-d1-1"]
+    assert found["d3"] == []
+    assert "d2" not in found
+
+
 def test_delete_paths(fake_vector_env):
     chunks = [
         {"id": "docA-0", "text": "Alpha text", "meta": {"doc_id": "docA"}},
@@ -37,6 +50,15 @@ def test_delete_paths(fake_vector_env):
     assert removed == 1
 
 
+def test_reset_collection_replaces_cached_handle(fake_vector_env):
+    vector.upsert([{"id": "old-0", "text": "before reset", "meta": {"doc_id": "old"}}], user_id="user-9")
+    vector.reset_collection(user_id="user-9")
+    assert vector.list_doc_chunk_ids("old", user_id="user-9") == []
+
+    vector.upsert([{"id": "new-0", "text": "after reset", "meta": {"doc_id": "new"}}], user_id="user-9")
+    assert vector.list_doc_chunk_ids("new", user_id="user-9") == ["new-0"]
+
+
 def test_embed_with_retry_handles_rate_limits(fake_vector_env, monkeypatch):
     client = fake_vector_env[1]
     assert isinstance(client, FakeEmbeddingsClient)
@@ -68,6 +68,7 @@ def _create_user(db) -> User:
 def test_issue_session_and_get_current_user(db_session, session_factory):
     user = _create_user(db_session)
     token = auth._issue_session(db_session, user)
+    db_session.commit()
 
     request = DummyRequest(cookies={auth.SESSION_COOKIE_NAME: token})
     with session_factory() as fresh_db:
@@ -94,6 +95,7 @@ def test_google_credentials_round_trip(db_session, session_factory):
         scopes=["openid"],
     )
     auth._persist_google_credentials(db_session, user.id, creds)
+    db_session.commit()
 
     with session_factory() as fresh_db:
         loaded = auth.get_google_credentials_for_user(fresh_db, user.id)
@@ -101,3 +103,239 @@ def test_google_credentials_round_trip(db_session, session_factory):
 
     unmanaged = auth.get_google_credentials_for_user_unmanaged(user.id)
     assert unmanaged.token == "token-123"
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store: Dict[str, str] = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+
+def test_get_current_user_served_from_session_cache(db_session, session_factory, monkeypatch):
+    from app.core import session_cache
+
+    monkeypatch.setattr(session_cache, "_redis", _FakeRedis())
+    user = _create_user(db_session)
+    token = auth._issue_session(db_session, user)
+    db_session.commit()
+    request = DummyRequest(cookies={auth.SESSION_COOKIE_NAME: token})
+
+    with session_factory() as fresh_db:
+        auth.get_current_user(request, db=fresh_db)
+
+    class _NoQueryDB:
+        def query(self, *args, **kwargs):
+            raise AssertionError("session lookup should be served from cache")
+
+        def get(self, *args, **kwargs):
+            raise AssertionError("user lookup should be served from cache")
+
+    cached = auth.get_current_user(request, db=_NoQueryDB())
+    assert cached.id == user.id
+    assert cached.email == user.email
+
+    with session_factory() as fresh_db:
+        auth._delete_user_data(fresh_db, user.id)
+    assert session_cache.get_user(auth._hash_token(token)) is None
+
+
+def test_last_used_at_is_written_in_batches(db_session, session_factory, monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    from app.core import session_touch
+    from app.core.models import UserSession
+
+    monkeypatch.setattr(session_touch, "_ensure_worker", lambda: None)
+    monkeypatch.setattr(session_touch, "_pending", {})
+    user = _create_user(db_session)
+    token = auth._issue_session(db_session, user)
+    db_session.commit()
+    stale = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    db_session.query(UserSession).update({UserSession.last_used_at: stale})
+    db_session.commit()
+
+    request = DummyRequest(cookies={auth.SESSION_COOKIE_NAME: token})
+    with session_factory() as fresh_db:
+        auth.get_current_user(request, db=fresh_db)
+
+    db_session.expire_all()
+    row = db_session.query(UserSession).one()
+    assert row.last_used_at.replace(tzinfo=timezone.utc) == stale
+
+    session_touch.flush()
+    db_session.expire_all()
+    row = db_session.query(UserSession).one()
+    assert row.last_used_at.replace(tzinfo=timezone.utc) > stale + timedelta(days=1)
+
+
+def test_tampered_session_token_rejected_without_db(db_session):
+    user = _create_user(db_session)
+    token = auth._issue_session(db_session, user)
+    db_session.commit()
+    forged = token[:-2] + ("AA" if not token.endswith("AA") else "BB")
+
+    class _NoQueryDB:
+        def query(self, *args, **kwargs):
+            raise AssertionError("forged tokens should not reach the database")
+
+    request = DummyRequest(cookies={auth.SESSION_COOKIE_NAME: forged})
+    with pytest.raises(HTTPException) as exc:
+        auth.get_current_user(request, db=_NoQueryDB())
+    assert exc.value.status_code == 401
+
+
+def test_upsert_user_updates_existing_row(db_session):
+    first = auth._upsert_user(db_session, {"id": "sub-9", "email": "a@example.com", "name": "A"})
+    second = auth._upsert_user(db_session, {"id": "sub-9", "email": "b@example.com"})
+    assert second.id == first.id
+    assert second.email == "b@example.com"
+    assert second.full_name == "A"
+    assert db_session.query(User).count() == 1
+
+
+def test_legacy_sha256_session_is_upgraded(db_session, session_factory):
+    from datetime import datetime, timedelta, timezone
+
+    from app.core.models import UserSession
+
+    user = _create_user(db_session)
+    token = "legacy-token"
+    db_session.add(
+        UserSession(
+            user_id=user.id,
+            token_hash=auth._sha256_digest(token.encode("utf-8")),
+            expires_at=datetime.now(timezone.utc) + timedelta(days=1),
+        )
+    )
+    db_session.commit()
+
+    request = DummyRequest(cookies={auth.SESSION_COOKIE_NAME: token})
+    with session_factory() as fresh_db:
+        assert auth.get_current_user(request, db=fresh_db).id == user.id
+
+    db_session.expire_all()
+    assert db_session.query(UserSession).one().token_hash == auth._hash_token(token)
+
+
+def test_local_session_cache_serves_repeat_requests_without_redis(db_session, session_factory, monkeypatch):
+    from app.core import session_cache
+
+    monkeypatch.setattr(session_cache, "_redis_conn", lambda: None)
+    user = _create_user(db_session)
+    token = auth._issue_session(db_session, user)
+    db_session.commit()
+    request = DummyRequest(cookies={auth.SESSION_COOKIE_NAME: token})
+    with session_factory() as fresh_db:
+        auth.get_current_user(request, db=fresh_db)
+
+    class _NoQueryDB:
+        def execute(self, *args, **kwargs):
+            raise AssertionError("repeat lookups should be served in-process")
+
+        def get(self, *args, **kwargs):
+            raise AssertionError("repeat lookups should be served in-process")
+
+    assert auth.get_current_user(request, db=_NoQueryDB()).id == user.id
+
+
+def test_local_cache_hits_skip_redis_touch_claims(db_session, session_factory, monkeypatch):
+    from app.core import session_cache
+
+    class _CountingRedis(_FakeRedis):
+        def __init__(self):
+            super().__init__()
+            self.calls = 0
+
+        def get(self, key):
+            self.calls += 1
+            return super().get(key)
+
+        def set(self, key, value, ex=None, nx=False):
+            self.calls += 1
+            return super().set(key, value, ex=ex, nx=nx)
+
+    redis = _CountingRedis()
+    monkeypatch.setattr(session_cache, "_redis", redis)
+    user = _create_user(db_session)
+    token = auth._issue_session(db_session, user)
+    db_session.commit()
+    request = DummyRequest(cookies={auth.SESSION_COOKIE_NAME: token})
+    with session_factory() as fresh_db:
+        auth.get_current_user(request, db=fresh_db)
+    # first cache hit records this process's touch window
+    auth.get_current_user(DummyRequest(cookies={auth.SESSION_COOKIE_NAME: token}), db=None)
+
+    calls = redis.calls
+    for _ in range(3):
+        auth.get_current_user(DummyRequest(cookies={auth.SESSION_COOKIE_NAME: token}), db=None)
+    assert redis.calls == calls
+
+
+def test_google_credentials_cached_between_calls(db_session, session_factory):
+    user = _create_user(db_session)
+    creds = Credentials(token="token-abc", refresh_token=None, token_uri="https://oauth2.googleapis.com/token")
+    auth._persist_google_credentials(db_session, user.id, creds)
+    db_session.commit()
+
+    with session_factory() as fresh_db:
+        first = auth.get_google_credentials_for_user(fresh_db, user.id)
+
+    class _NoQueryDB:
+        def get(self, *args, **kwargs):
+            raise AssertionError("cached credentials should not reload the row")
+
+    assert auth.get_google_credentials_for_user(_NoQueryDB(), user.id) is first
+
+
+def test_fetch_profile_surfaces_userinfo_errors(monkeypatch):
+    import asyncio
+
+    import httpx
+
+    transport = httpx.MockTransport(lambda request: httpx.Response(401, json={"error": "invalid_token"}))
+    monkeypatch.setattr(auth, "_http", httpx.AsyncClient(transport=transport))
+    creds = Credentials(token="expired", refresh_token=None, token_uri="https://oauth2.googleapis.com/token")
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(auth._fetch_profile(creds))
+    assert exc.value.status_code == 502
+
+
+def test_credentials_refreshed_only_when_stored_token_is_old(db_session, session_factory, monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    from app.core.models import DriveSession
+
+    refreshed = []
+    monkeypatch.setattr(Credentials, "refresh", lambda self, request: refreshed.append(self.token))
+    user = _create_user(db_session)
+    creds = Credentials(token="token-old", refresh_token="refresh", token_uri="https://oauth2.googleapis.com/token")
+    auth._persist_google_credentials(db_session, user.id, creds)
+    db_session.commit()
+
+    with session_factory() as fresh_db:
+        auth.get_google_credentials_for_user(fresh_db, user.id)
+    assert refreshed == []
+
+    auth._forget_credentials(user.id)
+    db_session.get(DriveSession, user.id).updated_at = datetime.now(timezone.utc) - timedelta(hours=2)
+    db_session.commit()
+    with session_factory() as fresh_db:
+        auth.get_google_credentials_for_user(fresh_db, user.id)
+    assert refreshed == ["token-old"]
+
+    # the refreshed token is committed even though get_db only closes the session
+    db_session.expire_all()
+    stored_at = auth._ensure_aware(db_session.get(DriveSession, user.id).updated_at)
+    assert stored_at > datetime.now(timezone.utc) - timedelta(minutes=1)
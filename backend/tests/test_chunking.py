@@ -1,6 +1,7 @@
 import random
 
-from app.rag.chunk import chunk_text
+from app.ingest.chunking import split_by_chars
+from app.rag.chunk import chunk_text, chunk_text_batch
 
 
 def test_chunk_text_generates_structured_chunks():
@@ -31,3 +32,29 @@ def test_chunker_preserves_headings_across_random_sections():
     chunks = chunk_text(text, meta={"id": "doc-2", "title": "Doc", "source": "drive"}, target_tokens=80, overlap_tokens=20)
     for idx in range(6):
         assert any(f"Section {idx}" in chunk["text"] for chunk in chunks)
+
+
+def test_chunk_text_batch_keeps_short_texts_whole():
+    long_text = " ".join(f"Sentence number {i} is here." for i in range(400))
+    chunks = chunk_text_batch(
+        [
+            ("Event: Standup\nStart: 9am", {"id": "evt-1", "source": "calendar"}),
+            ("   ", {"id": "evt-empty", "source": "calendar"}),
+            (long_text, {"id": "evt-2", "source": "calendar"}),
+        ],
+        target_tokens=80,
+        overlap_tokens=0,
+    )
+    short = [c for c in chunks if c["meta"]["id"] == "evt-1"]
+    assert len(short) == 1
+    assert short[0]["id"] == "evt-1:0"
+    assert short[0]["text"] == "Event: Standup\nStart: 9am"
+    assert not any(c["meta"]["id"] == "evt-empty" for c in chunks)
+    assert len([c for c in chunks if c["meta"]["id"] == "evt-2"]) > 1
+
+
+def test_split_by_chars_yields_overlapping_windows_lazily():
+    windows = split_by_chars("abcdefghij", max_chars=4, overlap=1)
+    assert next(windows) == "abcd"
+    assert list(windows) == ["defg", "ghij"]
+    assert list(split_by_chars("")) == []
@@ -49,7 +49,7 @@ def _process_file(idx: int) -> Dict[str, object]:
     timings.append(StageTiming("normalize", (time.perf_counter() - start) * 1000))
 
     start = time.perf_counter()
-    split_by_chars(normalized)
+    list(split_by_chars(normalized))
     timings.append(StageTiming("chunk", (time.perf_counter() - start) * 1000))
 
     start = time.perf_counter()
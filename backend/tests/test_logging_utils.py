@@ -13,3 +13,17 @@ def test_log_event_emits_json(caplog):
     assert payload["event"] == "test_event"
     assert payload["foo"] == "bar"
     assert "none_field" not in payload
+
+
+def test_log_event_falls_back_for_values_orjson_rejects(caplog):
+    caplog.set_level("INFO")
+    log_event("big_values", counts={1: "a"}, big=2**70)
+    payload = json.loads(caplog.records[0].message)
+    assert payload["counts"] == {"1": "a"}
+    assert payload["big"] == 2**70
+
+
+def test_log_event_skips_disabled_levels(caplog):
+    caplog.set_level("WARNING")
+    log_event("quiet_event", level="info")
+    assert not caplog.records
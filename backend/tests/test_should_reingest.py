@@ -1,7 +1,7 @@
 from datetime import datetime, timezone, timedelta
 from types import SimpleNamespace
 
-from app.ingest.should_ingest import should_reingest
+from app.ingest.should_ingest import md5_content_hash, should_reingest
 
 
 def make_stored(**overrides):
@@ -10,7 +10,8 @@ def make_stored(**overrides):
         "modified_time": datetime(2024, 1, 2, tzinfo=timezone.utc),
         "version": "1",
         "md5": "abc",
-        "content_hash": "hash-a",
+        "content_hash": md5_content_hash("abc"),
+        "size_bytes": None,
     }
     base.update(overrides)
     return SimpleNamespace(**base)
@@ -39,10 +40,70 @@ def test_should_reingest_detects_content_hash_difference():
 
 
 def test_should_reingest_skips_when_meta_and_content_match():
-    stored = make_stored(content_hash="hash-a")
+    stored = make_stored()
     incoming = {
         "modifiedTime": "2024-01-02T00:00:00Z",
         "md5Checksum": "abc",
         "version": "1",
     }
     assert should_reingest(stored, incoming, new_text=None) is False
+
+
+def test_should_reingest_treats_matching_md5_as_unchanged():
+    stored = make_stored()
+    incoming = {"modifiedTime": "2024-03-01T00:00:00Z", "md5Checksum": "abc", "version": "9"}
+    assert should_reingest(stored, incoming) is False
+
+
+def test_should_reingest_after_parser_version_bump_despite_matching_md5(monkeypatch):
+    from app.ingest import should_ingest
+
+    stored = make_stored()
+    incoming = {"md5Checksum": "abc"}
+    assert should_reingest(stored, incoming) is False
+    monkeypatch.setattr(should_ingest, "PARSER_VERSION", should_ingest.PARSER_VERSION + 1)
+    assert should_reingest(stored, incoming) is True
+
+
+def test_should_reingest_matching_md5_ignores_text_hash_scheme():
+    assert should_reingest(make_stored(), {"md5Checksum": "abc"}, new_text="body") is False
+
+
+def test_to_dt_fallback_matches_ciso8601(monkeypatch):
+    from app.ingest import should_ingest
+
+    values = [
+        "2024-01-02T03:04:05.123456789Z",
+        "2024-01-02T03:04:05+0530",
+        "2024-01-02T03:04:05.1-07:00",
+        "2024-01-02T03:04:05",
+        "2024-01-02",
+    ]
+    fast = [should_ingest._to_dt(v) for v in values]
+    monkeypatch.setattr(should_ingest, "ciso8601", None)
+    assert [should_ingest._to_dt(v) for v in values] == fast
+    assert fast[-1] == datetime(2024, 1, 2, tzinfo=timezone.utc)
+    assert should_ingest._to_dt("2024-13-02") is None
+    assert should_ingest._to_dt("not a date") is None
+
+
+def test_should_reingest_treats_same_time_and_size_as_unchanged_without_md5():
+    stored = make_stored(md5=None, size_bytes=1024)
+    incoming = {"modifiedTime": "2024-01-02T00:00:00Z", "size": "1024", "version": "7"}
+    assert should_reingest(stored, incoming) is False
+    assert should_reingest(stored, {**incoming, "size": "2048"}) is True
+    assert should_reingest(stored, {**incoming, "modifiedTime": "2024-01-03T00:00:00Z"}) is True
+    assert should_reingest(make_stored(md5=None), incoming) is True
+
+
+def test_should_reingest_skips_hashing_when_metadata_decides(monkeypatch):
+    from app.ingest import should_ingest
+
+    def fail_hash(text):
+        raise AssertionError("content hash should not be computed")
+
+    monkeypatch.setattr(should_ingest, "compute_content_hash", fail_hash)
+    stored = make_stored()
+    assert should_reingest(stored, {"md5Checksum": "zzz"}, new_text="body") is True
+    assert should_reingest(stored, {"modifiedTime": "2024-02-01T00:00:00Z"}, new_text="body") is True
+    assert should_reingest(stored, {"version": "2"}, new_text="body") is True
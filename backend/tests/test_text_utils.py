@@ -1,4 +1,7 @@
-from app.ingest.text_normalize import normalize_text, compute_content_hash
+import hashlib
+
+from app.ingest import text_normalize
+from app.ingest.text_normalize import normalize_text, compute_content_hash, sha256_text
 
 
 def test_normalize_text_cleans_whitespace_and_blank_lines():
@@ -7,7 +10,18 @@ def test_normalize_text_cleans_whitespace_and_blank_lines():
     assert normalized == "Hello\n\nWorld Example"
 
 
+def test_normalize_text_handles_lone_cr_tabs_and_zero_width():
+    raw = "a\u200b \t b\rc \u00A0\n\ufeffe\u0301 \td"
+    assert normalize_text(raw) == "a b\nc\n\u00e9 d"
+
+
 def test_compute_content_hash_is_stable_for_identical_text():
     text = "Some text to hash"
     assert compute_content_hash(text) == compute_content_hash(text)
     assert compute_content_hash(text) != compute_content_hash(text + " extra")
+
+
+def test_sha256_text_streams_large_text_without_changing_digest(monkeypatch):
+    text = "caf\u00e9 \u2014 na\u00efve " * 50
+    monkeypatch.setattr(text_normalize, "_HASH_SLICE_CHARS", 7)
+    assert sha256_text(text) == hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -0,0 +1,37 @@
+"""index in-flight and recent ingestion jobs per user
+
+Revision ID: 7c2f9a41d0b6
+Revises: dec314e13b3f
+Create Date: 2026-10-16 11:05:17.442190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2f9a41d0b6'
+down_revision: Union[str, Sequence[str], None] = 'dec314e13b3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_jobs_user_created', 'ingestion_jobs', ['user_id', 'created_at'], unique=False)
+    op.create_index(
+        'ix_job_active',
+        'ingestion_jobs',
+        ['user_id', 'created_at'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+        sqlite_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_job_active', table_name='ingestion_jobs')
+    op.drop_index('ix_jobs_user_created', table_name='ingestion_jobs')
@@ -0,0 +1,64 @@
+"""store session token hashes as raw digests
+
+Revision ID: dec314e13b3f
+Revises: 31341363563c
+Create Date: 2026-10-16 09:12:41.208334
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dec314e13b3f'
+down_revision: Union[str, Sequence[str], None] = '31341363563c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute(
+            "ALTER TABLE user_sessions ALTER COLUMN token_hash TYPE bytea USING decode(token_hash, 'hex')"
+        )
+        # one unique btree on token_hash instead of a unique index plus a constraint
+        op.drop_index('ix_user_sessions_token_hash', table_name='user_sessions')
+        op.create_unique_constraint('uq_user_sessions_token_hash', 'user_sessions', ['token_hash'])
+        return
+    # hex digests can't be converted in place here; existing sessions sign in again
+    op.execute("DELETE FROM user_sessions")
+    with op.batch_alter_table('user_sessions') as batch_op:
+        batch_op.drop_index('ix_user_sessions_token_hash')
+        batch_op.alter_column(
+            'token_hash',
+            existing_type=sa.String(),
+            type_=sa.LargeBinary(32),
+            existing_nullable=False,
+        )
+        batch_op.create_unique_constraint('uq_user_sessions_token_hash', ['token_hash'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.drop_constraint('uq_user_sessions_token_hash', 'user_sessions', type_='unique')
+        op.execute(
+            "ALTER TABLE user_sessions ALTER COLUMN token_hash TYPE varchar USING encode(token_hash, 'hex')"
+        )
+        op.create_index('ix_user_sessions_token_hash', 'user_sessions', ['token_hash'], unique=True)
+        return
+    op.execute("DELETE FROM user_sessions")
+    with op.batch_alter_table('user_sessions') as batch_op:
+        batch_op.drop_constraint('uq_user_sessions_token_hash', type_='unique')
+        batch_op.alter_column(
+            'token_hash',
+            existing_type=sa.LargeBinary(32),
+            type_=sa.String(),
+            existing_nullable=False,
+        )
+        batch_op.create_index('ix_user_sessions_token_hash', ['token_hash'], unique=True)